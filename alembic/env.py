@@ -1,6 +1,10 @@
+import time
 from logging.config import fileConfig
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config, inspect, pool, text
 from alembic import context
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 import sys
 import os
 
@@ -11,13 +15,17 @@ from app.database import Base
 from app.models import *
 
 config = context.config
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL_SYNC)
+config.set_main_option("sqlalchemy.url", settings.database_url_sync)
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
 
+# Ключ advisory lock: миграции прогоняет одна реплика, остальные ждут и находят head
+MIGRATION_LOCK_ID = 4242003
+MIGRATION_LOCK_POLL_SECONDS = 1
+
 
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
@@ -31,6 +39,39 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def acquire_migration_lock(connection) -> None:
+    """Session advisory lock held until the connection closes, i.e. for every migration.
+
+    Polled with pg_try_advisory_lock between transactions: a replica blocked in
+    pg_advisory_lock keeps a transaction open, and CREATE INDEX CONCURRENTLY in
+    the replica holding the lock would wait for it forever.
+    """
+    while not connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}).scalar():
+        connection.rollback()
+        time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+
+def stamp_create_all_schema(connection) -> None:
+    """Stamp head on a database built by create_all alone (tables but no alembic_version).
+
+    Only when its schema already matches the models: the migrations would
+    otherwise fail on tables that exist, so anything else needs a manual stamp.
+    Objects only migrations create (the trigram indexes of 005) are not compared.
+    """
+    inspector = inspect(connection)
+    if inspector.has_table("alembic_version") or not inspector.has_table("users"):
+        return
+    migration_context = MigrationContext.configure(connection)
+    diff = compare_metadata(migration_context, target_metadata)
+    if diff:
+        raise RuntimeError(
+            "Database has tables but no alembic_version and differs from the models "
+            f"({len(diff)} differences, first: {diff[0]}); "
+            "run `alembic stamp <revision>` with the revision it matches"
+        )
+    migration_context.stamp(ScriptDirectory.from_config(config), "head")
+
+
 def run_migrations_online() -> None:
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
@@ -38,6 +79,9 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
+        acquire_migration_lock(connection)
+        stamp_create_all_schema(connection)
+        connection.commit()
         context.configure(connection=connection, target_metadata=target_metadata)
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,46 @@
+"""Sales daily rollup
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales_daily_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('seller_id', sa.Integer(), nullable=False),
+        sa.Column('brand', sa.String(length=100), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('sales_count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('revenue_squares', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['seller_id'], ['sellers.id'], ),
+        sa.PrimaryKeyConstraint('day', 'seller_id', 'brand', 'model')
+    )
+
+    # Backfill from existing sales
+    op.execute("""
+        INSERT INTO sales_daily_rollup
+            (day, seller_id, brand, model, sales_count, revenue, revenue_squares)
+        SELECT date(s.sale_date), s.seller_id, c.brand, c.model,
+               count(s.id), sum(s.sale_price), sum(s.sale_price * s.sale_price)
+        FROM sales s
+        JOIN cars c ON c.id = s.car_id
+        WHERE s.sale_date IS NOT NULL
+        GROUP BY date(s.sale_date), s.seller_id, c.brand, c.model
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('sales_daily_rollup')
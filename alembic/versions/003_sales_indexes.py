@@ -0,0 +1,38 @@
+"""Sales date and foreign key indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в sales, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_sales_sale_date'), 'sales', ['sale_date'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_sales_seller_id_sale_date', 'sales', ['seller_id', 'sale_date'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            op.f('ix_sales_car_id'), 'sales', ['car_id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_sales_car_id'), table_name='sales', postgresql_concurrently=True)
+        op.drop_index('ix_sales_seller_id_sale_date', table_name='sales', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_sales_sale_date'), table_name='sales', postgresql_concurrently=True)
@@ -0,0 +1,32 @@
+"""created_at indexes for list pagination
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_cars_created_at'), 'cars', ['created_at'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            op.f('ix_clients_created_at'), 'clients', ['created_at'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_clients_created_at'), table_name='clients', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_cars_created_at'), table_name='cars', postgresql_concurrently=True)
@@ -0,0 +1,39 @@
+"""Trigram search indexes for cars and clients
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = [
+    ('ix_cars_vin_trgm', 'cars', 'vin'),
+    ('ix_cars_brand_trgm', 'cars', 'brand'),
+    ('ix_cars_model_trgm', 'cars', 'model'),
+    ('ix_clients_full_name_trgm', 'clients', 'full_name'),
+    ('ix_clients_email_trgm', 'clients', 'email'),
+    ('ix_clients_phone_digits_trgm', 'clients', r"(regexp_replace(phone, '\D', '', 'g'))"),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, table, expression in TRIGRAM_INDEXES:
+            op.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+                f'ON {table} USING gin ({expression} gin_trgm_ops)'
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(TRIGRAM_INDEXES):
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
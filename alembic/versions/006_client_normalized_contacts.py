@@ -0,0 +1,53 @@
+"""Normalized client phone/email for import deduplication
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('clients', sa.Column('phone_normalized', sa.String(length=20), nullable=True))
+    op.add_column('clients', sa.Column('email_normalized', sa.String(length=255), nullable=True))
+
+    # Те же правила, что и в app/models/normalize.py
+    op.execute(r"""
+        UPDATE clients c
+        SET phone_normalized = CASE
+                WHEN s.digits ~ '^8\d{10}$' THEN '7' || substr(s.digits, 2)
+                WHEN s.digits ~ '^9\d{9}$' THEN '7' || s.digits
+                ELSE NULLIF(s.digits, '')
+            END,
+            email_normalized = NULLIF(lower(trim(c.email)), '')
+        FROM (
+            SELECT id, regexp_replace(phone, '\D', '', 'g') AS digits FROM clients
+        ) s
+        WHERE s.id = c.id
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_clients_phone_normalized'), 'clients', ['phone_normalized'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            op.f('ix_clients_email_normalized'), 'clients', ['email_normalized'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_clients_email_normalized'), table_name='clients', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_clients_phone_normalized'), table_name='clients', postgresql_concurrently=True)
+    op.drop_column('clients', 'email_normalized')
+    op.drop_column('clients', 'phone_normalized')
@@ -0,0 +1,35 @@
+"""Car reservation expiry
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('cars', sa.Column('reserved_until', sa.DateTime(timezone=True), nullable=True))
+    # Брони, выставленные вручную до появления срока, живут ещё сутки
+    op.execute(
+        "UPDATE cars SET reserved_until = now() + interval '24 hours' "
+        "WHERE status = 'RESERVED' AND reserved_until IS NULL"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_cars_reserved_until'), 'cars', ['reserved_until'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_cars_reserved_until'), table_name='cars', postgresql_concurrently=True)
+    op.drop_column('cars', 'reserved_until')
@@ -0,0 +1,42 @@
+"""updated_at on clients and sellers, indexed everywhere for ETags
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+TABLES = ['cars', 'clients', 'sellers']
+
+
+def upgrade() -> None:
+    for table in ('clients', 'sellers'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    for table in TABLES:
+        # Версия строки для ETag: без изменений считаем от момента создания
+        op.execute(f"UPDATE {table} SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL")
+        op.alter_column(table, 'updated_at', server_default=sa.text('now()'), nullable=False)
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                op.f(f'ix_{table}_updated_at'), table, ['updated_at'],
+                unique=False, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in reversed(TABLES):
+            op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table, postgresql_concurrently=True)
+    op.alter_column('cars', 'updated_at', server_default=None, nullable=True)
+    op.drop_column('sellers', 'updated_at')
+    op.drop_column('clients', 'updated_at')
@@ -0,0 +1,38 @@
+"""Seller leaderboard
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-21 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'seller_leaderboard',
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('seller_id', sa.Integer(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('sales_count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('average_price', sa.Float(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['seller_id'], ['sellers.id'], ),
+        sa.PrimaryKeyConstraint('period', 'seller_id')
+    )
+    op.create_index('ix_seller_leaderboard_period_rank', 'seller_leaderboard', ['period', 'rank'], unique=False)
+    # Заполняется фоновым обновлением при старте приложения
+
+
+def downgrade() -> None:
+    op.drop_index('ix_seller_leaderboard_period_rank', table_name='seller_leaderboard')
+    op.drop_table('seller_leaderboard')
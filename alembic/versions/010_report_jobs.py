@@ -0,0 +1,51 @@
+"""Report jobs queue
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-22 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'report_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('report', sa.String(length=50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', 'CANCELLED', name='reportjobstatus'), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('result', sa.LargeBinary(), nullable=True),
+        sa.Column('result_size', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_report_jobs_id'), 'report_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_report_jobs_finished_at'), 'report_jobs', ['finished_at'], unique=False)
+    op.create_index('ix_report_jobs_status_id', 'report_jobs', ['status', 'id'], unique=False)
+    op.create_index('ix_report_jobs_user_id_id', 'report_jobs', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_report_jobs_user_id_id', table_name='report_jobs')
+    op.drop_index('ix_report_jobs_status_id', table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_finished_at'), table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_id'), table_name='report_jobs')
+    op.drop_table('report_jobs')
+    op.execute('DROP TYPE IF EXISTS reportjobstatus')
@@ -0,0 +1,36 @@
+"""Client a car reservation is held for
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-23 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Существующие брони остаются без клиента: продать такую машину можно только после /release
+    op.add_column('cars', sa.Column('reserved_for_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'cars_reserved_for_id_fkey', 'cars', 'clients',
+        ['reserved_for_id'], ['id'], ondelete='SET NULL'
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_cars_reserved_for_id'), 'cars', ['reserved_for_id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_cars_reserved_for_id'), table_name='cars', postgresql_concurrently=True)
+    op.drop_constraint('cars_reserved_for_id_fkey', 'cars', type_='foreignkey')
+    op.drop_column('cars', 'reserved_for_id')
@@ -0,0 +1,62 @@
+"""Per-table write counters for list ETags
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-23 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+TABLES = ['cars', 'clients', 'sellers', 'sales']
+EVENTS = {
+    'insert': 'AFTER INSERT ON {table} REFERENCING NEW TABLE AS changed',
+    'update': 'AFTER UPDATE ON {table} REFERENCING NEW TABLE AS changed',
+    'delete': 'AFTER DELETE ON {table} REFERENCING OLD TABLE AS changed',
+    'truncate': 'AFTER TRUNCATE ON {table}',
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(length=63), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'TRUNCATE' THEN
+                IF NOT EXISTS (SELECT 1 FROM changed) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        for name, event in EVENTS.items():
+            # create_all мог поставить триггер раньше миграции
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{name} ON {table}")
+            op.execute(
+                f"CREATE TRIGGER {table}_version_{name} {event.format(table=table)} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+            )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        for name in EVENTS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{name} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table('table_versions')
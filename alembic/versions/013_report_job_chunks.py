@@ -0,0 +1,42 @@
+"""Report job results stored in chunks
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-23 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'report_job_chunks',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['report_jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id', 'seq')
+    )
+    # Готовые результаты переносим одной частью
+    op.execute(
+        "INSERT INTO report_job_chunks (job_id, seq, data) "
+        "SELECT id, 0, result FROM report_jobs WHERE result IS NOT NULL"
+    )
+    op.drop_column('report_jobs', 'result')
+
+
+def downgrade() -> None:
+    op.add_column('report_jobs', sa.Column('result', sa.LargeBinary(), nullable=True))
+    op.execute(
+        "UPDATE report_jobs SET result = chunks.data FROM ("
+        "SELECT job_id, string_agg(data, ''::bytea ORDER BY seq) AS data FROM report_job_chunks GROUP BY job_id"
+        ") AS chunks WHERE chunks.job_id = report_jobs.id"
+    )
+    op.drop_table('report_job_chunks')
@@ -0,0 +1,84 @@
+"""List ETag versions from per-table sequences bumped at commit
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+TABLES = ['cars', 'clients', 'sellers', 'sales']
+OLD_EVENTS = {
+    'insert': 'AFTER INSERT ON {table} REFERENCING NEW TABLE AS changed',
+    'update': 'AFTER UPDATE ON {table} REFERENCING NEW TABLE AS changed',
+    'delete': 'AFTER DELETE ON {table} REFERENCING OLD TABLE AS changed',
+    'truncate': 'AFTER TRUNCATE ON {table}',
+}
+
+
+def upgrade() -> None:
+    # Строка-счётчик в table_versions блокировалась до коммита и выстраивала всех пишущих в очередь
+    for table in TABLES:
+        for name in OLD_EVENTS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{name} ON {table}")
+    op.drop_table('table_versions')
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            PERFORM nextval(TG_TABLE_NAME || '_version_seq');
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"CREATE SEQUENCE IF NOT EXISTS {table}_version_seq")
+        # create_all мог поставить триггеры раньше миграции
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version_bump ON {table}")
+        op.execute(
+            f"CREATE CONSTRAINT TRIGGER {table}_version_bump AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION bump_table_version()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_version_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version_bump ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version_truncate ON {table}")
+        op.execute(f"DROP SEQUENCE IF EXISTS {table}_version_seq")
+    op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(length=63), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'TRUNCATE' THEN
+                IF NOT EXISTS (SELECT 1 FROM changed) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        for name, event in OLD_EVENTS.items():
+            op.execute(
+                f"CREATE TRIGGER {table}_version_{name} {event.format(table=table)} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+            )
@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event, inspect
+from app.config import settings
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """What authenticated requests need to know about a user, without the ORM object"""
+    id: int
+    username: str
+    role: UserRole
+    is_active: bool
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+            email=user.email,
+            full_name=user.full_name
+        )
+
+
+class UserPrincipalCache:
+    """Bounded LRU of principals keyed by (username, token iat), entries expire after ttl"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[float, UserPrincipal]] = OrderedDict()
+
+    def get(self, username: str, issued_at: Optional[int]) -> Optional[UserPrincipal]:
+        key = (username, issued_at)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, username: str, issued_at: Optional[int], principal: UserPrincipal) -> None:
+        key = (username, issued_at)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, username: str) -> None:
+        for key in [key for key in self._entries if key[0] == username]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+user_cache = UserPrincipalCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    # Сбрасываем и старое имя, если username поменялся
+    for username in {target.username, *inspect(target).attrs.username.history.deleted}:
+        user_cache.invalidate(username)
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
+from app.config import settings
+from app.auth.security import verify_password, get_password_hash
+from app.metrics import password_hash_latency, password_hash_rejected, register_callback
+
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight = 0
+
+register_callback(
+    "password_hash_in_flight", "bcrypt calls running or queued", (),
+    lambda: {(): _in_flight}
+)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        # bcrypt отпускает GIL, поэтому потоки реально считают хэши параллельно
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt"
+        )
+    return _executor
+
+
+async def _run_bcrypt(operation: str, fn, *args):
+    """Run a bcrypt call off the event loop, rejecting work beyond workers + queue limit"""
+    global _in_flight
+    if _in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_LIMIT:
+        password_hash_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password checks, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _in_flight += 1
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _in_flight -= 1
+        password_hash_latency.observe(time.perf_counter() - start, operation)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_bcrypt("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_bcrypt("hash", get_password_hash, password)
+
+
+def shutdown_password_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
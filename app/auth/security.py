@@ -9,8 +9,9 @@ from sqlalchemy import select
 from app.config import settings
 from app.database import get_db
 from app.models.user import User, UserRole
+from app.auth.cache import UserPrincipal, user_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 security = HTTPBearer()
 
 
@@ -25,7 +26,7 @@ def get_password_hash(password: str) -> str:
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "type": "access"})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
@@ -39,7 +40,7 @@ def create_refresh_token(data: dict) -> str:
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -50,23 +51,30 @@ async def get_current_user(
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         token_type: str = payload.get("type")
+        issued_at: Optional[int] = payload.get("iat")
         
         if username is None or token_type != "access":
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
+    principal = user_cache.get(username, issued_at)
+    if principal is not None:
+        return principal
+
     result = await db.execute(select(User).where(User.username == username))
     user = result.scalar_one_or_none()
     
     if user is None or not user.is_active:
         raise credentials_exception
     
-    return user
+    principal = UserPrincipal.from_user(user)
+    user_cache.set(username, issued_at, principal)
+    return principal
 
 
 def require_role(allowed_roles: list[UserRole]):
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -1,30 +1,254 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import AsyncIterator, Optional
+from fastapi import Depends, Request
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.metrics import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Клиент, недавно писавший в базу, читает с primary, чтобы видеть свои изменения
+READ_PRIMARY_COOKIE = "read_primary"
+READ_CONSISTENCY_HEADER = "X-Read-Consistency"
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+
+def engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+
+    connect_args = {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "timeout": settings.DB_CONNECT_TIMEOUT,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
 
 # Используем property для правильного async URL
 engine = create_async_engine(
     settings.database_url_async,
     echo=settings.DEBUG,
     future=True,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    **engine_options(settings.database_url_async)
 )
 
+read_engine = None
+if settings.database_read_url_async:
+    read_engine = create_async_engine(
+        settings.database_read_url_async,
+        echo=settings.DEBUG,
+        future=True,
+        **engine_options(settings.database_read_url_async)
+    )
+
+# Одни хуки на движок и для /metrics, и для бюджета запросов QUERY_DEBUG
+if settings.statement_hooks_enabled:
+    instrument_engine(engine, "primary")
+    if read_engine is not None:
+        instrument_engine(read_engine, "replica")
+
+
+class PrimarySession(Session):
+    pass
+
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=PrimarySession,
     expire_on_commit=False
 )
 
+read_session_maker = None
+if read_engine is not None:
+    read_session_maker = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+_replica_down_until = 0.0
+
 
 class Base(DeclarativeBase):
     pass
 
 
+class RequestWrites:
+    """Whether the current request committed anything on the primary"""
+    __slots__ = ("committed",)
+
+    def __init__(self):
+        self.committed = False
+
+
+current_request_writes: ContextVar[Optional[RequestWrites]] = ContextVar("current_request_writes", default=None)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _stick_to_primary(session: Session) -> None:
+    writes = current_request_writes.get()
+    if writes is not None:
+        writes.committed = True
+
+
+def read_primary_cookie() -> bytes:
+    cookie = SimpleCookie()
+    cookie[READ_PRIMARY_COOKIE] = "1"
+    morsel = cookie[READ_PRIMARY_COOKIE]
+    morsel["max-age"] = settings.READ_YOUR_WRITES_SECONDS
+    morsel["path"] = "/"
+    morsel["httponly"] = True
+    morsel["samesite"] = "lax"
+    return morsel.OutputString().encode("latin-1")
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware: sets the read_primary cookie on responses to requests that wrote.
+
+    Added to the outgoing headers here rather than to the Response of the
+    get_db dependency, which FastAPI drops when a handler returns its own
+    Response object.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or read_session_maker is None:
+            await self.app(scope, receive, send)
+            return
+
+        writes = RequestWrites()
+        token = current_request_writes.set(writes)
+
+        async def send_wrapper(message):
+            # Коммиты стриминговых ответов после заголовков сюда уже не попадут
+            if message["type"] == "http.response.start" and writes.committed:
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", read_primary_cookie())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_writes.reset(token)
+
+
 async def get_db() -> AsyncSession:
     async with async_session_maker() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+async def open_replica_session() -> Optional[AsyncSession]:
+    """Connected session on the read replica, None when there is none or it is down"""
+    global _replica_down_until
+    if read_session_maker is None or time.monotonic() < _replica_down_until:
+        return None
+
+    session = read_session_maker()
+    try:
+        await session.connection()
+    except Exception as e:
+        # Ошибки подключения asyncpg не всегда оборачиваются в SQLAlchemyError
+        logger.warning(f"Read replica unavailable, falling back to primary: {e}")
+        _replica_down_until = time.monotonic() + settings.READ_REPLICA_RETRY_SECONDS
+        await session.close()
+        return None
+    return session
+
+
+@asynccontextmanager
+async def read_session(prefer_primary: bool = False) -> AsyncIterator[AsyncSession]:
+    """Standalone read session for work outside request dependencies"""
+    replica = None if prefer_primary else await open_replica_session()
+    if replica is None:
+        async with async_session_maker() as session:
+            yield session
+        return
+
+    try:
+        yield replica
+    finally:
+        await replica.close()
+
+
+def prefers_primary(request: Request) -> bool:
+    return (
+        READ_PRIMARY_COOKIE in request.cookies
+        or request.headers.get(READ_CONSISTENCY_HEADER) == "primary"
+    )
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)) -> AsyncSession:
+    # При откате на primary берём сессию запроса, чтобы не держать два соединения
+    replica = None if prefers_primary(request) else await open_replica_session()
+    if replica is None:
+        yield db
+        return
+
+    try:
+        yield replica
+    finally:
+        await replica.close()
+
+
+def get_pool_stats(async_engine: AsyncEngine = engine) -> dict:
+    pool = async_engine.sync_engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "checkouts": pool.wait_count,
+        "wait_time_total": round(pool.wait_time_total, 6),
+        "wait_time_max": round(pool.wait_time_max, 6),
+        "timeouts": pool.timeouts,
+    }
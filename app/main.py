@@ -1,9 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, read_engine, Base, ReadYourWritesMiddleware, get_pool_stats
 from app.routers import api_router
+from app.services.search import detect_trigram
+from app.auth.passwords import shutdown_password_executor
+from app.services.report_render import shutdown_render_executor
+from app.query_budget import QueryBudgetMiddleware
+from app.metrics import MetricsMiddleware, register_callback, registry
+from app.services.reservations import start_reservation_sweeper, stop_reservation_sweeper
+from app.services.leaderboard import start_leaderboard_refresher, stop_leaderboard_refresher
+from app.services.report_jobs import start_report_workers, stop_report_workers
 import logging
 
 # Настройка логирования
@@ -18,14 +27,39 @@ async def lifespan(app: FastAPI):
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            if not await detect_trigram(conn):
+                logger.warning("pg_trgm is not installed, search results will not be ranked")
         logger.info("Database tables created")
     except Exception as e:
         logger.error(f"Database connection error: {e}")
         raise
+    start_reservation_sweeper()
+    start_leaderboard_refresher()
+    start_report_workers()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    await stop_reservation_sweeper()
+    await stop_leaderboard_refresher()
+    await stop_report_workers()
+    shutdown_password_executor()
+    shutdown_render_executor()
     await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
+
+
+def pool_samples(keys: tuple) -> dict:
+    engines = {"primary": engine, "replica": read_engine}
+    samples = {}
+    for name, async_engine in engines.items():
+        if async_engine is None:
+            continue
+        stats = get_pool_stats(async_engine)
+        for key in keys:
+            if key in stats:
+                samples[(name, key) if len(keys) > 1 else (name,)] = stats[key]
+    return samples
 
 
 app = FastAPI(
@@ -45,6 +79,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes: cookie read_primary после записи, пока у приложения есть реплика
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Metrics
+if settings.METRICS_ENABLED:
+    register_callback(
+        "db_pool_connections", "Pool connections by state", ("pool", "state"),
+        lambda: pool_samples(("size", "checked_in", "checked_out", "overflow"))
+    )
+    register_callback(
+        "db_pool_checkouts_total", "Pool checkouts", ("pool",),
+        lambda: pool_samples(("checkouts",)), "counter"
+    )
+    register_callback(
+        "db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", ("pool",),
+        lambda: pool_samples(("wait_time_total",)), "counter"
+    )
+    register_callback(
+        "db_pool_timeouts_total", "Checkouts that hit DB_POOL_TIMEOUT", ("pool",),
+        lambda: pool_samples(("timeouts",)), "counter"
+    )
+    app.add_middleware(MetricsMiddleware)
+
+# Query budget (QUERY_DEBUG): X-Query-Count / X-DB-Time и предупреждения об N+1
+if settings.QUERY_DEBUG:
+    app.add_middleware(QueryBudgetMiddleware)
+
 # Routers
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -60,4 +121,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/health/pool")
+async def pool_stats():
+    return {
+        "primary": get_pool_stats(engine),
+        "replica": get_pool_stats(read_engine) if read_engine is not None else None,
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
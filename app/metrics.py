@@ -0,0 +1,250 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.query_budget import current_query_log
+
+# Границы бакетов в секундах, как у стандартного клиента Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        # Счётчик без меток сразу отдаёт 0, чтобы rate() работал с первого скрейпа
+        self._values: dict[tuple, float] = {} if labels else {(): 0.0}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class CallbackMetric:
+    """Samples read from a callback at scrape time, for state owned by other objects"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple,
+        collect: Callable[[], dict],
+        metric_type: str = "gauge"
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.metric_type = metric_type
+        self._collect = collect
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+        for label_values, value in sorted(self._collect().items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [счётчики по бакетам (+Inf последним), сумма]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                labels = _format_labels((*self.labels, "le"), (*label_values, bound))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status")
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route")
+))
+db_statements = registry.register(Counter(
+    "db_statements_total", "SQL statements executed, by route", ("route",)
+))
+db_time = registry.register(Counter(
+    "db_time_seconds_total", "Time spent in SQL statements, by route", ("route",)
+))
+db_statement_latency = registry.register(Histogram(
+    "db_statement_duration_seconds", "SQL statement latency", ("engine",), DB_BUCKETS
+))
+db_statements_per_request = registry.register(Histogram(
+    "db_statements_per_request", "SQL statements issued by one request", ("route",),
+    (1, 2, 3, 5, 8, 13, 21, 50, 100)
+))
+password_hash_latency = registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time including queueing", ("operation",)
+))
+password_hash_rejected = registry.register(Counter(
+    "password_hash_rejected_total", "bcrypt calls rejected because the pool queue was full"
+))
+report_render_latency = registry.register(Histogram(
+    "report_render_duration_seconds", "xlsx render time including queueing for a worker process", ("report",)
+))
+report_render_rejected = registry.register(Counter(
+    "report_render_rejected_total", "xlsx renders rejected because the render queue was full"
+))
+report_job_duration = registry.register(Histogram(
+    "report_job_duration_seconds", "Background report job run time by final status", ("report", "status"),
+    (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 1800.0)
+))
+
+
+class RequestStats:
+    """DB work done while handling one request"""
+    __slots__ = ("statements", "db_time")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+
+# Контекст запроса виден и внутри greenlet-ов SQLAlchemy, там срабатывают события движка
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def instrument_engine(async_engine: AsyncEngine, name: str) -> None:
+    """Time every statement on the engine and charge it to the current request.
+
+    The one set of statement hooks per engine: besides the histogram and the
+    request stats it feeds the QueryLog of query_budget in QUERY_DEBUG mode.
+    """
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_statement_latency.observe(elapsed, name)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+        log = current_query_log.get()
+        if log is not None:
+            log.record(statement, elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency, status codes and DB usage.
+
+    The route label is the matched path template (/api/v1/cars/{car_id}), never
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_requests.inc(method, route, status_code)
+            http_latency.observe(time.perf_counter() - start, method, route)
+            db_statements.inc(route, amount=stats.statements)
+            db_time.inc(route, amount=stats.db_time)
+            db_statements_per_request.observe(stats.statements, route)
+
+
+def register_callback(
+    name: str,
+    documentation: str,
+    labels: tuple,
+    collect: Callable[[], dict],
+    metric_type: str = "gauge"
+) -> None:
+    registry.register(CallbackMetric(name, documentation, labels, collect, metric_type))
@@ -3,5 +3,9 @@ from app.models.car import Car
 from app.models.client import Client
 from app.models.seller import Seller
 from app.models.sale import Sale
+from app.models.sales_rollup import SalesDailyRollup
+from app.models.seller_leaderboard import SellerLeaderboard
+from app.models.report_job import ReportJob, ReportJobChunk
+from app.models.table_version import TABLE_VERSION_SEQUENCES
 
-__all__ = ["User", "Car", "Client", "Seller", "Sale"]
\ No newline at end of file
+__all__ = ["User", "Car", "Client", "Seller", "Sale", "SalesDailyRollup", "SellerLeaderboard", "ReportJob", "ReportJobChunk", "TABLE_VERSION_SEQUENCES"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -22,7 +22,11 @@ class Car(Base):
     color = Column(String(50))
     price = Column(Float, nullable=False)
     status = Column(Enum(CarStatus), default=CarStatus.AVAILABLE, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Когда истекает бронь (только для RESERVED)
+    reserved_until = Column(DateTime(timezone=True), index=True)
+    # Клиент, за которым держат машину; продать её можно только ему
+    reserved_for_id = Column(Integer, ForeignKey("clients.id", ondelete="SET NULL"), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     sales = relationship("Sale", back_populates="car")
\ No newline at end of file
@@ -1,7 +1,8 @@
 from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from app.database import Base
+from app.models.normalize import normalize_phone, normalize_email
 
 
 class Client(Base):
@@ -11,7 +12,21 @@ class Client(Base):
     full_name = Column(String(255), nullable=False)
     phone = Column(String(20), nullable=False, index=True)
     email = Column(String(255))
+    # Ключи дедупликации, заполняются автоматически при изменении phone/email
+    phone_normalized = Column(String(20), index=True)
+    email_normalized = Column(String(255), index=True)
     document_id = Column(String(50))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
-    sales = relationship("Sale", back_populates="client")
\ No newline at end of file
+    sales = relationship("Sale", back_populates="client")
+
+    @validates("phone")
+    def _set_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
+
+    @validates("email")
+    def _set_email_normalized(self, key, value):
+        self.email_normalized = normalize_email(value)
+        return value
\ No newline at end of file
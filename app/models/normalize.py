@@ -0,0 +1,24 @@
+import re
+from typing import Optional
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    """Canonical digits-only phone used for deduplication.
+
+    Russian numbers are brought to the 7XXXXXXXXXX form, so '8 (999) 111-11-11',
+    '+7 999 111 11 11' and '9991111111' map to the same key.
+    """
+    if not value:
+        return None
+    digits = re.sub(r"\D", "", value)
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    elif len(digits) == 10 and digits.startswith("9"):
+        digits = "7" + digits
+    return digits or None
+
+
+def normalize_email(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return value.strip().lower() or None
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Index, JSON, LargeBinary
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+
+class ReportJobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class ReportJob(Base):
+    """Queued report run; the table is the queue, workers claim rows with SKIP LOCKED"""
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        Index("ix_report_jobs_status_id", "status", "id"),
+        Index("ix_report_jobs_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    report = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    format = Column(String(10), nullable=False, default="json")
+    status = Column(Enum(ReportJobStatus), default=ReportJobStatus.PENDING, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Кто выполняет: host:pid, по нему heartbeat отличает свою работу от перехваченной
+    worker = Column(String(100))
+    error = Column(Text)
+    # Размер результата; сам он лежит частями в report_job_chunks
+    result_size = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True), index=True)
+
+
+class ReportJobChunk(Base):
+    """Piece of a finished job's output, kept in the database so any replica can serve the download"""
+    __tablename__ = "report_job_chunks"
+
+    job_id = Column(Integer, ForeignKey("report_jobs.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)
\ No newline at end of file
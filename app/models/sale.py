@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -6,13 +6,16 @@ from app.database import Base
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        Index("ix_sales_seller_id_sale_date", "seller_id", "sale_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    car_id = Column(Integer, ForeignKey("cars.id"), nullable=False)
+    car_id = Column(Integer, ForeignKey("cars.id"), nullable=False, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
     sale_price = Column(Float, nullable=False)
-    sale_date = Column(DateTime(timezone=True), server_default=func.now())
+    sale_date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     car = relationship("Car", back_populates="sales")
     client = relationship("Client", back_populates="sales")
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from app.database import Base
+
+
+class SalesDailyRollup(Base):
+    __tablename__ = "sales_daily_rollup"
+
+    day = Column(Date, primary_key=True)
+    seller_id = Column(Integer, ForeignKey("sellers.id"), primary_key=True)
+    brand = Column(String(100), primary_key=True)
+    model = Column(String(100), primary_key=True)
+    sales_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    revenue_squares = Column(Float, nullable=False, default=0)
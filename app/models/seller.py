@@ -12,5 +12,6 @@ class Seller(Base):
     phone = Column(String(20), nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     sales = relationship("Sale", back_populates="seller")
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SellerLeaderboard(Base):
+    """Precomputed seller ranks for the current day, week, month and quarter"""
+    __tablename__ = "seller_leaderboard"
+    __table_args__ = (
+        Index("ix_seller_leaderboard_period_rank", "period", "rank"),
+    )
+
+    period = Column(String(10), primary_key=True)
+    seller_id = Column(Integer, ForeignKey("sellers.id"), primary_key=True)
+    period_start = Column(Date, nullable=False)
+    sales_count = Column(Integer, nullable=False)
+    revenue = Column(Float, nullable=False)
+    average_price = Column(Float, nullable=False)
+    rank = Column(Integer, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
@@ -0,0 +1,58 @@
+from sqlalchemy import DDL, Sequence, event
+from app.database import Base
+
+# Таблицы, по которым строятся ETag списков
+VERSIONED_TABLES = ("cars", "clients", "sellers", "sales")
+
+BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    -- nextval не берёт блокировок строк и не откатывается: пишущие транзакции не ждут друг друга
+    PERFORM nextval(TG_TABLE_NAME || '_version_seq');
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Версия растёт при COMMIT (отложенный constraint-триггер), а не при самой записи: иначе
+# список, прочитанный до коммита, получил бы новый тег со старыми данными и 304 закрепил бы их.
+# У TRUNCATE отложенных триггеров нет, его считаем сразу
+TRIGGER_CLAUSES = {
+    "bump": (
+        "CONSTRAINT TRIGGER {name} AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        "DEFERRABLE INITIALLY DEFERRED FOR EACH ROW"
+    ),
+    "truncate": "TRIGGER {name} AFTER TRUNCATE ON {table} FOR EACH STATEMENT",
+}
+
+
+def version_sequence(table: str) -> str:
+    return f"{table}_version_seq"
+
+
+def version_trigger_statements(table: str) -> list[str]:
+    return [
+        f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_trigger WHERE tgrelid = '{table}'::regclass AND tgname = '{table}_version_{kind}'
+            ) THEN
+                CREATE {clause.format(name=f"{table}_version_{kind}", table=table)}
+                EXECUTE FUNCTION bump_table_version();
+            END IF;
+        END $$
+        """
+        for kind, clause in TRIGGER_CLAUSES.items()
+    ]
+
+
+# Счётчик записей на таблицу; ETag списка меняется с любой вставкой, правкой или удалением
+TABLE_VERSION_SEQUENCES = {
+    table: Sequence(version_sequence(table), metadata=Base.metadata) for table in VERSIONED_TABLES
+}
+
+# create_all без миграций тоже должен ставить триггеры, иначе ETag списков не меняются
+event.listen(Base.metadata, "after_create", DDL(BUMP_FUNCTION).execute_if(dialect="postgresql"))
+for _table in VERSIONED_TABLES:
+    for _statement in version_trigger_statements(_table):
+        event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,143 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+DB_TIME_HEADER = "X-DB-Time"
+QUERY_REPEATS_HEADER = "X-Query-Repeats"
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+(?:::\w+)?|%\(\w+\)s|\?|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\?(?:, \?)+\)")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement text with literals and bind parameters replaced by ?.
+
+    The same query issued with different ids gets the same fingerprint, which is
+    what a loop of per-row lookups (N+1) looks like from the database side.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _LITERALS.sub("?", statement)
+    return _VALUE_LISTS.sub("(?, ...)", statement)
+
+
+class QueryLog:
+    """Statements executed inside one request or budget block"""
+
+    def __init__(self, parent: Optional["QueryLog"] = None):
+        self.parent = parent
+        self.count = 0
+        self.db_time = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        key = fingerprint(statement)
+        log = self
+        while log is not None:
+            log.count += 1
+            log.db_time += elapsed
+            log.fingerprints[key] += 1
+            log = log.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [
+            (key, count) for key, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+    def max_repeats(self) -> int:
+        most_common = self.fingerprints.most_common(1)
+        return most_common[0][1] if most_common else 0
+
+
+current_query_log: ContextVar[Optional[QueryLog]] = ContextVar("current_query_log", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def format_repeats(repeats: list[tuple[str, int]]) -> str:
+    return "; ".join(f"{count}x {key[:200]}" for key, count in repeats)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[QueryLog]:
+    """Fail when the block runs more statements than declared.
+
+    Usable from tests and scripts that drive the app in-process, e.g.
+
+        with query_budget(3):
+            await client.get("/api/v1/sellers/")
+
+    max_repeats limits how often one fingerprint may repeat, which catches N+1
+    loops that still fit under the total. Statements are recorded by the engine
+    hooks of app.metrics, which are on with METRICS_ENABLED or QUERY_DEBUG.
+    """
+    if not settings.statement_hooks_enabled:
+        raise RuntimeError("Query tracking is off, set QUERY_DEBUG=true")
+
+    log = QueryLog(parent=current_query_log.get())
+    token = current_query_log.set(log)
+    try:
+        yield log
+    finally:
+        current_query_log.reset(token)
+
+    if log.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{log.count} queries, budget is {max_queries}: {format_repeats(log.fingerprints.most_common())}"
+        )
+    if max_repeats is not None:
+        repeats = log.repeated(max_repeats + 1)
+        if repeats:
+            raise QueryBudgetExceeded(f"Repeated queries (N+1?): {format_repeats(repeats)}")
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware for QUERY_DEBUG mode.
+
+    Adds X-Query-Count, X-DB-Time (ms) and X-Query-Repeats (the most times one
+    fingerprint ran) to every response, and logs a warning when a fingerprint
+    repeats QUERY_REPEAT_THRESHOLD times or more within one request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog(parent=current_query_log.get())
+        token = current_query_log.set(log)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Стриминговые ответы выполняют запросы и после заголовков, их не видно
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (QUERY_COUNT_HEADER.lower().encode(), str(log.count).encode()),
+                    (DB_TIME_HEADER.lower().encode(), f"{log.db_time * 1000:.2f}".encode()),
+                    (QUERY_REPEATS_HEADER.lower().encode(), str(log.max_repeats()).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_log.reset(token)
+            repeats = log.repeated(settings.QUERY_REPEAT_THRESHOLD)
+            if repeats:
+                logger.warning(
+                    f"Possible N+1 in {scope['method']} {scope['path']}: "
+                    f"{log.count} queries, {format_repeats(repeats)}"
+                )
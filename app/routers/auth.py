@@ -3,11 +3,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.database import get_db
 from app.models.user import User
-from app.schemas.auth import LoginRequest, TokenResponse, RefreshTokenRequest, UserResponse, UserCreate
+from app.schemas.auth import (
+    LoginRequest, TokenResponse, RefreshTokenRequest, UserResponse, UserCreate, UserCacheStats
+)
 from app.auth.security import (
-    verify_password, get_password_hash, create_access_token, 
-    create_refresh_token, get_current_user
+    create_access_token, create_refresh_token, get_current_user, require_director
 )
+from app.auth.passwords import verify_password_async, get_password_hash_async
+from app.auth.cache import UserPrincipal, user_cache
 from app.config import settings
 from jose import JWTError, jwt
 
@@ -19,7 +22,7 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.username == request.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    if not user or not await verify_password_async(request.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -70,10 +73,15 @@ async def refresh_token(request: RefreshTokenRequest, db: AsyncSession = Depends
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: UserPrincipal = Depends(get_current_user)):
     return current_user
 
 
+@router.get("/cache-stats", response_model=UserCacheStats)
+async def get_user_cache_stats(current_user: UserPrincipal = Depends(require_director)):
+    return user_cache.stats()
+
+
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.username == user_data.username))
@@ -83,7 +91,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     user = User(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role
     )
@@ -1,26 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.car import Car, CarStatus
-from app.models.user import User
-from app.schemas.car import CarCreate, CarUpdate, CarResponse, CarListResponse
+from app.schemas.car import CarCreate, CarUpdate, CarReserve, CarResponse, CarListResponse
+from app.schemas.imports import ImportReport
 from app.auth.security import get_current_user
+from app.auth.cache import UserPrincipal
+from app.services.car_import import import_cars
+from app.services.etags import check_collection_not_modified, check_not_modified, entity_etag
+from app.services.pagination import paginate
+from app.services.report_cache import report_cache
+from app.services.reservations import reserve_car, release_car, reservation_expiry
+from app.services.search import car_search, search_dialect
+from app.services.uploads import iter_upload_rows, parse_in_thread
 
 router = APIRouter()
 
 
 @router.get("", response_model=CarListResponse)
 async def get_cars(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     status: Optional[CarStatus] = None,
     brand: Optional[str] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    unchanged = await check_collection_not_modified(request, response, db, "cars", ("cars",))
+    if unchanged:
+        return unchanged
+    
     query = select(Car)
     count_query = select(func.count(Car.id))
     
@@ -32,27 +48,23 @@ async def get_cars(
         query = query.where(Car.brand.ilike(f"%{brand}%"))
         count_query = count_query.where(Car.brand.ilike(f"%{brand}%"))
     
+    rank = None
     if search:
-        search_filter = (
-            Car.vin.ilike(f"%{search}%") |
-            Car.brand.ilike(f"%{search}%") |
-            Car.model.ilike(f"%{search}%")
-        )
+        search_filter, rank = car_search(search, search_dialect(db))
         query = query.where(search_filter)
         count_query = count_query.where(search_filter)
     
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
-    
-    query = query.offset((page - 1) * per_page).limit(per_page).order_by(Car.created_at.desc())
-    result = await db.execute(query)
-    cars = result.scalars().all()
+    result = await paginate(
+        db, query, count_query, Car.created_at, Car.id,
+        page, per_page, cursor, include_total, rank=rank
+    )
     
     return CarListResponse(
-        items=[CarResponse.model_validate(car) for car in cars],
-        total=total,
+        items=[CarResponse.model_validate(car) for car in result.items],
+        total=result.total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=result.next_cursor
     )
 
 
@@ -60,29 +72,53 @@ async def get_cars(
 async def create_car(
     car_data: CarCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     result = await db.execute(select(Car).where(Car.vin == car_data.vin))
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="VIN already exists")
     
     car = Car(**car_data.model_dump())
+    if car.status == CarStatus.RESERVED:
+        car.reserved_until = reservation_expiry()
     db.add(car)
     await db.commit()
+    await report_cache.invalidate()
     await db.refresh(car)
     return car
 
 
+@router.post("/bulk", response_model=ImportReport)
+async def bulk_import_cars(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Import cars from a CSV, JSON or NDJSON file"""
+    report = await import_cars(db, parse_in_thread(iter_upload_rows(file)))
+    await report_cache.invalidate()
+    return report
+
+
 @router.get("/{car_id}", response_model=CarResponse)
 async def get_car(
     car_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    unchanged = await check_not_modified(
+        request, db, "car", car_id, select(Car.updated_at).where(Car.id == car_id)
+    )
+    if unchanged:
+        return unchanged
+    
     result = await db.execute(select(Car).where(Car.id == car_id))
     car = result.scalar_one_or_none()
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
+    entity_etag(response, "car", car.id, car.updated_at)
     return car
 
 
@@ -91,7 +127,7 @@ async def update_car(
     car_id: int,
     car_data: CarUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     result = await db.execute(select(Car).where(Car.id == car_id))
     car = result.scalar_one_or_none()
@@ -102,16 +138,50 @@ async def update_car(
     for field, value in update_data.items():
         setattr(car, field, value)
     
+    # Ручная бронь тоже должна истекать
+    if car.status == CarStatus.RESERVED and car.reserved_until is None:
+        car.reserved_until = reservation_expiry()
+    elif car.status != CarStatus.RESERVED:
+        car.reserved_until = None
+        car.reserved_for_id = None
+    
     await db.commit()
+    await report_cache.invalidate()
     await db.refresh(car)
     return car
 
 
+@router.post("/{car_id}/reserve", response_model=CarResponse)
+async def reserve(
+    car_id: int,
+    reserve_data: CarReserve,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Hold an available car for a client, or extend that client's hold"""
+    car = await reserve_car(db, car_id, reserve_data.client_id, reserve_data.hours)
+    await db.commit()
+    await report_cache.invalidate()
+    return car
+
+
+@router.post("/{car_id}/release", response_model=CarResponse)
+async def release(
+    car_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    car = await release_car(db, car_id)
+    await db.commit()
+    await report_cache.invalidate()
+    return car
+
+
 @router.delete("/{car_id}", status_code=204)
 async def delete_car(
     car_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     result = await db.execute(select(Car).where(Car.id == car_id))
     car = result.scalar_one_or_none()
@@ -119,4 +189,5 @@ async def delete_car(
         raise HTTPException(status_code=404, detail="Car not found")
     
     await db.delete(car)
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+    await report_cache.invalidate()
\ No newline at end of file
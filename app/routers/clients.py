@@ -1,48 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.client import Client
-from app.models.user import User
 from app.schemas.client import ClientCreate, ClientUpdate, ClientResponse, ClientListResponse
+from app.schemas.imports import ImportReport
 from app.auth.security import get_current_user
+from app.auth.cache import UserPrincipal
+from app.services.client_import import import_clients
+from app.services.etags import check_collection_not_modified, check_not_modified, entity_etag
+from app.services.pagination import paginate
+from app.services.search import client_search, search_dialect
+from app.services.uploads import iter_upload_rows, parse_in_thread
 
 router = APIRouter()
 
 
 @router.get("", response_model=ClientListResponse)
 async def get_clients(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    unchanged = await check_collection_not_modified(request, response, db, "clients", ("clients",))
+    if unchanged:
+        return unchanged
+    
     query = select(Client)
     count_query = select(func.count(Client.id))
     
+    rank = None
     if search:
-        search_filter = (
-            Client.full_name.ilike(f"%{search}%") |
-            Client.phone.ilike(f"%{search}%") |
-            Client.email.ilike(f"%{search}%")
-        )
+        search_filter, rank = client_search(search, search_dialect(db))
         query = query.where(search_filter)
         count_query = count_query.where(search_filter)
     
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
-    
-    query = query.offset((page - 1) * per_page).limit(per_page).order_by(Client.created_at.desc())
-    result = await db.execute(query)
-    clients = result.scalars().all()
+    result = await paginate(
+        db, query, count_query, Client.created_at, Client.id,
+        page, per_page, cursor, include_total, rank=rank
+    )
     
     return ClientListResponse(
-        items=[ClientResponse.model_validate(c) for c in clients],
-        total=total,
+        items=[ClientResponse.model_validate(c) for c in result.items],
+        total=result.total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=result.next_cursor
     )
 
 
@@ -50,7 +60,7 @@ async def get_clients(
 async def create_client(
     client_data: ClientCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     client = Client(**client_data.model_dump())
     db.add(client)
@@ -59,16 +69,35 @@ async def create_client(
     return client
 
 
+@router.post("/bulk", response_model=ImportReport)
+async def bulk_import_clients(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Import clients from a CSV, JSON or NDJSON file, merging by phone/email"""
+    return await import_clients(db, parse_in_thread(iter_upload_rows(file)))
+
+
 @router.get("/{client_id}", response_model=ClientResponse)
 async def get_client(
     client_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    unchanged = await check_not_modified(
+        request, db, "client", client_id, select(Client.updated_at).where(Client.id == client_id)
+    )
+    if unchanged:
+        return unchanged
+    
     result = await db.execute(select(Client).where(Client.id == client_id))
     client = result.scalar_one_or_none()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
+    entity_etag(response, "client", client.id, client.updated_at)
     return client
 
 
@@ -77,7 +106,7 @@ async def update_client(
     client_id: int,
     client_data: ClientUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     result = await db.execute(select(Client).where(Client.id == client_id))
     client = result.scalar_one_or_none()
@@ -97,7 +126,7 @@ async def update_client(
 async def delete_client(
     client_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     result = await db.execute(select(Client).where(Client.id == client_id))
     client = result.scalar_one_or_none()
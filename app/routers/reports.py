@@ -1,198 +1,234 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
-from datetime import date, datetime, timedelta
-from app.database import get_db
-from app.models.sale import Sale
-from app.models.car import Car, CarStatus
-from app.models.seller import Seller
-from app.models.user import User
+from datetime import date
+from typing import Optional
+from app.database import get_db, get_read_db
+from app.models.user import UserRole
 from app.schemas.report import (
     DashboardResponse, SalesByDateResponse, SalesBySellerResponse, 
-    SalesByCarResponse, TopSeller, SalesChartItem, SalesByDateItem,
-    SalesBySellerItem, SalesByCarItem
+    SalesByCarResponse, RollupRebuildResponse, LeaderboardResponse,
+    SalesTimeseriesResponse, PivotResponse
 )
-from app.auth.security import get_current_user
+from app.schemas.report_job import ReportJobCreate, ReportJobResponse
+from app.auth.security import get_current_user, require_director
+from app.auth.cache import UserPrincipal
+from app.services.dashboard import build_dashboard
+from app.services.dates import business_today
+from app.services.pivot import PIVOT_DIMENSIONS, PIVOT_MEASURES, parse_fields, sales_pivot
+from app.services.leaderboard import get_leaderboard, request_leaderboard_refresh
+from app.services.report_cache import report_cache
+from app.services.report_render import xlsx_response
+from app.services.report_jobs import (
+    enqueue_job, notify_workers, get_job, list_jobs, cancel_job, check_job_result, stream_job_result,
+    content_type
+)
+from app.services.reports import sales_by_date, sales_by_seller, sales_by_car, sales_timeseries
+from app.services.rollup import rebuild_rollup
 
 router = APIRouter()
 
 
 @router.get("/dashboard", response_model=DashboardResponse)
 async def get_dashboard(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    today = date.today()
-    month_start = today.replace(day=1)
-    
-    # Sales today
-    today_query = select(
-        func.count(Sale.id),
-        func.coalesce(func.sum(Sale.sale_price), 0)
-    ).where(func.date(Sale.sale_date) == today)
-    today_result = await db.execute(today_query)
-    today_stats = today_result.one()
-    
-    # Sales month
-    month_query = select(
-        func.count(Sale.id),
-        func.coalesce(func.sum(Sale.sale_price), 0)
-    ).where(func.date(Sale.sale_date) >= month_start)
-    month_result = await db.execute(month_query)
-    month_stats = month_result.one()
-    
-    # Available cars
-    available_query = select(func.count(Car.id)).where(Car.status == CarStatus.AVAILABLE)
-    available_result = await db.execute(available_query)
-    cars_available = available_result.scalar()
-    
-    # Top sellers
-    top_sellers_query = select(
-        Seller.id,
-        Seller.full_name,
-        func.count(Sale.id).label('count'),
-        func.coalesce(func.sum(Sale.sale_price), 0).label('revenue')
-    ).join(Sale, Seller.id == Sale.seller_id).where(
-        func.date(Sale.sale_date) >= month_start
-    ).group_by(Seller.id, Seller.full_name).order_by(
-        func.count(Sale.id).desc()
-    ).limit(5)
-    top_result = await db.execute(top_sellers_query)
-    top_sellers = [
-        TopSeller(
-            seller_id=row.id,
-            seller_name=row.full_name,
-            sales_count=row.count,
-            revenue=float(row.revenue)
-        ) for row in top_result.all()
-    ]
-    
-    # Chart data (30 days)
-    chart_data = []
-    for i in range(29, -1, -1):
-        chart_date = today - timedelta(days=i)
-        chart_query = select(
-            func.count(Sale.id),
-            func.coalesce(func.sum(Sale.sale_price), 0)
-        ).where(func.date(Sale.sale_date) == chart_date)
-        chart_result = await db.execute(chart_query)
-        day_stats = chart_result.one()
-        chart_data.append(SalesChartItem(
-            date=chart_date,
-            count=day_stats[0],
-            revenue=float(day_stats[1])
-        ))
-    
-    return DashboardResponse(
-        sales_today=today_stats[0],
-        sales_month=month_stats[0],
-        revenue_today=float(today_stats[1]),
-        revenue_month=float(month_stats[1]),
-        cars_available=cars_available,
-        cars_sold_month=month_stats[0],
-        top_sellers=top_sellers,
-        sales_chart=chart_data
+    today = business_today()
+    return await report_cache.respond(
+        request, "dashboard", {"today": today},
+        lambda: build_dashboard(db, today)
     )
 
 
 @router.get("/sales-by-date", response_model=SalesByDateResponse)
 async def get_sales_by_date(
+    request: Request,
     date_from: date = Query(...),
     date_to: date = Query(...),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    format: str = Query("json", pattern="^(json|xlsx)$"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    query = select(
-        func.date(Sale.sale_date).label('date'),
-        func.count(Sale.id).label('count'),
-        func.coalesce(func.sum(Sale.sale_price), 0).label('revenue')
-    ).where(
-        and_(
-            func.date(Sale.sale_date) >= date_from,
-            func.date(Sale.sale_date) <= date_to
-        )
-    ).group_by(func.date(Sale.sale_date)).order_by(func.date(Sale.sale_date))
-    
-    result = await db.execute(query)
-    data = [
-        SalesByDateItem(
-            date=row.date,
-            sales_count=row.count,
-            total_revenue=float(row.revenue)
-        ) for row in result.all()
-    ]
-    
-    return SalesByDateResponse(
-        period=f"{date_from} - {date_to}",
-        data=data
+    if format == "xlsx":
+        report = await sales_by_date(db, date_from, date_to)
+        # Соединение не нужно, пока файл рендерится в другом процессе
+        await db.close()
+        return await xlsx_response("sales-by-date", report, f"sales-by-date-{business_today()}.xlsx")
+    return await report_cache.respond(
+        request, "sales-by-date", {"date_from": date_from, "date_to": date_to},
+        lambda: sales_by_date(db, date_from, date_to)
     )
 
 
 @router.get("/sales-by-seller", response_model=SalesBySellerResponse)
 async def get_sales_by_seller(
+    request: Request,
     date_from: date = Query(None),
     date_to: date = Query(None),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    format: str = Query("json", pattern="^(json|xlsx)$"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    query = select(
-        Seller.id,
-        Seller.full_name,
-        func.count(Sale.id).label('count'),
-        func.coalesce(func.sum(Sale.sale_price), 0).label('revenue'),
-        func.coalesce(func.avg(Sale.sale_price), 0).label('avg_price')
-    ).join(Sale, Seller.id == Sale.seller_id)
-    
-    if date_from:
-        query = query.where(func.date(Sale.sale_date) >= date_from)
-    if date_to:
-        query = query.where(func.date(Sale.sale_date) <= date_to)
-    
-    query = query.group_by(Seller.id, Seller.full_name).order_by(func.sum(Sale.sale_price).desc())
-    
-    result = await db.execute(query)
-    data = [
-        SalesBySellerItem(
-            seller_id=row.id,
-            seller_name=row.full_name,
-            sales_count=row.count,
-            total_revenue=float(row.revenue),
-            average_price=float(row.avg_price)
-        ) for row in result.all()
-    ]
-    
-    return SalesBySellerResponse(data=data)
+    if format == "xlsx":
+        report = await sales_by_seller(db, date_from, date_to)
+        # Соединение не нужно, пока файл рендерится в другом процессе
+        await db.close()
+        return await xlsx_response("sales-by-seller", report, f"sales-by-seller-{business_today()}.xlsx")
+    return await report_cache.respond(
+        request, "sales-by-seller", {"date_from": date_from, "date_to": date_to},
+        lambda: sales_by_seller(db, date_from, date_to)
+    )
 
 
 @router.get("/sales-by-car", response_model=SalesByCarResponse)
 async def get_sales_by_car(
+    request: Request,
     date_from: date = Query(None),
     date_to: date = Query(None),
+    format: str = Query("json", pattern="^(json|xlsx)$"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    if format == "xlsx":
+        report = await sales_by_car(db, date_from, date_to)
+        # Соединение не нужно, пока файл рендерится в другом процессе
+        await db.close()
+        return await xlsx_response("sales-by-car", report, f"sales-by-car-{business_today()}.xlsx")
+    return await report_cache.respond(
+        request, "sales-by-car", {"date_from": date_from, "date_to": date_to},
+        lambda: sales_by_car(db, date_from, date_to)
+    )
+
+
+@router.get("/sales-timeseries", response_model=SalesTimeseriesResponse)
+async def get_sales_timeseries(
+    request: Request,
+    date_from: date = Query(...),
+    date_to: date = Query(...),
+    bucket: str = Query("day", pattern="^(hour|day|week|month|quarter)$"),
+    split_by: Optional[str] = Query(None, pattern="^(seller|brand)$"),
+    moving_window: int = Query(7, ge=1, le=365),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Gap-filled sales per bucket with cumulative and moving-average columns"""
+    params = {
+        "date_from": date_from, "date_to": date_to, "bucket": bucket,
+        "split_by": split_by, "moving_window": moving_window
+    }
+    return await report_cache.respond(
+        request, "sales-timeseries", params,
+        lambda: sales_timeseries(db, date_from, date_to, bucket, split_by, moving_window)
+    )
+
+
+@router.get("/pivot", response_model=PivotResponse)
+async def get_sales_pivot(
+    request: Request,
+    dimensions: str = Query(..., description="Comma-separated: seller, brand, model, year, color, period"),
+    measures: str = Query("count,sum", description="Comma-separated: count, sum, avg, min, max of sale_price"),
+    subtotals: str = Query("rollup", pattern="^(rollup|cube|none)$"),
+    period: str = Query("month", pattern="^(day|week|month|quarter|year)$"),
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Sales grouped by any combination of dimensions, with ROLLUP/CUBE subtotals"""
+    dimension_list = parse_fields(dimensions, PIVOT_DIMENSIONS, "dimensions")
+    measure_list = parse_fields(measures, PIVOT_MEASURES, "measures")
+    params = {
+        "dimensions": dimension_list, "measures": measure_list, "subtotals": subtotals,
+        "period": period, "date_from": date_from, "date_to": date_to, "limit": limit
+    }
+    return await report_cache.respond(
+        request, "pivot", params,
+        lambda: sales_pivot(db, dimension_list, measure_list, subtotals, period, date_from, date_to, limit)
+    )
+
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_seller_leaderboard(
+    period: str = Query("month", pattern="^(day|week|month|quarter)$"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Seller ranks for the current period, precomputed by the leaderboard refresher"""
+    return await get_leaderboard(db, period, business_today(), limit)
+
+
+@router.post("/rollup/rebuild", response_model=RollupRebuildResponse)
+async def rebuild_sales_rollup(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_director)
+):
+    buckets = await rebuild_rollup(db)
+    await db.commit()
+    await report_cache.invalidate()
+    request_leaderboard_refresh()
+    return RollupRebuildResponse(buckets=buckets)
+
+
+@router.post("/jobs", response_model=ReportJobResponse, status_code=202)
+async def create_report_job(
+    spec: ReportJobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Queue a report to run in the background; poll the job, then download its result"""
+    job = await enqueue_job(db, spec, current_user.id)
+    await db.commit()
+    notify_workers()
+    return job
+
+
+@router.get("/jobs", response_model=list[ReportJobResponse])
+async def get_report_jobs(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    return await list_jobs(db, current_user.id)
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+async def get_report_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    return await get_job(db, job_id, current_user.id, current_user.role == UserRole.DIRECTOR)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=ReportJobResponse)
+async def cancel_report_job(
+    job_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    query = select(
-        Car.brand,
-        Car.model,
-        func.count(Sale.id).label('count'),
-        func.coalesce(func.sum(Sale.sale_price), 0).label('revenue')
-    ).join(Sale, Car.id == Sale.car_id)
-    
-    if date_from:
-        query = query.where(func.date(Sale.sale_date) >= date_from)
-    if date_to:
-        query = query.where(func.date(Sale.sale_date) <= date_to)
-    
-    query = query.group_by(Car.brand, Car.model).order_by(func.count(Sale.id).desc())
-    
-    result = await db.execute(query)
-    data = [
-        SalesByCarItem(
-            brand=row.brand,
-            model=row.model,
-            sales_count=row.count,
-            total_revenue=float(row.revenue)
-        ) for row in result.all()
-    ]
-    
-    return SalesByCarResponse(data=data)
\ No newline at end of file
+    job = await get_job(db, job_id, current_user.id, current_user.role == UserRole.DIRECTOR)
+    job = await cancel_job(db, job)
+    await db.commit()
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+async def download_report_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    job = await get_job(db, job_id, current_user.id, current_user.role == UserRole.DIRECTOR)
+    check_job_result(job)
+    filename = f"{job.report}-{job.id}.{job.format}"
+    return StreamingResponse(
+        stream_job_result(job.id),
+        media_type=content_type(job.format),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(job.result_size)
+        }
+    )
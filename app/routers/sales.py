@@ -1,31 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 from typing import Optional
 from datetime import date
-from app.database import get_db
+from app.database import get_db, get_read_db, prefers_primary
 from app.models.sale import Sale
-from app.models.car import Car, CarStatus
+from app.models.car import Car
 from app.models.client import Client
 from app.models.seller import Seller
-from app.models.user import User
 from app.schemas.sale import SaleCreate, SaleResponse, SaleListResponse
 from app.auth.security import get_current_user
+from app.auth.cache import UserPrincipal
+from app.services.dates import business_today
+from app.services.export import EXPORT_FORMATS, sale_filters, stream_sales
+from app.services.etags import check_collection_not_modified, check_not_modified, entity_etag
+from app.services.pagination import paginate
+from app.services.leaderboard import request_leaderboard_refresh
+from app.services.report_cache import report_cache
+from app.services.sales import sell_car
 
 router = APIRouter()
 
 
 @router.get("", response_model=SaleListResponse)
 async def get_sales(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     seller_id: Optional[int] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    unchanged = await check_collection_not_modified(request, response, db, "sales", ("sales", "cars", "clients", "sellers"))
+    if unchanged:
+        return unchanged
+    
     query = select(Sale).options(
         selectinload(Sale.car),
         selectinload(Sale.client),
@@ -33,30 +49,40 @@ async def get_sales(
     )
     count_query = select(func.count(Sale.id))
     
-    if seller_id:
-        query = query.where(Sale.seller_id == seller_id)
-        count_query = count_query.where(Sale.seller_id == seller_id)
-    
-    if date_from:
-        query = query.where(func.date(Sale.sale_date) >= date_from)
-        count_query = count_query.where(func.date(Sale.sale_date) >= date_from)
-    
-    if date_to:
-        query = query.where(func.date(Sale.sale_date) <= date_to)
-        count_query = count_query.where(func.date(Sale.sale_date) <= date_to)
+    for condition in sale_filters(seller_id, date_from, date_to):
+        query = query.where(condition)
+        count_query = count_query.where(condition)
     
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
-    
-    query = query.offset((page - 1) * per_page).limit(per_page).order_by(Sale.sale_date.desc())
-    result = await db.execute(query)
-    sales = result.scalars().all()
+    result = await paginate(
+        db, query, count_query, Sale.sale_date, Sale.id,
+        page, per_page, cursor, include_total
+    )
     
     return SaleListResponse(
-        items=[SaleResponse.model_validate(s) for s in sales],
-        total=total,
+        items=[SaleResponse.model_validate(s) for s in result.items],
+        total=result.total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=result.next_cursor
+    )
+
+
+@router.get("/export")
+async def export_sales(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    seller_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Stream all matching sales as CSV or NDJSON"""
+    conditions = sale_filters(seller_id, date_from, date_to)
+    filename = f"sales-{business_today()}.{format}"
+    return StreamingResponse(
+        stream_sales(format, conditions, prefers_primary(request)),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 
@@ -64,55 +90,36 @@ async def get_sales(
 async def create_sale(
     sale_data: SaleCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    # Validate car
-    car_result = await db.execute(select(Car).where(Car.id == sale_data.car_id))
-    car = car_result.scalar_one_or_none()
-    if not car:
-        raise HTTPException(status_code=404, detail="Car not found")
-    if car.status != CarStatus.AVAILABLE:
-        raise HTTPException(status_code=400, detail="Car is not available")
-    
-    # Validate client
-    client_result = await db.execute(select(Client).where(Client.id == sale_data.client_id))
-    if not client_result.scalar_one_or_none():
-        raise HTTPException(status_code=404, detail="Client not found")
-    
-    # Validate seller
-    seller_result = await db.execute(select(Seller).where(Seller.id == sale_data.seller_id))
-    seller = seller_result.scalar_one_or_none()
-    if not seller:
-        raise HTTPException(status_code=404, detail="Seller not found")
-    if not seller.is_active:
-        raise HTTPException(status_code=400, detail="Seller is not active")
-    
-    # Create sale
-    sale = Sale(**sale_data.model_dump())
-    db.add(sale)
-    
-    # Update car status
-    car.status = CarStatus.SOLD
-    
+    sale = await sell_car(db, sale_data)
     await db.commit()
-    
-    # Reload with relationships
-    result = await db.execute(
-        select(Sale)
-        .options(selectinload(Sale.car), selectinload(Sale.client), selectinload(Sale.seller))
-        .where(Sale.id == sale.id)
-    )
-    sale = result.scalar_one()
-    
+    await report_cache.invalidate()
+    request_leaderboard_refresh()
     return sale
 
 
 @router.get("/{sale_id}", response_model=SaleResponse)
 async def get_sale(
     sale_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    # Сама продажа не меняется, версия - это версии вложенных машины, клиента и продавца
+    unchanged = await check_not_modified(
+        request, db, "sale", sale_id,
+        select(Car.updated_at, Client.updated_at, Seller.updated_at)
+        .select_from(Sale)
+        .join(Car, Car.id == Sale.car_id)
+        .join(Client, Client.id == Sale.client_id)
+        .join(Seller, Seller.id == Sale.seller_id)
+        .where(Sale.id == sale_id)
+    )
+    if unchanged:
+        return unchanged
+    
     result = await db.execute(
         select(Sale)
         .options(selectinload(Sale.car), selectinload(Sale.client), selectinload(Sale.seller))
@@ -121,4 +128,5 @@ async def get_sale(
     sale = result.scalar_one_or_none()
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
+    entity_etag(response, "sale", sale.id, sale.car.updated_at, sale.client.updated_at, sale.seller.updated_at)
     return sale
\ No newline at end of file
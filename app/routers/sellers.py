@@ -1,25 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.seller import Seller
-from app.models.sale import Sale
-from app.models.user import User, UserRole
+from app.models.user import UserRole
 from app.schemas.seller import SellerCreate, SellerUpdate, SellerResponse, SellerListResponse
 from app.auth.security import get_current_user, require_director
+from app.auth.cache import UserPrincipal
+from app.services.seller_stats import (
+    with_seller_stats, seller_response, get_seller_with_stats, seller_version
+)
+from app.services.etags import check_collection_not_modified, check_not_modified, entity_etag
+from app.services.pagination import paginate
+from app.services.report_cache import report_cache
 
 router = APIRouter()
 
 
 @router.get("", response_model=SellerListResponse)
 async def get_sellers(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     is_active: Optional[bool] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    unchanged = await check_collection_not_modified(request, response, db, "sellers", ("sellers", "sales"))
+    if unchanged:
+        return unchanged
+    
     query = select(Seller)
     count_query = select(func.count(Seller.id))
     
@@ -27,38 +41,17 @@ async def get_sellers(
         query = query.where(Seller.is_active == is_active)
         count_query = count_query.where(Seller.is_active == is_active)
     
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
-    
-    query = query.offset((page - 1) * per_page).limit(per_page).order_by(Seller.created_at.desc())
-    result = await db.execute(query)
-    sellers = result.scalars().all()
-    
-    seller_responses = []
-    for seller in sellers:
-        stats_query = select(
-            func.count(Sale.id).label('count'),
-            func.coalesce(func.sum(Sale.sale_price), 0).label('revenue')
-        ).where(Sale.seller_id == seller.id)
-        stats_result = await db.execute(stats_query)
-        stats = stats_result.one()
-        
-        seller_data = SellerResponse(
-            id=seller.id,
-            full_name=seller.full_name,
-            phone=seller.phone,
-            is_active=seller.is_active,
-            sales_count=stats.count,
-            total_revenue=float(stats.revenue),
-            created_at=seller.created_at
-        )
-        seller_responses.append(seller_data)
+    result = await paginate(
+        db, query, count_query, Seller.created_at, Seller.id,
+        page, per_page, cursor, include_total, wrap=with_seller_stats
+    )
     
     return SellerListResponse(
-        items=seller_responses,
-        total=total,
+        items=[seller_response(*row) for row in result.items],
+        total=result.total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=result.next_cursor
     )
 
 
@@ -66,7 +59,7 @@ async def get_sellers(
 async def create_seller(
     seller_data: SellerCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_director)
+    current_user: UserPrincipal = Depends(require_director)
 ):
     seller = Seller(**seller_data.model_dump())
     db.add(seller)
@@ -80,37 +73,28 @@ async def create_seller(
         is_active=seller.is_active,
         sales_count=0,
         total_revenue=0.0,
-        created_at=seller.created_at
+        created_at=seller.created_at,
+        updated_at=seller.updated_at
     )
 
 
 @router.get("/{seller_id}", response_model=SellerResponse)
 async def get_seller(
     seller_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    result = await db.execute(select(Seller).where(Seller.id == seller_id))
-    seller = result.scalar_one_or_none()
+    unchanged = await check_not_modified(request, db, "seller", seller_id, seller_version(seller_id))
+    if unchanged:
+        return unchanged
+    
+    seller = await get_seller_with_stats(db, seller_id)
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
-    
-    stats_query = select(
-        func.count(Sale.id).label('count'),
-        func.coalesce(func.sum(Sale.sale_price), 0).label('revenue')
-    ).where(Sale.seller_id == seller.id)
-    stats_result = await db.execute(stats_query)
-    stats = stats_result.one()
-    
-    return SellerResponse(
-        id=seller.id,
-        full_name=seller.full_name,
-        phone=seller.phone,
-        is_active=seller.is_active,
-        sales_count=stats.count,
-        total_revenue=float(stats.revenue),
-        created_at=seller.created_at
-    )
+    entity_etag(response, "seller", seller.id, seller.updated_at, seller.sales_count)
+    return seller
 
 
 @router.put("/{seller_id}", response_model=SellerResponse)
@@ -118,7 +102,7 @@ async def update_seller(
     seller_id: int,
     seller_data: SellerUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_director)
+    current_user: UserPrincipal = Depends(require_director)
 ):
     result = await db.execute(select(Seller).where(Seller.id == seller_id))
     seller = result.scalar_one_or_none()
@@ -130,31 +114,16 @@ async def update_seller(
         setattr(seller, field, value)
     
     await db.commit()
-    await db.refresh(seller)
-    
-    stats_query = select(
-        func.count(Sale.id).label('count'),
-        func.coalesce(func.sum(Sale.sale_price), 0).label('revenue')
-    ).where(Sale.seller_id == seller.id)
-    stats_result = await db.execute(stats_query)
-    stats = stats_result.one()
+    await report_cache.invalidate()
     
-    return SellerResponse(
-        id=seller.id,
-        full_name=seller.full_name,
-        phone=seller.phone,
-        is_active=seller.is_active,
-        sales_count=stats.count,
-        total_revenue=float(stats.revenue),
-        created_at=seller.created_at
-    )
+    return await get_seller_with_stats(db, seller.id)
 
 
 @router.delete("/{seller_id}", status_code=204)
 async def delete_seller(
     seller_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_director)
+    current_user: UserPrincipal = Depends(require_director)
 ):
     result = await db.execute(select(Seller).where(Seller.id == seller_id))
     seller = result.scalar_one_or_none()
@@ -162,4 +131,5 @@ async def delete_seller(
         raise HTTPException(status_code=404, detail="Seller not found")
     
     await db.delete(seller)
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+    await report_cache.invalidate()
\ No newline at end of file
@@ -3,4 +3,5 @@ from app.schemas.car import *
 from app.schemas.client import *
 from app.schemas.seller import *
 from app.schemas.sale import *
-from app.schemas.report import *
\ No newline at end of file
+from app.schemas.report import *
+from app.schemas.imports import *
\ No newline at end of file
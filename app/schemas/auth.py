@@ -36,4 +36,12 @@ class UserCreate(BaseModel):
     email: Optional[EmailStr] = None
     password: str
     full_name: Optional[str] = None
-    role: UserRole = UserRole.MANAGER
\ No newline at end of file
+    role: UserRole = UserRole.MANAGER
+
+
+class UserCacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+    ttl_seconds: float
\ No newline at end of file
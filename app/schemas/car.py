@@ -27,8 +27,15 @@ class CarUpdate(BaseModel):
     status: Optional[CarStatus] = None
 
 
+class CarReserve(BaseModel):
+    client_id: int
+    hours: Optional[int] = Field(None, ge=1)
+
+
 class CarResponse(CarBase):
     id: int
+    reserved_until: Optional[datetime] = None
+    reserved_for_id: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -38,6 +45,7 @@ class CarResponse(CarBase):
 
 class CarListResponse(BaseModel):
     items: list[CarResponse]
-    total: int
+    total: Optional[int] = None
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -24,6 +24,7 @@ class ClientUpdate(BaseModel):
 class ClientResponse(ClientBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -31,6 +32,7 @@ class ClientResponse(ClientBase):
 
 class ClientListResponse(BaseModel):
     items: list[ClientResponse]
-    total: int
+    total: Optional[int] = None
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
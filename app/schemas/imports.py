@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ImportRowError(BaseModel):
+    row: int
+    key: Optional[str] = None
+    errors: list[str]
+
+
+class ImportReport(BaseModel):
+    received: int
+    created: int
+    updated: int = 0
+    duplicates: int = 0
+    failed: int
+    errors: list[ImportRowError]
+    errors_truncated: bool = False
+    elapsed_seconds: float
+    rows_per_second: float
\ No newline at end of file
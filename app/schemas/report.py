@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import date
+from typing import Dict, List, Optional, Union
+from datetime import date, datetime
 
 
 class TopSeller(BaseModel):
@@ -58,4 +58,67 @@ class SalesByCarItem(BaseModel):
 
 
 class SalesByCarResponse(BaseModel):
-    data: List[SalesByCarItem]
\ No newline at end of file
+    data: List[SalesByCarItem]
+
+
+class RollupRebuildResponse(BaseModel):
+    buckets: int
+
+
+class LeaderboardItem(BaseModel):
+    rank: int
+    seller_id: int
+    seller_name: str
+    sales_count: int
+    revenue: float
+    average_price: float
+
+
+class LeaderboardResponse(BaseModel):
+    period: str
+    period_start: date
+    refreshed_at: Optional[datetime] = None
+    data: List[LeaderboardItem]
+
+
+class TimeseriesPoint(BaseModel):
+    bucket: datetime
+    sales_count: int
+    revenue: float
+    cumulative_count: int
+    cumulative_revenue: float
+    moving_avg_count: float
+    moving_avg_revenue: float
+
+
+class TimeseriesSeries(BaseModel):
+    key: Optional[str] = None
+    label: Optional[str] = None
+    points: List[TimeseriesPoint]
+
+
+class SalesTimeseriesResponse(BaseModel):
+    bucket: str
+    split_by: Optional[str] = None
+    moving_window: int
+    date_from: date
+    date_to: date
+    series: List[TimeseriesSeries]
+
+
+class PivotRow(BaseModel):
+    values: Dict[str, Union[int, date, str, None]]
+    measures: Dict[str, Union[int, float, None]]
+    # Свёрнутые измерения: пусто у детальной строки, все измерения у общего итога
+    subtotal: List[str]
+
+
+class PivotResponse(BaseModel):
+    dimensions: List[str]
+    measures: List[str]
+    subtotals: str
+    period: str
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    truncated: bool
+    rows: List[PivotRow]
\ No newline at end of file
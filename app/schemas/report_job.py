@@ -0,0 +1,63 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from datetime import date, datetime
+from app.models.report_job import ReportJobStatus
+
+
+class ReportJobCreate(BaseModel):
+    report: str
+    format: str = "json"
+    params: Dict[str, Any] = {}
+
+
+class ReportJobResponse(BaseModel):
+    id: int
+    report: str
+    format: str
+    params: Dict[str, Any]
+    status: ReportJobStatus
+    attempts: int
+    error: Optional[str] = None
+    result_size: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Параметры по видам отчётов, повторяют query-параметры синхронных эндпоинтов
+
+class DateRangeParams(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
+class SalesByDateParams(BaseModel):
+    date_from: date
+    date_to: date
+
+
+class TimeseriesParams(BaseModel):
+    date_from: date
+    date_to: date
+    bucket: Literal["hour", "day", "week", "month", "quarter"] = "day"
+    split_by: Optional[Literal["seller", "brand"]] = None
+    moving_window: int = Field(7, ge=1, le=365)
+
+
+class PivotParams(BaseModel):
+    dimensions: List[Literal["seller", "brand", "model", "year", "color", "period"]]
+    measures: List[Literal["count", "sum", "avg", "min", "max"]] = ["count", "sum"]
+    subtotals: Literal["rollup", "cube", "none"] = "rollup"
+    period: Literal["day", "week", "month", "quarter", "year"] = "month"
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    limit: Optional[int] = Field(None, ge=1)
+
+
+class SalesExportParams(BaseModel):
+    seller_id: Optional[int] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
\ No newline at end of file
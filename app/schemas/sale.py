@@ -30,6 +30,7 @@ class SaleResponse(SaleBase):
 
 class SaleListResponse(BaseModel):
     items: list[SaleResponse]
-    total: int
+    total: Optional[int] = None
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
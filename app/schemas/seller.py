@@ -24,6 +24,7 @@ class SellerResponse(SellerBase):
     sales_count: int = 0
     total_revenue: float = 0.0
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -31,6 +32,7 @@ class SellerResponse(SellerBase):
 
 class SellerListResponse(BaseModel):
     items: list[SellerResponse]
-    total: int
+    total: Optional[int] = None
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,74 @@
+from typing import AsyncIterable
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.car import Car, CarStatus
+from app.schemas.car import CarCreate
+from app.schemas.imports import ImportReport
+from app.services.reservations import reservation_expiry
+from app.services.uploads import ImportTracker, error_messages
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+async def _insert_chunk(db: AsyncSession, chunk: list[tuple[int, dict]], tracker: ImportTracker) -> None:
+    """Insert one chunk, existing VINs are reported per row.
+
+    Parameters go through executemany so the statement is compiled once and
+    cached; SQLAlchemy batches them into multi-row INSERT ... RETURNING.
+    """
+    stmt = (
+        insert(Car.__table__)
+        .on_conflict_do_nothing(index_elements=[Car.vin])
+        .returning(Car.vin)
+    )
+    result = await db.execute(stmt, [values for _, values in chunk])
+    inserted = set(result.scalars().all())
+    await db.commit()
+
+    tracker.created += len(inserted)
+    for number, values in chunk:
+        if values["vin"] not in inserted:
+            tracker.fail(number, values["vin"], ["VIN already exists"])
+
+
+async def import_cars(
+    db: AsyncSession,
+    rows: AsyncIterable[tuple[int, object]],
+    chunk_size: int = IMPORT_CHUNK_SIZE
+) -> ImportReport:
+    """Validate rows with CarCreate and load them in multi-row INSERT chunks.
+
+    Each chunk is its own transaction, so a failed upload keeps the chunks
+    that were already loaded; the report lists every rejected row.
+    """
+    tracker = ImportTracker()
+    seen_vins: set[str] = set()
+    chunk: list[tuple[int, dict]] = []
+    # Импортированная бронь истекает как обычная; ключ нужен всем строкам executemany
+    expiry = reservation_expiry()
+
+    async for number, raw in rows:
+        tracker.received += 1
+        if isinstance(raw, Exception):
+            tracker.fail(number, None, error_messages(raw))
+            continue
+        try:
+            car = CarCreate(**raw)
+        except (TypeError, ValueError) as exc:
+            tracker.fail(number, raw.get("vin"), error_messages(exc))
+            continue
+        if car.vin in seen_vins:
+            tracker.fail(number, car.vin, ["Duplicate VIN in upload"])
+            continue
+        seen_vins.add(car.vin)
+
+        values = car.model_dump()
+        values["reserved_until"] = expiry if car.status == CarStatus.RESERVED else None
+        chunk.append((number, values))
+        if len(chunk) >= chunk_size:
+            await _insert_chunk(db, chunk, tracker)
+            chunk = []
+
+    if chunk:
+        await _insert_chunk(db, chunk, tracker)
+    return tracker.report()
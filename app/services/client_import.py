@@ -0,0 +1,123 @@
+from typing import AsyncIterable, Callable, Optional
+from sqlalchemy import bindparam, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.client import Client
+from app.schemas.client import ClientCreate
+from app.schemas.imports import ImportReport
+from app.models.normalize import normalize_email, normalize_phone
+from app.services.uploads import ImportTracker, error_messages
+
+IMPORT_CHUNK_SIZE = 1000
+# Ключ advisory lock: импорты клиентов идут по одному, иначе проверка дублей гоняется
+IMPORT_LOCK_ID = 4242001
+
+clients_table = Client.__table__
+
+_update_existing = update(clients_table).where(
+    clients_table.c.id == bindparam("b_id")
+).values(
+    full_name=bindparam("b_full_name"),
+    phone=bindparam("b_phone"),
+    phone_normalized=bindparam("b_phone_normalized"),
+    email=func.coalesce(bindparam("b_email"), clients_table.c.email),
+    email_normalized=func.coalesce(bindparam("b_email_normalized"), clients_table.c.email_normalized),
+    document_id=func.coalesce(bindparam("b_document_id"), clients_table.c.document_id),
+    updated_at=func.now()
+)
+
+
+async def _upsert_chunk(db: AsyncSession, chunk: list[dict], tracker: ImportTracker) -> None:
+    """Match a chunk against existing clients by normalized phone or email, then
+    update the matches and insert the rest, all in one transaction"""
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(IMPORT_LOCK_ID)))
+
+    phones = {values["phone_normalized"] for values in chunk}
+    emails = {values["email_normalized"] for values in chunk if values["email_normalized"]}
+    conditions = [Client.phone_normalized.in_(phones)]
+    if emails:
+        conditions.append(Client.email_normalized.in_(emails))
+    result = await db.execute(
+        select(Client.id, Client.phone_normalized, Client.email_normalized).where(or_(*conditions))
+    )
+    by_phone, by_email = {}, {}
+    for row in result.all():
+        by_phone.setdefault(row.phone_normalized, row.id)
+        if row.email_normalized:
+            by_email.setdefault(row.email_normalized, row.id)
+
+    inserts, updates, updated_ids = [], [], set()
+    for values in chunk:
+        client_id = by_phone.get(values["phone_normalized"]) or by_email.get(values["email_normalized"])
+        if client_id is None:
+            inserts.append(values)
+        elif client_id in updated_ids:
+            # Две строки файла совпали с одним и тем же существующим клиентом
+            tracker.duplicates += 1
+        else:
+            updated_ids.add(client_id)
+            updates.append({"b_id": client_id, **{f"b_{key}": value for key, value in values.items()}})
+
+    if inserts:
+        await db.execute(insert(clients_table), inserts)
+    if updates:
+        await db.execute(_update_existing, updates)
+    await db.commit()
+
+    tracker.created += len(inserts)
+    tracker.updated += len(updates)
+
+
+async def import_clients(
+    db: AsyncSession,
+    rows: AsyncIterable[tuple[int, object]],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[ImportReport], None]] = None
+) -> ImportReport:
+    """Validate, normalize and upsert clients chunk by chunk.
+
+    Rows repeating a phone or email seen earlier in the same upload are counted
+    as duplicates and skipped; rows matching an existing client update it.
+    """
+    tracker = ImportTracker()
+    seen_phones: set[str] = set()
+    seen_emails: set[str] = set()
+    chunk: list[dict] = []
+
+    async for number, raw in rows:
+        tracker.received += 1
+        if isinstance(raw, Exception):
+            tracker.fail(number, None, error_messages(raw))
+            continue
+        try:
+            client = ClientCreate(**raw)
+        except (TypeError, ValueError) as exc:
+            tracker.fail(number, raw.get("phone"), error_messages(exc))
+            continue
+
+        values = client.model_dump()
+        values["phone_normalized"] = normalize_phone(client.phone)
+        values["email_normalized"] = normalize_email(client.email)
+        if not values["phone_normalized"]:
+            tracker.fail(number, client.phone, ["phone: must contain digits"])
+            continue
+        if values["phone_normalized"] in seen_phones or values["email_normalized"] in seen_emails:
+            tracker.duplicates += 1
+            continue
+        seen_phones.add(values["phone_normalized"])
+        if values["email_normalized"]:
+            seen_emails.add(values["email_normalized"])
+
+        chunk.append(values)
+        if len(chunk) >= chunk_size:
+            await _upsert_chunk(db, chunk, tracker)
+            chunk = []
+            if on_progress:
+                on_progress(tracker.report())
+
+    if chunk:
+        await _upsert_chunk(db, chunk, tracker)
+    report = tracker.report()
+    if on_progress:
+        on_progress(report)
+    return report
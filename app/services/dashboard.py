@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+from sqlalchemy import select, func, cast, Date, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.car import Car, CarStatus
+from app.models.sales_rollup import SalesDailyRollup
+from app.schemas.report import DashboardResponse, TopSeller, SalesChartItem
+from app.services.leaderboard import top_sellers_query
+
+CHART_DAYS = 30
+TOP_SELLERS_LIMIT = 5
+
+
+async def build_dashboard(db: AsyncSession, today: date) -> DashboardResponse:
+    """Build every dashboard field in two queries: chart with summary, then top sellers from the leaderboard"""
+    month_start = today.replace(day=1)
+    chart_start = today - timedelta(days=CHART_DAYS - 1)
+
+    # Все дни графика, чтобы дни без продаж вернулись нулями
+    days = select(
+        cast(
+            func.generate_series(chart_start, today, literal_column("interval '1 day'")),
+            Date
+        ).label('day')
+    ).subquery('days')
+
+    daily = select(
+        SalesDailyRollup.day,
+        func.sum(SalesDailyRollup.sales_count).label('count'),
+        func.sum(SalesDailyRollup.revenue).label('revenue')
+    ).where(SalesDailyRollup.day >= chart_start).group_by(SalesDailyRollup.day).subquery('daily')
+
+    month_count = select(
+        func.coalesce(func.sum(SalesDailyRollup.sales_count), 0)
+    ).where(SalesDailyRollup.day >= month_start).scalar_subquery()
+    month_revenue = select(
+        func.coalesce(func.sum(SalesDailyRollup.revenue), 0)
+    ).where(SalesDailyRollup.day >= month_start).scalar_subquery()
+    cars_available = select(func.count(Car.id)).where(Car.status == CarStatus.AVAILABLE).scalar_subquery()
+
+    chart_query = select(
+        days.c.day,
+        func.coalesce(daily.c.count, 0).label('count'),
+        func.coalesce(daily.c.revenue, 0).label('revenue'),
+        month_count.label('month_count'),
+        month_revenue.label('month_revenue'),
+        cars_available.label('cars_available')
+    ).select_from(days).outerjoin(daily, daily.c.day == days.c.day).order_by(days.c.day)
+
+    chart_rows = (await db.execute(chart_query)).all()
+
+    # Топ продавцов берём из предрасчитанного рейтинга за месяц
+    top_result = await db.execute(top_sellers_query("month", today, TOP_SELLERS_LIMIT))
+
+    summary = chart_rows[-1]
+    return DashboardResponse(
+        sales_today=summary.count,
+        sales_month=summary.month_count,
+        revenue_today=float(summary.revenue),
+        revenue_month=float(summary.month_revenue),
+        cars_available=summary.cars_available,
+        cars_sold_month=summary.month_count,
+        top_sellers=[
+            TopSeller(
+                seller_id=row.seller_id,
+                seller_name=row.full_name,
+                sales_count=row.sales_count,
+                revenue=float(row.revenue)
+            ) for row in top_result.all()
+        ],
+        sales_chart=[
+            SalesChartItem(
+                date=row.day,
+                count=row.count,
+                revenue=float(row.revenue)
+            ) for row in chart_rows
+        ]
+    )
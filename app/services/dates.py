@@ -0,0 +1,35 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy import func
+from app.config import settings
+
+
+@lru_cache()
+def business_timezone() -> ZoneInfo:
+    return ZoneInfo(settings.BUSINESS_TIMEZONE)
+
+
+def business_today() -> date:
+    return datetime.now(business_timezone()).date()
+
+
+def day_start(day: date) -> datetime:
+    """Start of a business day as an aware timestamp"""
+    return datetime.combine(day, time.min, tzinfo=business_timezone())
+
+
+def date_range_filter(column, date_from: Optional[date], date_to: Optional[date]) -> list:
+    """Half-open timestamp range for inclusive business dates, usable by an index on column"""
+    conditions = []
+    if date_from:
+        conditions.append(column >= day_start(date_from))
+    if date_to:
+        conditions.append(column < day_start(date_to + timedelta(days=1)))
+    return conditions
+
+
+def business_date(column):
+    """SQL expression for the business-timezone calendar date of a timestamptz column"""
+    return func.date(func.timezone(settings.BUSINESS_TIMEZONE, column))
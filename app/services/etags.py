@@ -0,0 +1,80 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.table_version import version_sequence
+
+
+def weak_etag(*parts) -> str:
+    raw = "|".join(str(part) for part in parts).encode()
+    return f'W/"{hashlib.sha1(raw).hexdigest()[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+async def check_not_modified(
+    request: Request,
+    db: AsyncSession,
+    kind: str,
+    entity_id: int,
+    version_query: Select
+) -> Optional[Response]:
+    """304 for a matching If-None-Match, decided by a version-only query.
+
+    version_query must select the same values the endpoint later passes to
+    entity_etag, so both paths produce the same tag. Returns None (serve the
+    full response) without a header, on a mismatch or for a missing row.
+    """
+    if not request.headers.get("if-none-match"):
+        return None
+    row = (await db.execute(version_query)).one_or_none()
+    if row is None:
+        return None
+    etag = weak_etag(kind, entity_id, *row)
+    return not_modified(etag) if etag_matches(request, etag) else None
+
+
+def entity_etag(response: Response, kind: str, entity_id: int, *version) -> None:
+    response.headers["ETag"] = weak_etag(kind, entity_id, *version)
+
+
+async def check_collection_not_modified(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    kind: str,
+    tables: tuple[str, ...]
+) -> Optional[Response]:
+    """304 or an ETag header for a list response, from the per-table version sequences.
+
+    The tag covers the query params and the version of every table the list
+    renders. Versions are bumped at commit and read before the page itself, so
+    a write racing the request makes the tag older than the data, not newer
+    (short of the instant between the bump and the commit becoming visible). The
+    read runs without If-None-Match too: that first response hands out the
+    tag. Without triggers (other dialects) lists get no ETag.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+    # Имена последовательностей из VERSIONED_TABLES, не из запроса
+    columns = ", ".join(
+        f"(SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {version_sequence(table)})"
+        for table in tables
+    )
+    versions = (await db.execute(text(f"SELECT {columns}"))).one()
+    params = sorted(request.query_params.multi_items())
+    etag = weak_etag(kind, params, *versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return None
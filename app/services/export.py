@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Optional
+from sqlalchemy import Select, select
+from app.database import read_session
+from app.models.car import Car
+from app.models.client import Client
+from app.models.sale import Sale
+from app.models.seller import Seller
+from app.services.dates import date_range_filter
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_BATCH_SIZE = 1000
+
+# Плоский набор колонок: одна строка на продажу, без ORM-объектов
+EXPORT_COLUMNS = (
+    Sale.id.label("sale_id"),
+    Sale.sale_date,
+    Sale.sale_price,
+    Car.id.label("car_id"),
+    Car.vin,
+    Car.brand,
+    Car.model,
+    Car.year,
+    Client.id.label("client_id"),
+    Client.full_name.label("client_name"),
+    Client.phone.label("client_phone"),
+    Seller.id.label("seller_id"),
+    Seller.full_name.label("seller_name"),
+)
+
+
+def sale_filters(
+    seller_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> list:
+    """Conditions shared by the sales list and the export"""
+    conditions = []
+    if seller_id:
+        conditions.append(Sale.seller_id == seller_id)
+    conditions.extend(date_range_filter(Sale.sale_date, date_from, date_to))
+    return conditions
+
+
+def export_query(conditions: list) -> Select:
+    return (
+        select(*EXPORT_COLUMNS)
+        .join(Car, Sale.car_id == Car.id)
+        .join(Client, Sale.client_id == Client.id)
+        .join(Seller, Sale.seller_id == Seller.id)
+        .where(*conditions)
+        .order_by(Sale.sale_date, Sale.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _csv_chunk(rows: list, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow([column.key for column in EXPORT_COLUMNS])
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(rows: list) -> str:
+    return "".join(
+        json.dumps(row._asdict(), default=_plain, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+async def stream_sales(
+    fmt: str,
+    conditions: list,
+    prefer_primary: bool = False
+) -> AsyncIterator[str]:
+    """Yield the export in chunks of EXPORT_BATCH_SIZE rows.
+
+    Runs on its own session: request dependencies are closed before the body is
+    sent. Rows come from a server-side cursor, so memory does not grow with the
+    size of the export.
+    """
+    async with read_session(prefer_primary) as db:
+        result = await db.stream(export_query(conditions))
+        if fmt == "csv":
+            yield _csv_chunk([], header=True)
+        async for rows in result.partitions():
+            yield _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(rows)
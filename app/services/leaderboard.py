@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import delete, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import async_session_maker
+from app.models.seller import Seller
+from app.models.sales_rollup import SalesDailyRollup
+from app.models.seller_leaderboard import SellerLeaderboard
+from app.schemas.report import LeaderboardItem, LeaderboardResponse
+from app.services.dates import business_today
+from app.services.report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_PERIODS = ("day", "week", "month", "quarter")
+# Ключ advisory lock: рейтинг пересчитывает одна реплика, остальные пропускают
+LEADERBOARD_LOCK_ID = 4242002
+
+_refresh_task: Optional[asyncio.Task] = None
+_refresh_requested: Optional[asyncio.Event] = None
+
+
+def period_start(period: str, today: date) -> date:
+    if period == "day":
+        return today
+    if period == "week":
+        return today - timedelta(days=today.weekday())
+    if period == "month":
+        return today.replace(day=1)
+    if period == "quarter":
+        return today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+    raise HTTPException(status_code=400, detail=f"Unknown period, expected one of: {', '.join(LEADERBOARD_PERIODS)}")
+
+
+def _period_ranks(period: str, today: date):
+    sales_count = func.sum(SalesDailyRollup.sales_count)
+    revenue = func.sum(SalesDailyRollup.revenue)
+    start = period_start(period, today)
+    return select(
+        literal(period).label("period"),
+        SalesDailyRollup.seller_id,
+        literal(start).label("period_start"),
+        sales_count.label("sales_count"),
+        revenue.label("revenue"),
+        (revenue / sales_count).label("average_price"),
+        func.rank().over(order_by=(sales_count.desc(), revenue.desc())).label("rank")
+    ).where(
+        SalesDailyRollup.day >= start,
+        SalesDailyRollup.day <= today
+    ).group_by(SalesDailyRollup.seller_id)
+
+
+async def refresh_leaderboard(db: AsyncSession, today: date) -> Optional[int]:
+    """Recompute every period from the daily rollup, returns the number of rows.
+
+    Runs as one delete + insert in the caller's transaction: readers keep seeing
+    the previous ranks until commit. Returns None without doing anything when
+    another refresh holds the lock.
+    """
+    locked = await db.execute(select(func.pg_try_advisory_xact_lock(LEADERBOARD_LOCK_ID)))
+    if not locked.scalar():
+        return None
+
+    source = union_all(*(_period_ranks(period, today) for period in LEADERBOARD_PERIODS))
+    await db.execute(delete(SellerLeaderboard))
+    result = await db.execute(
+        SellerLeaderboard.__table__.insert().from_select(
+            ["period", "seller_id", "period_start", "sales_count", "revenue", "average_price", "rank"],
+            source
+        )
+    )
+    return result.rowcount
+
+
+def top_sellers_query(period: str, today: date, limit: Optional[int] = None):
+    query = select(
+        SellerLeaderboard.rank,
+        SellerLeaderboard.seller_id,
+        Seller.full_name,
+        SellerLeaderboard.sales_count,
+        SellerLeaderboard.revenue,
+        SellerLeaderboard.average_price,
+        SellerLeaderboard.refreshed_at
+    ).join(Seller, Seller.id == SellerLeaderboard.seller_id).where(
+        SellerLeaderboard.period == period,
+        # После смены дня/недели старые ранги не показываем, ждём обновления
+        SellerLeaderboard.period_start == period_start(period, today)
+    ).order_by(SellerLeaderboard.rank, SellerLeaderboard.seller_id)
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+async def get_leaderboard(
+    db: AsyncSession,
+    period: str,
+    today: date,
+    limit: Optional[int] = None
+) -> LeaderboardResponse:
+    rows = (await db.execute(top_sellers_query(period, today, limit))).all()
+    return LeaderboardResponse(
+        period=period,
+        period_start=period_start(period, today),
+        refreshed_at=rows[0].refreshed_at if rows else None,
+        data=[
+            LeaderboardItem(
+                rank=row.rank,
+                seller_id=row.seller_id,
+                seller_name=row.full_name,
+                sales_count=row.sales_count,
+                revenue=float(row.revenue),
+                average_price=float(row.average_price)
+            ) for row in rows
+        ]
+    )
+
+
+def request_leaderboard_refresh() -> None:
+    """Ask the background task for a refresh soon; bursts of calls coalesce into one"""
+    if _refresh_requested is not None:
+        _refresh_requested.set()
+
+
+async def refresh_periodically(interval: float, debounce: float) -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_refresh_requested.wait(), timeout=interval)
+            # Продажи обычно идут пачкой, пересчитываем один раз после паузы
+            await asyncio.sleep(debounce)
+        except asyncio.TimeoutError:
+            pass
+        _refresh_requested.clear()
+
+        try:
+            async with async_session_maker() as db:
+                rows = await refresh_leaderboard(db, business_today())
+                await db.commit()
+            if rows is None:
+                # Пересчёт держит другая реплика, и её снимок мог не увидеть наших продаж: повторяем после паузы
+                _refresh_requested.set()
+            else:
+                await report_cache.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Leaderboard refresh failed: {e}")
+
+
+def start_leaderboard_refresher() -> None:
+    global _refresh_task, _refresh_requested
+    if settings.LEADERBOARD_REFRESH_SECONDS > 0 and _refresh_task is None:
+        _refresh_requested = asyncio.Event()
+        # Первое обновление сразу при старте
+        _refresh_requested.set()
+        _refresh_task = asyncio.create_task(refresh_periodically(
+            settings.LEADERBOARD_REFRESH_SECONDS,
+            settings.LEADERBOARD_REFRESH_DEBOUNCE_SECONDS
+        ))
+
+
+async def stop_leaderboard_refresher() -> None:
+    global _refresh_task, _refresh_requested
+    if _refresh_task is None:
+        return
+    _refresh_task.cancel()
+    try:
+        await _refresh_task
+    except asyncio.CancelledError:
+        pass
+    _refresh_task = None
+    _refresh_requested = None
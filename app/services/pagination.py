@@ -0,0 +1,87 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, NamedTuple, Optional
+from fastapi import HTTPException
+from sqlalchemy import Select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class Page(NamedTuple):
+    items: list
+    total: Optional[int]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(sort_value: datetime, id_value: int) -> str:
+    raw = json.dumps([sort_value.isoformat(), id_value]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, id_value = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(id_value)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    count_query: Select,
+    sort_column: Any,
+    id_column: Any,
+    page: int,
+    per_page: int,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    wrap: Optional[Callable[[Select], Select]] = None,
+    rank: Optional[Any] = None
+) -> Page:
+    """Newest-first page of a select(Model) query, by offset or by (sort_column, id) cursor.
+
+    wrap is applied to the limited query, e.g. to join per-row stats; rows are then
+    returned as-is instead of as bare entities. rank orders offset pages by relevance
+    first; such pages have no next_cursor since a cursor can only follow recency order.
+    """
+    if cursor:
+        rank = None
+
+    total = None
+    if include_total:
+        total_result = await db.execute(count_query)
+        total = total_result.scalar()
+
+    if rank is not None:
+        query = query.order_by(rank.desc())
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        sort_value, id_value = decode_cursor(cursor)
+        # Лишнее условие sort_column <= x даёт индексу по sort_column диапазон для сканирования
+        query = query.where(
+            sort_column <= sort_value,
+            or_(sort_column < sort_value, id_column < id_value)
+        )
+    else:
+        query = query.offset((page - 1) * per_page)
+
+    # Одна лишняя строка показывает, есть ли следующая страница
+    query = query.limit(per_page + 1)
+    if wrap:
+        query = wrap(query)
+
+    result = await db.execute(query)
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        if rank is None:
+            last = rows[-1][0]
+            next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    items = rows if wrap else [row[0] for row in rows]
+    return Page(items=items, total=total, next_cursor=next_cursor)
@@ -0,0 +1,224 @@
+from datetime import date
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import select, func, cast, text, tuple_, BigInteger, Date, Float
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.car import Car
+from app.models.sale import Sale
+from app.models.seller import Seller
+from app.models.sales_rollup import SalesDailyRollup
+from app.schemas.report import PivotResponse, PivotRow
+from app.services.dates import date_range_filter
+
+PIVOT_DIMENSIONS = ("seller", "brand", "model", "year", "color", "period")
+PIVOT_MEASURES = ("count", "sum", "avg", "min", "max")
+PIVOT_PERIODS = ("day", "week", "month", "quarter", "year")
+PIVOT_SUBTOTALS = ("rollup", "cube", "none")
+# CUBE даёт 2^n группировок, больше четырёх измерений уже не читается
+PIVOT_MAX_DIMENSIONS = 4
+
+# Эти срезы есть в дневном rollup, остальные считаются по продажам
+ROLLUP_DIMENSIONS = {"seller", "brand", "model", "period"}
+ROLLUP_MEASURES = {"count", "sum", "avg"}
+QUERY_CANCELED = "57014"
+
+
+def parse_fields(value: str, allowed: tuple, name: str) -> list[str]:
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {name}: {', '.join(unknown)}, expected any of: {', '.join(allowed)}"
+        )
+    if len(set(fields)) != len(fields):
+        raise HTTPException(status_code=400, detail=f"Duplicate {name}")
+    return fields
+
+
+def _value_keys(dimension: str) -> tuple:
+    return ("seller_id", "seller") if dimension == "seller" else (dimension,)
+
+
+def _fine_column(dimension: str, period: str, from_rollup: bool):
+    if dimension == "seller":
+        return (SalesDailyRollup.seller_id if from_rollup else Sale.seller_id).label("seller_id")
+    if dimension == "period":
+        day = SalesDailyRollup.day if from_rollup else func.timezone(settings.BUSINESS_TIMEZONE, Sale.sale_date)
+        return cast(func.date_trunc(period, day), Date).label("period")
+    source = SalesDailyRollup if from_rollup else Car
+    return getattr(source, dimension).label(dimension)
+
+
+def _fine_partials(measures: list[str], from_rollup: bool) -> list:
+    """Partial aggregates per finest group that the subtotals can be summed up from"""
+    if from_rollup:
+        partials = [
+            func.sum(SalesDailyRollup.sales_count).label("partial_count"),
+            func.sum(SalesDailyRollup.revenue).label("partial_sum"),
+        ]
+    else:
+        partials = [
+            func.count(Sale.id).label("partial_count"),
+            func.sum(Sale.sale_price).label("partial_sum"),
+        ]
+        if "min" in measures:
+            partials.append(func.min(Sale.sale_price).label("partial_min"))
+        if "max" in measures:
+            partials.append(func.max(Sale.sale_price).label("partial_max"))
+    return partials
+
+
+def _measure_column(measure: str, fine):
+    if measure == "count":
+        return cast(func.sum(fine.c.partial_count), BigInteger).label(measure)
+    if measure == "avg":
+        expression = func.sum(fine.c.partial_sum) / func.nullif(func.sum(fine.c.partial_count), 0)
+    elif measure in ("min", "max"):
+        expression = getattr(func, measure)(fine.c[f"partial_{measure}"])
+    else:
+        expression = func.sum(fine.c.partial_sum)
+    return cast(expression, Float).label(measure)
+
+
+def build_pivot_query(
+    dimensions: list[str],
+    measures: list[str],
+    subtotals: str,
+    period: str,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    limit: int
+):
+    """GROUP BY ROLLUP/CUBE over sales pre-aggregated to the finest requested grain.
+
+    The inner query reads the daily rollup when it has every dimension and
+    measure, the sales table otherwise; grouping sets then run over its
+    (much smaller) result. Subtotal rows carry NULL in the rolled-up columns,
+    grouping() tells them apart from real NULLs (cars without a color). Rows
+    come ordered so every subtotal follows the rows it sums up and the grand
+    total is last.
+    """
+    from_rollup = set(dimensions) <= ROLLUP_DIMENSIONS and set(measures) <= ROLLUP_MEASURES
+    fine_columns = [_fine_column(dimension, period, from_rollup) for dimension in dimensions]
+    fine = select(*fine_columns, *_fine_partials(measures, from_rollup)).group_by(*fine_columns)
+    if from_rollup:
+        if date_from:
+            fine = fine.where(SalesDailyRollup.day >= date_from)
+        if date_to:
+            fine = fine.where(SalesDailyRollup.day <= date_to)
+    else:
+        fine = fine.select_from(Sale).where(*date_range_filter(Sale.sale_date, date_from, date_to))
+        if {"brand", "model", "year", "color"} & set(dimensions):
+            fine = fine.join(Car, Car.id == Sale.car_id)
+    fine = fine.subquery("fine")
+
+    columns = {
+        dimension: [fine.c.seller_id, Seller.full_name.label("seller")] if dimension == "seller"
+        else [fine.c[dimension]]
+        for dimension in dimensions
+    }
+    groupings = [func.grouping(columns[dimension][0]).label(f"grouping_{dimension}") for dimension in dimensions]
+    query = select(
+        *(column for dimension in dimensions for column in columns[dimension]),
+        *(groupings if subtotals != "none" else ()),
+        *(_measure_column(measure, fine) for measure in measures)
+    ).select_from(fine)
+    if "seller" in dimensions:
+        query = query.join(Seller, Seller.id == fine.c.seller_id)
+
+    # Имя продавца идёт в паре с id, чтобы не появлялся отдельный подытог по имени
+    elements = [
+        tuple_(*columns[dimension]) if len(columns[dimension]) > 1 else columns[dimension][0]
+        for dimension in dimensions
+    ]
+    if subtotals == "rollup":
+        query = query.group_by(func.rollup(*elements))
+    elif subtotals == "cube":
+        query = query.group_by(func.cube(*elements))
+    else:
+        query = query.group_by(*elements)
+
+    order = []
+    for index, dimension in enumerate(dimensions):
+        if subtotals != "none":
+            order.append(groupings[index])
+        order.extend(columns[dimension])
+    return query.order_by(*order).limit(limit + 1)
+
+
+async def sales_pivot(
+    db: AsyncSession,
+    dimensions: list[str],
+    measures: list[str],
+    subtotals: str = "rollup",
+    period: str = "month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Optional[int] = None
+) -> PivotResponse:
+    """Sales aggregated by any combination of whitelisted dimensions.
+
+    Runs under its own statement_timeout and returns at most limit rows,
+    flagging truncated when there were more.
+    """
+    if not dimensions:
+        raise HTTPException(status_code=400, detail="At least one dimension is required")
+    if len(dimensions) > PIVOT_MAX_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"At most {PIVOT_MAX_DIMENSIONS} dimensions")
+    if not measures:
+        raise HTTPException(status_code=400, detail="At least one measure is required")
+    if date_from and date_to and date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to is before date_from")
+
+    limit = min(limit or settings.PIVOT_MAX_ROWS, settings.PIVOT_MAX_ROWS)
+    query = build_pivot_query(dimensions, measures, subtotals, period, date_from, date_to, limit)
+
+    # Общий DB_STATEMENT_TIMEOUT_MS тоже соблюдаем, если он строже
+    timeouts = [ms for ms in (settings.PIVOT_STATEMENT_TIMEOUT_MS, settings.DB_STATEMENT_TIMEOUT_MS) if ms]
+    timeout_ms = min(timeouts) if timeouts else 0
+    try:
+        if timeout_ms:
+            # SET LOCAL живёт до конца транзакции и не достаётся следующему владельцу соединения
+            await db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+        if settings.PIVOT_WORK_MEM:
+            # Группировки по миллиону продаж иначе уходят в сортировку на диске
+            await db.execute(text("SELECT set_config('work_mem', :work_mem, true)"), {"work_mem": settings.PIVOT_WORK_MEM})
+        rows = (await db.execute(query)).all()
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED:
+            raise
+        await db.rollback()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Pivot query exceeded {timeout_ms} ms, narrow the date range or use fewer dimensions"
+        )
+
+    data = []
+    for row in rows[:limit]:
+        rolled_up = [
+            dimension for dimension in dimensions
+            if subtotals != "none" and getattr(row, f"grouping_{dimension}")
+        ]
+        values = {}
+        for dimension in dimensions:
+            for column in _value_keys(dimension):
+                values[column] = None if dimension in rolled_up else getattr(row, column)
+        data.append(PivotRow(
+            values=values,
+            measures={measure: getattr(row, measure) for measure in measures},
+            subtotal=rolled_up
+        ))
+
+    return PivotResponse(
+        dimensions=dimensions,
+        measures=measures,
+        subtotals=subtotals,
+        period=period,
+        date_from=date_from,
+        date_to=date_to,
+        truncated=len(rows) > limit,
+        rows=data
+    )
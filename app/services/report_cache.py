@@ -0,0 +1,145 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Protocol
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from pydantic import BaseModel
+from app.config import settings
+from app.services.etags import etag_matches, weak_etag
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "report:generation"
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[bytes]: ...
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None: ...
+    async def generation(self) -> str: ...
+    async def bump_generation(self) -> None: ...
+
+
+class MemoryBackend:
+    """Per-process LRU with TTL.
+
+    The generation is local too: writes handled by other app replicas only show
+    up here once entries expire, so keep the TTL short without a shared backend.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def generation(self) -> str:
+        return str(self._generation)
+
+    async def bump_generation(self) -> None:
+        self._generation += 1
+
+
+class RedisBackend:
+    """Shared cache and generation counter in Redis (or anything speaking its protocol)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("REPORT_CACHE_URL is set but the redis package is not installed")
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        await self.client.set(key, value, ex=ttl_seconds)
+
+    async def generation(self) -> str:
+        value = await self.client.get(GENERATION_KEY)
+        return value.decode() if value else "0"
+
+    async def bump_generation(self) -> None:
+        await self.client.incr(GENERATION_KEY)
+
+
+class ReportCache:
+    """Caches serialized report responses.
+
+    Keys are the endpoint plus its normalized query params, prefixed with a
+    generation that every sales/inventory write bumps, so a write makes all
+    older entries unreachable at once. ETags are taken from the cached body;
+    a matching If-None-Match on a cache hit is answered 304 without touching
+    the database.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    async def key(self, endpoint: str, params: dict) -> str:
+        normalized = urlencode(sorted(
+            (name, str(value)) for name, value in params.items() if value is not None
+        ))
+        return f"report:{await self.backend.generation()}:{endpoint}?{normalized}"
+
+    async def respond(
+        self,
+        request: Request,
+        endpoint: str,
+        params: dict,
+        compute: Callable[[], Awaitable[BaseModel]]
+    ) -> Response:
+        key = await self.key(endpoint, params)
+        body = await self.backend.get(key)
+        if body is None:
+            body = (await compute()).model_dump_json().encode()
+            if self.ttl_seconds > 0:
+                await self.backend.set(key, body, self.ttl_seconds)
+
+        etag = weak_etag(body)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self) -> None:
+        try:
+            await self.backend.bump_generation()
+        except Exception as e:
+            # Запись уже закоммичена, отчёты догонят по TTL
+            logger.error(f"Report cache invalidation failed: {e}")
+
+
+def create_report_cache() -> ReportCache:
+    if settings.REPORT_CACHE_URL:
+        backend = RedisBackend.from_url(settings.REPORT_CACHE_URL)
+    else:
+        backend = MemoryBackend(settings.REPORT_CACHE_MAX_SIZE)
+    return ReportCache(backend, settings.REPORT_CACHE_TTL_SECONDS)
+
+
+report_cache = create_report_cache()
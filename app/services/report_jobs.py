@@ -0,0 +1,442 @@
+import asyncio
+import logging
+import os
+import socket
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import async_session_maker, read_session
+from app.metrics import report_job_duration
+from app.models.report_job import ReportJob, ReportJobChunk, ReportJobStatus
+from app.schemas.report_job import (
+    ReportJobCreate, DateRangeParams, SalesByDateParams, TimeseriesParams,
+    PivotParams, SalesExportParams
+)
+from app.services.export import EXPORT_FORMATS, sale_filters, stream_sales
+from app.services.pivot import sales_pivot
+from app.services.report_render import XLSX_CONTENT_TYPE, render_report_xlsx
+from app.services.reports import sales_by_date, sales_by_seller, sales_by_car, sales_timeseries
+
+logger = logging.getLogger(__name__)
+
+JSON_CONTENT_TYPE = "application/json"
+ACTIVE_STATUSES = (ReportJobStatus.PENDING, ReportJobStatus.RUNNING)
+FINISHED_STATUSES = (ReportJobStatus.DONE, ReportJobStatus.FAILED, ReportJobStatus.CANCELLED)
+# Раз в столько секунд простаивающий воркер чистит старые результаты и брошенные задачи
+MAINTENANCE_INTERVAL_SECONDS = 60
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+# Результат хранится и отдаётся частями такого размера
+RESULT_CHUNK_SIZE = 1024 * 1024
+
+_worker_tasks: list[asyncio.Task] = []
+_job_available: Optional[asyncio.Event] = None
+_last_maintenance = 0.0
+
+
+@dataclass(frozen=True)
+class ReportJobType:
+    params: type[BaseModel]
+    formats: tuple
+    # Пишет результат во временный файл и возвращает путь; файл удаляет вызывающий
+    render: Callable[[BaseModel, str], Awaitable[str]]
+
+
+def _temp_path(report: str, fmt: str) -> str:
+    fd, path = tempfile.mkstemp(prefix=f"{report}-", suffix=f".{fmt}")
+    os.close(fd)
+    return path
+
+
+def _service_report(report: str, compute: Callable[[AsyncSession, BaseModel], Awaitable[BaseModel]]):
+    async def render(params: BaseModel, fmt: str) -> str:
+        async with read_session() as db:
+            response = await compute(db, params)
+        if fmt == "xlsx":
+            # Задача и так в очереди, поэтому ждёт процесс рендеринга, а не получает 503
+            return await render_report_xlsx(report, response, enforce_limit=False)
+        path = _temp_path(report, fmt)
+        try:
+            await asyncio.to_thread(Path(path).write_bytes, response.model_dump_json().encode())
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
+    return render
+
+
+async def _render_sales_export(params: SalesExportParams, fmt: str) -> str:
+    """Write the export to disk chunk by chunk, memory stays flat like the streaming endpoint"""
+    conditions = sale_filters(params.seller_id, params.date_from, params.date_to)
+    path = _temp_path("sales-export", fmt)
+    try:
+        with open(path, "wb") as file:
+            async for chunk in stream_sales(fmt, conditions):
+                await asyncio.to_thread(file.write, chunk.encode())
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+REPORT_JOB_TYPES = {
+    "sales-by-date": ReportJobType(SalesByDateParams, ("json", "xlsx"), _service_report(
+        "sales-by-date",
+        lambda db, p: sales_by_date(db, p.date_from, p.date_to)
+    )),
+    "sales-by-seller": ReportJobType(DateRangeParams, ("json", "xlsx"), _service_report(
+        "sales-by-seller",
+        lambda db, p: sales_by_seller(db, p.date_from, p.date_to)
+    )),
+    "sales-by-car": ReportJobType(DateRangeParams, ("json", "xlsx"), _service_report(
+        "sales-by-car",
+        lambda db, p: sales_by_car(db, p.date_from, p.date_to)
+    )),
+    "sales-timeseries": ReportJobType(TimeseriesParams, ("json",), _service_report(
+        "sales-timeseries",
+        lambda db, p: sales_timeseries(db, p.date_from, p.date_to, p.bucket, p.split_by, p.moving_window)
+    )),
+    "pivot": ReportJobType(PivotParams, ("json",), _service_report(
+        "pivot",
+        lambda db, p: sales_pivot(
+            db, p.dimensions, p.measures, p.subtotals, p.period, p.date_from, p.date_to, p.limit
+        )
+    )),
+    "sales-export": ReportJobType(SalesExportParams, tuple(EXPORT_FORMATS), _render_sales_export),
+}
+
+
+def content_type(fmt: str) -> str:
+    if fmt == "xlsx":
+        return XLSX_CONTENT_TYPE
+    return EXPORT_FORMATS.get(fmt, JSON_CONTENT_TYPE)
+
+
+def _validate(job_type: ReportJobType, params: dict) -> BaseModel:
+    try:
+        return job_type.params.model_validate(params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+
+async def enqueue_job(db: AsyncSession, spec: ReportJobCreate, user_id: int) -> ReportJob:
+    job_type = REPORT_JOB_TYPES.get(spec.report)
+    if job_type is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown report, expected one of: {', '.join(REPORT_JOB_TYPES)}"
+        )
+    if spec.format not in job_type.formats:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format {spec.format} is not available for {spec.report}, expected one of: {', '.join(job_type.formats)}"
+        )
+    params = _validate(job_type, spec.params)
+
+    active = await db.execute(
+        select(func.count(ReportJob.id)).where(ReportJob.user_id == user_id, ReportJob.status.in_(ACTIVE_STATUSES))
+    )
+    if active.scalar() >= settings.REPORT_JOB_MAX_ACTIVE_PER_USER:
+        raise HTTPException(
+            status_code=429,
+            detail=f"At most {settings.REPORT_JOB_MAX_ACTIVE_PER_USER} queued or running report jobs per user"
+        )
+
+    job = ReportJob(
+        report=spec.report,
+        format=spec.format,
+        params=params.model_dump(mode="json", exclude_unset=True),
+        status=ReportJobStatus.PENDING,
+        user_id=user_id,
+        attempts=0
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+def notify_workers() -> None:
+    """Wake an idle worker in this process; other replicas find the job on their next poll"""
+    if _job_available is not None:
+        _job_available.set()
+
+
+async def get_job(db: AsyncSession, job_id: int, user_id: int, is_director: bool) -> ReportJob:
+    job = await db.get(ReportJob, job_id)
+    # Чужие задачи видит только директор, остальным они "не существуют"
+    if job is None or (job.user_id != user_id and not is_director):
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+async def list_jobs(db: AsyncSession, user_id: int, limit: int = 50) -> list[ReportJob]:
+    result = await db.execute(
+        select(ReportJob).where(ReportJob.user_id == user_id).order_by(ReportJob.id.desc()).limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def cancel_job(db: AsyncSession, job: ReportJob) -> ReportJob:
+    """Cancel a queued or running job; a running one stops at its worker's next heartbeat"""
+    result = await db.execute(
+        update(ReportJob)
+        .where(ReportJob.id == job.id, ReportJob.status.in_(ACTIVE_STATUSES))
+        .values(status=ReportJobStatus.CANCELLED, finished_at=func.now())
+        .returning(ReportJob)
+        .execution_options(populate_existing=True)
+    )
+    cancelled = result.scalar_one_or_none()
+    if cancelled is None:
+        raise HTTPException(status_code=409, detail=f"Report job is already {job.status.value}")
+    return cancelled
+
+
+def check_job_result(job: ReportJob) -> None:
+    if job.status != ReportJobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status.value}")
+
+
+async def stream_job_result(job_id: int) -> AsyncIterator[bytes]:
+    """Yield a finished job's output chunk by chunk from a server-side cursor.
+
+    Runs on its own primary session (the request's is closed before the body
+    is sent, and a replica may not have the result yet).
+    """
+    async with async_session_maker() as db:
+        result = await db.stream(
+            select(ReportJobChunk.data)
+            .where(ReportJobChunk.job_id == job_id)
+            .order_by(ReportJobChunk.seq)
+            .execution_options(yield_per=1)
+        )
+        async for data in result.scalars():
+            yield data
+
+
+async def _store_result(job_id: int, path: str) -> bool:
+    """Mark the job done and copy the file into report_job_chunks, in one transaction.
+
+    The job row is updated first, so a concurrent cancel waits for the commit
+    instead of racing it; False (nothing stored) if the job is no longer ours.
+    """
+    async with async_session_maker() as db:
+        result = await db.execute(
+            update(ReportJob)
+            .where(
+                ReportJob.id == job_id,
+                ReportJob.status == ReportJobStatus.RUNNING,
+                ReportJob.worker == WORKER_ID
+            )
+            .values(status=ReportJobStatus.DONE, finished_at=func.now())
+            .returning(ReportJob.id)
+        )
+        if result.scalar_one_or_none() is None:
+            await db.rollback()
+            return False
+
+        size = 0
+        seq = 0
+        with open(path, "rb") as file:
+            while data := await asyncio.to_thread(file.read, RESULT_CHUNK_SIZE):
+                await db.execute(insert(ReportJobChunk).values(job_id=job_id, seq=seq, data=data))
+                size += len(data)
+                seq += 1
+        await db.execute(update(ReportJob).where(ReportJob.id == job_id).values(result_size=size))
+        await db.commit()
+    return True
+
+
+async def claim_job(db: AsyncSession) -> Optional[ReportJob]:
+    """Take the oldest pending job, or a running one whose worker stopped heartbeating.
+
+    Rows already locked by another worker are skipped, so replicas never run
+    the same job twice and never wait on each other.
+    """
+    stale = func.now() - timedelta(seconds=settings.REPORT_JOB_STALE_SECONDS)
+    candidate = (
+        select(ReportJob.id)
+        .where(
+            or_(
+                ReportJob.status == ReportJobStatus.PENDING,
+                and_(ReportJob.status == ReportJobStatus.RUNNING, ReportJob.heartbeat_at < stale)
+            ),
+            ReportJob.attempts < settings.REPORT_JOB_MAX_ATTEMPTS
+        )
+        .order_by(ReportJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(ReportJob)
+        .where(ReportJob.id == candidate.scalar_subquery())
+        .values(
+            status=ReportJobStatus.RUNNING,
+            attempts=ReportJob.attempts + 1,
+            worker=WORKER_ID,
+            started_at=func.now(),
+            heartbeat_at=func.now(),
+            error=None
+        )
+        .returning(ReportJob)
+        .execution_options(populate_existing=True)
+    )
+    job = result.scalar_one_or_none()
+    await db.commit()
+    return job
+
+
+async def _owned_update(job_id: int, **values) -> bool:
+    """Update a job this worker still owns; False once it was cancelled or taken over"""
+    async with async_session_maker() as db:
+        result = await db.execute(
+            update(ReportJob)
+            .where(
+                ReportJob.id == job_id,
+                ReportJob.status == ReportJobStatus.RUNNING,
+                ReportJob.worker == WORKER_ID
+            )
+            .values(**values)
+            .returning(ReportJob.id)
+        )
+        owned = result.scalar_one_or_none() is not None
+        await db.commit()
+    return owned
+
+
+def _discard_output(work: asyncio.Task) -> None:
+    """Delete the file of a render that finished but was never stored (timeout, cancel, shutdown)"""
+    if work.done() and not work.cancelled() and work.exception() is None:
+        path = work.result()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+async def run_job(job: ReportJob) -> None:
+    job_type = REPORT_JOB_TYPES.get(job.report)
+    if job_type is None:
+        await _owned_update(job.id, status=ReportJobStatus.FAILED, error="Unknown report", finished_at=func.now())
+        return
+
+    start = time.monotonic()
+    work = asyncio.create_task(job_type.render(job_type.params.model_validate(job.params), job.format))
+    status = ReportJobStatus.FAILED
+    try:
+        while True:
+            done, _ = await asyncio.wait({work}, timeout=settings.REPORT_JOB_HEARTBEAT_SECONDS)
+            if done:
+                break
+            if time.monotonic() - start > settings.REPORT_JOB_TIMEOUT_SECONDS:
+                work.cancel()
+                await _owned_update(
+                    job.id, status=ReportJobStatus.FAILED, finished_at=func.now(),
+                    error=f"Timed out after {settings.REPORT_JOB_TIMEOUT_SECONDS} s"
+                )
+                return
+            if not await _owned_update(job.id, heartbeat_at=func.now()):
+                # Отменили через API (или задачу забрал другой воркер): бросаем работу
+                work.cancel()
+                status = ReportJobStatus.CANCELLED
+                logger.info(f"Report job {job.id} cancelled")
+                return
+
+        try:
+            path = work.result()
+        except HTTPException as e:
+            await _owned_update(job.id, status=ReportJobStatus.FAILED, error=str(e.detail), finished_at=func.now())
+            return
+        except Exception as e:
+            logger.exception(f"Report job {job.id} failed")
+            await _owned_update(job.id, status=ReportJobStatus.FAILED, error=str(e)[:1000], finished_at=func.now())
+            return
+
+        try:
+            stored = await _store_result(job.id, path)
+        finally:
+            os.unlink(path)
+        status = ReportJobStatus.DONE if stored else ReportJobStatus.CANCELLED
+    except asyncio.CancelledError:
+        # Остановка процесса: возвращаем задачу в очередь, её доделает другая реплика;
+        # попытка не засчитывается, задача тут ни при чём
+        work.cancel()
+        await _owned_update(
+            job.id, status=ReportJobStatus.PENDING, worker=None, heartbeat_at=None,
+            attempts=ReportJob.attempts - 1
+        )
+        raise
+    finally:
+        _discard_output(work)
+        report_job_duration.observe(time.monotonic() - start, job.report, status.value)
+
+
+async def expire_jobs(db: AsyncSession) -> None:
+    """Delete old finished jobs and fail running ones abandoned past the attempt limit"""
+    stale = func.now() - timedelta(seconds=settings.REPORT_JOB_STALE_SECONDS)
+    await db.execute(
+        update(ReportJob)
+        .where(
+            ReportJob.status == ReportJobStatus.RUNNING,
+            ReportJob.heartbeat_at < stale,
+            ReportJob.attempts >= settings.REPORT_JOB_MAX_ATTEMPTS
+        )
+        .values(status=ReportJobStatus.FAILED, error="Worker lost", finished_at=func.now())
+    )
+    await db.execute(
+        delete(ReportJob).where(
+            ReportJob.status.in_(FINISHED_STATUSES),
+            ReportJob.finished_at < func.now() - timedelta(hours=settings.REPORT_JOB_RESULT_TTL_HOURS)
+        )
+    )
+    await db.commit()
+
+
+async def process_jobs(poll_interval: float) -> None:
+    global _last_maintenance
+    while True:
+        try:
+            async with async_session_maker() as db:
+                job = await claim_job(db)
+                if job is None and time.monotonic() - _last_maintenance > MAINTENANCE_INTERVAL_SECONDS:
+                    _last_maintenance = time.monotonic()
+                    await expire_jobs(db)
+            if job is not None:
+                logger.info(f"Running report job {job.id} ({job.report}, attempt {job.attempts})")
+                await run_job(job)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Report job worker failed: {e}")
+
+        try:
+            await asyncio.wait_for(_job_available.wait(), timeout=poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        _job_available.clear()
+
+
+def start_report_workers() -> None:
+    global _job_available
+    if settings.REPORT_JOB_WORKERS > 0 and not _worker_tasks:
+        _job_available = asyncio.Event()
+        for _ in range(settings.REPORT_JOB_WORKERS):
+            _worker_tasks.append(asyncio.create_task(process_jobs(settings.REPORT_JOB_POLL_SECONDS)))
+
+
+async def stop_report_workers() -> None:
+    global _job_available
+    for task in _worker_tasks:
+        task.cancel()
+    for task in _worker_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _worker_tasks.clear()
+    _job_available = None
@@ -0,0 +1,156 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from contextlib import suppress
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from app.config import settings
+from app.metrics import register_callback, report_render_latency, report_render_rejected
+from app.services.xlsx_render import render_xlsx
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_in_flight = 0
+
+register_callback(
+    "report_render_in_flight", "xlsx renders running or queued", (),
+    lambda: {(): _in_flight}
+)
+
+
+@dataclass(frozen=True)
+class ReportSheet:
+    title: str
+    columns: tuple
+    rows: Callable[[BaseModel], list[tuple]]
+
+
+REPORT_SHEETS = {
+    "sales-by-date": ReportSheet(
+        "Sales by date",
+        (("Date", "date"), ("Sales", "int"), ("Revenue", "money")),
+        lambda report: [(item.date, item.sales_count, item.total_revenue) for item in report.data]
+    ),
+    "sales-by-seller": ReportSheet(
+        "Sales by seller",
+        (("Seller ID", "int"), ("Seller", "text"), ("Sales", "int"), ("Revenue", "money"), ("Average price", "money")),
+        lambda report: [
+            (item.seller_id, item.seller_name, item.sales_count, item.total_revenue, item.average_price)
+            for item in report.data
+        ]
+    ),
+    "sales-by-car": ReportSheet(
+        "Sales by car",
+        (("Brand", "text"), ("Model", "text"), ("Sales", "int"), ("Revenue", "money")),
+        lambda report: [(item.brand, item.model, item.sales_count, item.total_revenue) for item in report.data]
+    ),
+}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, а не fork: копия процесса с event loop и соединениями asyncpg воркеру не нужна
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.REPORT_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a worker died, e.g. OOM-killed) so the next render builds a new one"""
+    global _executor
+    executor.shutdown(wait=False, cancel_futures=True)
+    if _executor is executor:
+        _executor = None
+
+
+def _delete_when_settled(future: Optional[Future], path: str) -> None:
+    """Delete the output once no worker can still be writing it"""
+    def delete(_=None) -> None:
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+
+    # Отмена запроса не останавливает запущенный воркер: удалить файл сразу - он создаст его заново
+    if future is None:
+        delete()
+    else:
+        future.add_done_callback(delete)
+
+
+async def _render_in_pool(path: str, title: str, columns: list, rows: list) -> None:
+    """Run render_xlsx in the pool, once more on a fresh pool if the current one is broken"""
+    for attempt in range(2):
+        executor = _get_executor()
+        future = None
+        try:
+            future = executor.submit(render_xlsx, path, title, columns, rows)
+            await asyncio.wrap_future(future)
+            return
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            if attempt:
+                _delete_when_settled(future, path)
+                raise
+        except BaseException:
+            _delete_when_settled(future, path)
+            raise
+
+
+async def render_report_xlsx(report: str, response: BaseModel, enforce_limit: bool = True) -> str:
+    """Render a report response to a temporary .xlsx in a worker process, returns its path.
+
+    The event loop only builds the row tuples; the workbook is written by the
+    process pool. Beyond workers + REPORT_RENDER_QUEUE_LIMIT renders in flight
+    requests get 503 (background jobs pass enforce_limit=False and wait).
+    The caller deletes the file.
+    """
+    global _in_flight
+    if enforce_limit and _in_flight >= settings.REPORT_RENDER_WORKERS + settings.REPORT_RENDER_QUEUE_LIMIT:
+        report_render_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many spreadsheets rendering, retry shortly or queue a report job",
+            headers={"Retry-After": "5"},
+        )
+
+    sheet = REPORT_SHEETS[report]
+    rows = sheet.rows(response)
+    fd, path = tempfile.mkstemp(prefix=f"{report}-", suffix=".xlsx")
+    os.close(fd)
+    _in_flight += 1
+    start = time.perf_counter()
+    try:
+        await _render_in_pool(path, sheet.title, list(sheet.columns), rows)
+    finally:
+        _in_flight -= 1
+        report_render_latency.observe(time.perf_counter() - start, report)
+    return path
+
+
+async def xlsx_response(report: str, response: BaseModel, filename: str) -> FileResponse:
+    """Stream the rendered workbook and delete the temporary file once it is sent"""
+    path = await render_report_xlsx(report, response)
+    return FileResponse(
+        path,
+        media_type=XLSX_CONTENT_TYPE,
+        filename=filename,
+        background=BackgroundTask(os.unlink, path)
+    )
+
+
+def shutdown_render_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
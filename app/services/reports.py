@@ -0,0 +1,268 @@
+from datetime import date, datetime, time
+from itertools import groupby
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import (
+    select, func, and_, cast, null, true, literal, literal_column,
+    BigInteger, DateTime, Float, Integer, String
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.car import Car
+from app.models.sale import Sale
+from app.models.seller import Seller
+from app.models.sales_rollup import SalesDailyRollup
+from app.schemas.report import (
+    SalesByDateResponse, SalesBySellerResponse, SalesByCarResponse,
+    SalesByDateItem, SalesBySellerItem, SalesByCarItem,
+    SalesTimeseriesResponse, TimeseriesSeries, TimeseriesPoint
+)
+from app.services.dates import date_range_filter
+
+TIMESERIES_BUCKETS = {
+    "hour": "1 hour",
+    "day": "1 day",
+    "week": "1 week",
+    "month": "1 month",
+    "quarter": "3 months",
+}
+MAX_TIMESERIES_BUCKETS = 2000
+
+
+async def sales_by_date(db: AsyncSession, date_from: date, date_to: date) -> SalesByDateResponse:
+    query = select(
+        SalesDailyRollup.day.label('date'),
+        func.sum(SalesDailyRollup.sales_count).label('count'),
+        func.sum(SalesDailyRollup.revenue).label('revenue')
+    ).where(
+        and_(
+            SalesDailyRollup.day >= date_from,
+            SalesDailyRollup.day <= date_to
+        )
+    ).group_by(SalesDailyRollup.day).order_by(SalesDailyRollup.day)
+    
+    result = await db.execute(query)
+    data = [
+        SalesByDateItem(
+            date=row.date,
+            sales_count=row.count,
+            total_revenue=float(row.revenue)
+        ) for row in result.all()
+    ]
+    
+    return SalesByDateResponse(
+        period=f"{date_from} - {date_to}",
+        data=data
+    )
+
+
+async def sales_by_seller(
+    db: AsyncSession,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> SalesBySellerResponse:
+    sales_count = func.sum(SalesDailyRollup.sales_count)
+    revenue = func.sum(SalesDailyRollup.revenue)
+    query = select(
+        Seller.id,
+        Seller.full_name,
+        sales_count.label('count'),
+        revenue.label('revenue')
+    ).join(SalesDailyRollup, Seller.id == SalesDailyRollup.seller_id)
+    
+    if date_from:
+        query = query.where(SalesDailyRollup.day >= date_from)
+    if date_to:
+        query = query.where(SalesDailyRollup.day <= date_to)
+    
+    query = query.group_by(Seller.id, Seller.full_name).order_by(revenue.desc())
+    
+    result = await db.execute(query)
+    data = [
+        SalesBySellerItem(
+            seller_id=row.id,
+            seller_name=row.full_name,
+            sales_count=row.count,
+            total_revenue=float(row.revenue),
+            average_price=float(row.revenue) / row.count if row.count else 0.0
+        ) for row in result.all()
+    ]
+    
+    return SalesBySellerResponse(data=data)
+
+
+async def sales_by_car(
+    db: AsyncSession,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> SalesByCarResponse:
+    sales_count = func.sum(SalesDailyRollup.sales_count)
+    query = select(
+        SalesDailyRollup.brand,
+        SalesDailyRollup.model,
+        sales_count.label('count'),
+        func.sum(SalesDailyRollup.revenue).label('revenue')
+    )
+    
+    if date_from:
+        query = query.where(SalesDailyRollup.day >= date_from)
+    if date_to:
+        query = query.where(SalesDailyRollup.day <= date_to)
+    
+    query = query.group_by(SalesDailyRollup.brand, SalesDailyRollup.model).order_by(sales_count.desc())
+    
+    result = await db.execute(query)
+    data = [
+        SalesByCarItem(
+            brand=row.brand,
+            model=row.model,
+            sales_count=row.count,
+            total_revenue=float(row.revenue)
+        ) for row in result.all()
+    ]
+    
+    return SalesByCarResponse(data=data)
+
+
+def _bucket_count(bucket: str, date_from: date, date_to: date) -> int:
+    days = (date_to - date_from).days + 1
+    if bucket == "hour":
+        return days * 24
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        return days // 7 + 2
+    months = (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+    return months if bucket == "month" else months // 3 + 1
+
+
+def _timeseries_source(bucket: str, split_by: Optional[str], date_from: date, date_to: date):
+    """Sales aggregated per bucket (and split key), buckets as local business time"""
+    if bucket == "hour":
+        # Часов в дневном rollup нет, считаем по самим продажам
+        bucket_expr = func.date_trunc("hour", func.timezone(settings.BUSINESS_TIMEZONE, Sale.sale_date))
+        key = {"seller": Sale.seller_id, "brand": Car.brand}.get(split_by)
+        sales_count, revenue = func.count(Sale.id), func.sum(Sale.sale_price)
+        conditions = date_range_filter(Sale.sale_date, date_from, date_to)
+    else:
+        # Сначала сворачиваем rollup по дням: группировка по колонке дешевле, чем date_trunc на каждой строке
+        split_column = {"seller": SalesDailyRollup.seller_id, "brand": SalesDailyRollup.brand}.get(split_by)
+        day_columns = [SalesDailyRollup.day] + ([split_column.label("key")] if split_column is not None else [])
+        daily = select(
+            *day_columns,
+            func.sum(SalesDailyRollup.sales_count).label("sales_count"),
+            func.sum(SalesDailyRollup.revenue).label("revenue")
+        ).where(
+            SalesDailyRollup.day >= date_from,
+            SalesDailyRollup.day <= date_to
+        ).group_by(*day_columns).subquery("daily")
+        bucket_expr = func.date_trunc(bucket, cast(daily.c.day, DateTime))
+        key = daily.c.key if split_by else None
+        sales_count, revenue = func.sum(daily.c.sales_count), func.sum(daily.c.revenue)
+        conditions = []
+
+    columns = [bucket_expr.label("bucket")]
+    if key is not None:
+        columns.append(key.label("key"))
+    query = select(
+        *columns,
+        cast(sales_count, Integer).label("sales_count"),
+        revenue.label("revenue")
+    ).where(*conditions).group_by(*columns)
+    if bucket == "hour" and split_by == "brand":
+        query = query.join(Car, Car.id == Sale.car_id)
+    # CTE: с разбивкой читается дважды (ключи и данные), считаем один раз
+    return query.cte("data")
+
+
+async def sales_timeseries(
+    db: AsyncSession,
+    date_from: date,
+    date_to: date,
+    bucket: str = "day",
+    split_by: Optional[str] = None,
+    moving_window: int = 7
+) -> SalesTimeseriesResponse:
+    """Sales per calendar-aligned bucket with running totals and a trailing moving average.
+
+    Every bucket in the range is returned, empty ones as zeros, for every split
+    key that has sales in the range. Hours come from the sales table, coarser
+    buckets from the daily rollup. Edge buckets cover only the part of them
+    inside the range.
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to is before date_from")
+    if _bucket_count(bucket, date_from, date_to) > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {MAX_TIMESERIES_BUCKETS} {bucket} buckets, use a coarser bucket or a shorter range"
+        )
+
+    data = _timeseries_source(bucket, split_by, date_from, date_to)
+    last = datetime.combine(date_to, time(23) if bucket == "hour" else time.min)
+    buckets = select(
+        func.generate_series(
+            func.date_trunc(bucket, literal(datetime.combine(date_from, time.min))),
+            literal(last),
+            literal_column(f"interval '{TIMESERIES_BUCKETS[bucket]}'")
+        ).label("bucket")
+    ).subquery("buckets")
+    if split_by:
+        keys = select(data.c.key).distinct().subquery("keys")
+        grid = select(buckets.c.bucket, keys.c.key).select_from(buckets.join(keys, true())).subquery("grid")
+        key = grid.c.key
+        matches = and_(data.c.bucket == grid.c.bucket, data.c.key == grid.c.key)
+    else:
+        grid = buckets
+        key = cast(null(), String)
+        matches = data.c.bucket == grid.c.bucket
+
+    sales_count = func.coalesce(data.c.sales_count, 0)
+    revenue = func.coalesce(data.c.revenue, 0)
+    window = {"partition_by": key if split_by else None, "order_by": grid.c.bucket}
+    label = Seller.full_name if split_by == "seller" else key
+
+    query = select(
+        grid.c.bucket,
+        key.label("key"),
+        label.label("label"),
+        sales_count.label("sales_count"),
+        revenue.label("revenue"),
+        # sum/avg по целым дают numeric; приводим в базе, чтобы не разбирать Decimal на каждой строке
+        cast(func.sum(sales_count).over(**window, rows=(None, 0)), BigInteger).label("cumulative_count"),
+        func.sum(revenue).over(**window, rows=(None, 0)).label("cumulative_revenue"),
+        cast(func.avg(sales_count).over(**window, rows=(-(moving_window - 1), 0)), Float).label("moving_avg_count"),
+        cast(func.avg(revenue).over(**window, rows=(-(moving_window - 1), 0)), Float).label("moving_avg_revenue")
+    ).select_from(grid).outerjoin(data, matches)
+    if split_by == "seller":
+        query = query.outerjoin(Seller, Seller.id == grid.c.key)
+    query = query.order_by(*((grid.c.key,) if split_by else ()), grid.c.bucket)
+
+    result = await db.execute(query)
+    series = []
+    for key, group in groupby(result.all(), key=lambda row: row.key):
+        rows = list(group)
+        series.append(TimeseriesSeries(
+            key=str(key) if key is not None else None,
+            label=rows[0].label if split_by else None,
+            points=[
+                TimeseriesPoint(
+                    bucket=row.bucket,
+                    sales_count=row.sales_count,
+                    revenue=float(row.revenue),
+                    cumulative_count=row.cumulative_count,
+                    cumulative_revenue=float(row.cumulative_revenue),
+                    moving_avg_count=float(row.moving_avg_count),
+                    moving_avg_revenue=float(row.moving_avg_revenue)
+                ) for row in rows
+            ]
+        ))
+
+    return SalesTimeseriesResponse(
+        bucket=bucket,
+        split_by=split_by,
+        moving_window=moving_window,
+        date_from=date_from,
+        date_to=date_to,
+        series=series
+    )
\ No newline at end of file
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import async_session_maker
+from app.models.car import Car, CarStatus
+from app.models.client import Client
+from app.services.report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+def reservation_expiry(hours: Optional[int] = None) -> datetime:
+    hours = hours or settings.RESERVATION_DEFAULT_HOURS
+    if hours > settings.RESERVATION_MAX_HOURS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Reservation cannot exceed {settings.RESERVATION_MAX_HOURS} hours"
+        )
+    return datetime.now(timezone.utc) + timedelta(hours=hours)
+
+
+async def _car_status_error(db: AsyncSession, car_id: int, detail: str) -> HTTPException:
+    result = await db.execute(select(Car.id).where(Car.id == car_id))
+    if result.scalar_one_or_none() is None:
+        return HTTPException(status_code=404, detail="Car not found")
+    return HTTPException(status_code=400, detail=detail)
+
+
+async def _reserve_error(db: AsyncSession, car_id: int, client_id: int) -> HTTPException:
+    result = await db.execute(select(
+        select(Car.status).where(Car.id == car_id).scalar_subquery(),
+        exists().where(Client.id == client_id)
+    ))
+    car_status, client_exists = result.one()
+    if car_status is None:
+        return HTTPException(status_code=404, detail="Car not found")
+    if not client_exists:
+        return HTTPException(status_code=404, detail="Client not found")
+    if car_status == CarStatus.RESERVED:
+        return HTTPException(status_code=400, detail="Car is reserved for another client")
+    return HTTPException(status_code=400, detail="Car is not available")
+
+
+async def reserve_car(db: AsyncSession, car_id: int, client_id: int, hours: Optional[int] = None) -> Car:
+    """Put an available car on hold for a client, or extend that client's hold"""
+    result = await db.execute(
+        update(Car)
+        .where(
+            Car.id == car_id,
+            or_(
+                Car.status == CarStatus.AVAILABLE,
+                # Чужую бронь не продлить и не сократить, только снять через /release
+                and_(Car.status == CarStatus.RESERVED, Car.reserved_for_id == client_id)
+            ),
+            exists().where(Client.id == client_id)
+        )
+        .values(
+            status=CarStatus.RESERVED,
+            reserved_for_id=client_id,
+            reserved_until=reservation_expiry(hours),
+            updated_at=func.now()
+        )
+        .returning(Car)
+        .execution_options(populate_existing=True)
+    )
+    car = result.scalar_one_or_none()
+    if car is None:
+        raise await _reserve_error(db, car_id, client_id)
+    return car
+
+
+async def release_car(db: AsyncSession, car_id: int) -> Car:
+    result = await db.execute(
+        update(Car)
+        .where(Car.id == car_id, Car.status == CarStatus.RESERVED)
+        .values(status=CarStatus.AVAILABLE, reserved_until=None, reserved_for_id=None, updated_at=func.now())
+        .returning(Car)
+        .execution_options(populate_existing=True)
+    )
+    car = result.scalar_one_or_none()
+    if car is None:
+        raise await _car_status_error(db, car_id, "Car is not reserved")
+    return car
+
+
+async def release_expired(db: AsyncSession, batch_size: int) -> int:
+    """Release one batch of expired holds, returns how many were released.
+
+    Rows locked by another replica's sweeper (or by a sale in progress) are
+    skipped instead of waited on, so several sweepers never do the same work.
+    """
+    expired = (
+        select(Car.id)
+        .where(Car.status == CarStatus.RESERVED, Car.reserved_until <= func.now())
+        .order_by(Car.reserved_until)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(Car)
+        .where(Car.id.in_(expired.scalar_subquery()))
+        .values(status=CarStatus.AVAILABLE, reserved_until=None, reserved_for_id=None, updated_at=func.now())
+        .returning(Car.id)
+        .execution_options(synchronize_session=False)
+    )
+    released = len(result.all())
+    await db.commit()
+    return released
+
+
+async def sweep_reservations(interval: float, batch_size: int) -> None:
+    while True:
+        try:
+            async with async_session_maker() as db:
+                while True:
+                    released = await release_expired(db, batch_size)
+                    if released:
+                        logger.info(f"Released {released} expired reservations")
+                        await report_cache.invalidate()
+                    if released < batch_size:
+                        break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Reservation sweep failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_reservation_sweeper() -> None:
+    global _sweeper_task
+    if settings.RESERVATION_SWEEP_INTERVAL_SECONDS > 0 and _sweeper_task is None:
+        _sweeper_task = asyncio.create_task(sweep_reservations(
+            settings.RESERVATION_SWEEP_INTERVAL_SECONDS,
+            settings.RESERVATION_SWEEP_BATCH_SIZE
+        ))
+
+
+async def stop_reservation_sweeper() -> None:
+    global _sweeper_task
+    if _sweeper_task is None:
+        return
+    _sweeper_task.cancel()
+    try:
+        await _sweeper_task
+    except asyncio.CancelledError:
+        pass
+    _sweeper_task = None
@@ -0,0 +1,50 @@
+from sqlalchemy import Select, select, delete, func
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.sale import Sale
+from app.models.car import Car
+from app.models.sales_rollup import SalesDailyRollup
+from app.services.dates import business_date
+
+ROLLUP_COLUMNS = [
+    SalesDailyRollup.day, SalesDailyRollup.seller_id,
+    SalesDailyRollup.brand, SalesDailyRollup.model,
+    SalesDailyRollup.sales_count, SalesDailyRollup.revenue,
+    SalesDailyRollup.revenue_squares
+]
+
+
+def rollup_upsert(source: Select) -> Insert:
+    """Add the rows of source (columns as in ROLLUP_COLUMNS) to their rollup buckets"""
+    stmt = insert(SalesDailyRollup).from_select(ROLLUP_COLUMNS, source)
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            SalesDailyRollup.day, SalesDailyRollup.seller_id,
+            SalesDailyRollup.brand, SalesDailyRollup.model
+        ],
+        set_={
+            "sales_count": SalesDailyRollup.sales_count + stmt.excluded.sales_count,
+            "revenue": SalesDailyRollup.revenue + stmt.excluded.revenue,
+            "revenue_squares": SalesDailyRollup.revenue_squares + stmt.excluded.revenue_squares,
+        }
+    )
+
+
+async def rebuild_rollup(db: AsyncSession) -> int:
+    """Recompute the whole rollup from the sales table, returns the number of buckets"""
+    sale_day = business_date(Sale.sale_date)
+    source = select(
+        sale_day,
+        Sale.seller_id,
+        Car.brand,
+        Car.model,
+        func.count(Sale.id),
+        func.sum(Sale.sale_price),
+        func.sum(Sale.sale_price * Sale.sale_price)
+    ).join(Car, Car.id == Sale.car_id).where(
+        Sale.sale_date.is_not(None)
+    ).group_by(sale_day, Sale.seller_id, Car.brand, Car.model)
+
+    await db.execute(delete(SalesDailyRollup))
+    result = await db.execute(insert(SalesDailyRollup).from_select(ROLLUP_COLUMNS, source))
+    return result.rowcount
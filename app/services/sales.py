@@ -0,0 +1,136 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.car import Car, CarStatus
+from app.models.client import Client
+from app.models.sale import Sale
+from app.models.seller import Seller
+from app.schemas.car import CarResponse
+from app.schemas.client import ClientResponse
+from app.schemas.sale import SaleCreate, SaleResponse
+from app.schemas.seller import SellerResponse
+from app.services.dates import business_date
+from app.services.rollup import rollup_upsert
+
+cars = Car.__table__
+clients = Client.__table__
+sellers = Seller.__table__
+sales = Sale.__table__
+
+
+def _sell_statement(sale_data: SaleCreate):
+    """One statement that claims the car, records the sale and updates the rollup.
+
+    The car is claimed with UPDATE ... WHERE status = 'AVAILABLE' (or 'RESERVED' for this
+    client) only if the client exists and the seller is active; a concurrent sale of the
+    same car waits on the row lock and then matches nothing, so at most one of them returns a row.
+    """
+    client = select(clients).where(clients.c.id == sale_data.client_id).cte("client")
+    seller = select(sellers).where(
+        sellers.c.id == sale_data.seller_id,
+        sellers.c.is_active.is_(True)
+    ).cte("seller")
+
+    claimed = (
+        update(cars)
+        .where(
+            cars.c.id == sale_data.car_id,
+            or_(
+                cars.c.status == CarStatus.AVAILABLE,
+                # Забронированную машину продают только тому, за кем бронь
+                and_(cars.c.status == CarStatus.RESERVED, cars.c.reserved_for_id == sale_data.client_id)
+            ),
+            exists(client.select()),
+            exists(seller.select())
+        )
+        .values(status=CarStatus.SOLD, reserved_until=None, reserved_for_id=None, updated_at=func.now())
+        .returning(*cars.c)
+        .cte("claimed")
+    )
+    sale = (
+        insert(sales)
+        .from_select(
+            ["car_id", "client_id", "seller_id", "sale_price"],
+            select(
+                claimed.c.id,
+                literal(sale_data.client_id),
+                literal(sale_data.seller_id),
+                literal(sale_data.sale_price)
+            )
+        )
+        .returning(*sales.c)
+        .cte("sale")
+    )
+    rollup = rollup_upsert(
+        select(
+            # now() одинаков для всей транзакции, как и server_default у sale_date
+            business_date(func.now()),
+            literal(sale_data.seller_id),
+            claimed.c.brand,
+            claimed.c.model,
+            literal(1),
+            literal(sale_data.sale_price),
+            literal(sale_data.sale_price * sale_data.sale_price)
+        )
+    ).cte("rollup")
+
+    return (
+        select(
+            *[column.label(f"sale_{column.key}") for column in sale.c],
+            *[column.label(f"car_{column.key}") for column in claimed.c],
+            *[column.label(f"client_{column.key}") for column in client.c],
+            *[column.label(f"seller_{column.key}") for column in seller.c]
+        )
+        .select_from(sale)
+        .join(claimed, claimed.c.id == sale.c.car_id)
+        .join(client, client.c.id == sale.c.client_id)
+        .join(seller, seller.c.id == sale.c.seller_id)
+        .add_cte(rollup)
+    )
+
+
+def _unprefix(row: dict, prefix: str) -> dict:
+    return {key[len(prefix):]: value for key, value in row.items() if key.startswith(prefix)}
+
+
+async def _raise_sale_error(db: AsyncSession, sale_data: SaleCreate) -> None:
+    """Explain why the sale statement matched nothing (only runs on failure)"""
+    result = await db.execute(select(
+        select(Car.status).where(Car.id == sale_data.car_id).scalar_subquery(),
+        select(Car.reserved_for_id).where(Car.id == sale_data.car_id).scalar_subquery(),
+        exists().where(Client.id == sale_data.client_id),
+        select(Seller.is_active).where(Seller.id == sale_data.seller_id).scalar_subquery()
+    ))
+    car_status, reserved_for_id, client_exists, seller_active = result.one()
+    if car_status is None:
+        raise HTTPException(status_code=404, detail="Car not found")
+    if car_status == CarStatus.SOLD:
+        raise HTTPException(status_code=400, detail="Car is not available")
+    if not client_exists:
+        raise HTTPException(status_code=404, detail="Client not found")
+    if seller_active is None:
+        raise HTTPException(status_code=404, detail="Seller not found")
+    if not seller_active:
+        raise HTTPException(status_code=400, detail="Seller is not active")
+    if car_status == CarStatus.RESERVED and reserved_for_id != sale_data.client_id:
+        raise HTTPException(status_code=400, detail="Car is reserved for another client")
+    # Машину успели продать между двумя запросами
+    raise HTTPException(status_code=400, detail="Car is not available")
+
+
+async def sell_car(db: AsyncSession, sale_data: SaleCreate) -> SaleResponse:
+    """Record a sale in a single round trip; the caller commits"""
+    result = await db.execute(_sell_statement(sale_data))
+    row = result.mappings().one_or_none()
+    if row is None:
+        await db.rollback()
+        await _raise_sale_error(db, sale_data)
+
+    row = dict(row)
+    return SaleResponse(
+        **_unprefix(row, "sale_"),
+        car=CarResponse(**_unprefix(row, "car_")),
+        client=ClientResponse(**_unprefix(row, "client_")),
+        seller=SellerResponse(**_unprefix(row, "seller_"))
+    )
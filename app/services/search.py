@@ -0,0 +1,108 @@
+import re
+from typing import Any, Optional
+from sqlalchemy import func, or_, case, text, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from app.models.car import Car
+from app.models.client import Client
+
+# Символы VIN: латиница и цифры без I, O, Q
+VIN_PATTERN = re.compile(r"^[A-HJ-NPR-Z0-9]{17}$")
+MIN_PHONE_DIGITS = 3
+
+# Выставляется при старте, если в базе установлено расширение pg_trgm
+_trigram_available = False
+
+
+def phone_digits(value: str) -> str:
+    """Digits only, so '+7 (999) 111-11-11' and '79991111111' compare equal"""
+    return re.sub(r"\D", "", value)
+
+
+async def detect_trigram(conn: AsyncConnection) -> bool:
+    """Check once at startup whether similarity() ranking can be used"""
+    global _trigram_available
+    if conn.dialect.name != "postgresql":
+        _trigram_available = False
+    else:
+        result = await conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        _trigram_available = result.scalar() is not None
+    return _trigram_available
+
+
+def search_dialect(db: AsyncSession) -> str:
+    """'trigram' with pg_trgm installed, 'postgresql' without it, otherwise the fallback"""
+    if db.bind.dialect.name != "postgresql":
+        return "fallback"
+    return "trigram" if _trigram_available else "postgresql"
+
+
+def _phone_digits_sql(column, dialect: str):
+    if dialect != "fallback":
+        # Константы, а не параметры: выражение должно совпасть с индексом ix_clients_phone_digits_trgm
+        return func.regexp_replace(column, literal_column(r"'\D'"), literal_column("''"), literal_column("'g'"))
+    for char in " ()-+.":
+        column = func.replace(column, char, "")
+    return column
+
+
+def _similarity(column, term: str):
+    return func.similarity(func.coalesce(column, ""), term)
+
+
+def car_search(search: str, dialect: str) -> tuple[Any, Optional[Any]]:
+    """Filter and relevance expression for the cars search box.
+
+    A full VIN (17 VIN characters with a digit) is matched exactly; anything else,
+    including partial VINs from either end, is a substring match on vin/brand/model.
+    pg_trgm GIN indexes serve both. Relevance is None unless dialect is 'trigram'.
+    """
+    term = search.strip()
+    vin = term.upper()
+    if VIN_PATTERN.match(vin) and any(char.isdigit() for char in vin):
+        # ILIKE без % - точное совпадение без учёта регистра, его тоже обслуживает trigram-индекс
+        return Car.vin.ilike(term), None
+
+    condition = or_(
+        Car.vin.ilike(f"%{term}%"),
+        Car.brand.ilike(f"%{term}%"),
+        Car.model.ilike(f"%{term}%")
+    )
+    if dialect != "trigram":
+        return condition, None
+    rank = func.greatest(
+        _similarity(Car.vin, term),
+        _similarity(Car.brand, term),
+        _similarity(Car.model, term)
+    )
+    return condition, rank
+
+
+def client_search(search: str, dialect: str) -> tuple[Any, Optional[Any]]:
+    """Filter and relevance expression for the clients search box.
+
+    Phone numbers are matched on digits only, so any formatting of the stored or the
+    searched number works.
+    """
+    term = search.strip()
+    conditions = [
+        Client.full_name.ilike(f"%{term}%"),
+        Client.email.ilike(f"%{term}%")
+    ]
+    digits = phone_digits(term)
+    phone_match = None
+    if len(digits) >= MIN_PHONE_DIGITS:
+        phone_match = _phone_digits_sql(Client.phone, dialect).like(f"%{digits}%")
+        conditions.append(phone_match)
+    else:
+        conditions.append(Client.phone.ilike(f"%{term}%"))
+
+    condition = or_(*conditions)
+    if dialect != "trigram":
+        return condition, None
+    rank_parts = [
+        _similarity(Client.full_name, term),
+        _similarity(Client.email, term)
+    ]
+    if phone_match is not None:
+        rank_parts.append(case((phone_match, 1.0), else_=0.0))
+    return condition, func.greatest(*rank_parts)
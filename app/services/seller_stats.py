@@ -0,0 +1,44 @@
+from typing import Optional
+from sqlalchemy import Select, select, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.seller import Seller
+from app.models.sale import Sale
+from app.schemas.seller import SellerResponse
+
+
+def with_seller_stats(query: Select) -> Select:
+    """Attach sales count and revenue to every seller row of a select(Seller) query"""
+    stats = select(
+        func.count(Sale.id).label('sales_count'),
+        func.coalesce(func.sum(Sale.sale_price), 0).label('total_revenue')
+    ).where(Sale.seller_id == Seller.id).lateral('stats')
+    return query.add_columns(stats.c.sales_count, stats.c.total_revenue).join(stats, true())
+
+
+def seller_response(seller: Seller, sales_count: int, total_revenue: float) -> SellerResponse:
+    return SellerResponse(
+        id=seller.id,
+        full_name=seller.full_name,
+        phone=seller.phone,
+        is_active=seller.is_active,
+        sales_count=sales_count,
+        total_revenue=float(total_revenue),
+        created_at=seller.created_at,
+        updated_at=seller.updated_at
+    )
+
+
+def seller_version(seller_id: int) -> Select:
+    """What a seller response depends on: its row and its (append-only) sales"""
+    return select(
+        Seller.updated_at,
+        select(func.count(Sale.id)).where(Sale.seller_id == seller_id).scalar_subquery()
+    ).where(Seller.id == seller_id)
+
+
+async def get_seller_with_stats(db: AsyncSession, seller_id: int) -> Optional[SellerResponse]:
+    result = await db.execute(with_seller_stats(select(Seller).where(Seller.id == seller_id)))
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return seller_response(*row)
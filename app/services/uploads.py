@@ -0,0 +1,147 @@
+import asyncio
+import csv
+import io
+import json
+import time
+from itertools import islice
+from typing import AsyncIterator, BinaryIO, Iterator, Optional
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from app.schemas.imports import ImportReport, ImportRowError
+
+MAX_REPORTED_ERRORS = 1000
+# Столько строк разбирается в потоке за один раз
+PARSE_BATCH_SIZE = 1000
+
+UPLOAD_FORMATS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    "text/csv": "csv",
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+}
+
+
+def file_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    filename = (filename or "").lower()
+    for suffix, fmt in UPLOAD_FORMATS.items():
+        if suffix.startswith(".") and filename.endswith(suffix):
+            return fmt
+    content_type = (content_type or "").split(";")[0].strip()
+    if content_type in UPLOAD_FORMATS:
+        return UPLOAD_FORMATS[content_type]
+    raise HTTPException(status_code=400, detail="Unsupported file format, expected CSV, JSON or NDJSON")
+
+
+def _clean(row: dict) -> dict:
+    # Пустые ячейки CSV считаем отсутствующими, чтобы сработали значения по умолчанию
+    return {
+        key.strip(): value.strip() if isinstance(value, str) else value
+        for key, value in row.items()
+        if key and value not in ("", None)
+    }
+
+
+def iter_upload_rows(upload: UploadFile) -> Iterator[tuple[int, object]]:
+    fmt = file_format(upload.filename, upload.content_type)
+    upload.file.seek(0)
+    yield from iter_file_rows(upload.file, fmt)
+
+
+async def parse_in_thread(
+    rows: Iterator[tuple[int, object]],
+    batch_size: int = PARSE_BATCH_SIZE
+) -> AsyncIterator[tuple[int, object]]:
+    """Drive a row iterator in a worker thread, one batch at a time.
+
+    Uploads past 1 MB are spooled to disk and a JSON array is parsed whole, so
+    reading them on the event loop would stall every other request.
+    """
+    while batch := await asyncio.to_thread(list, islice(rows, batch_size)):
+        for row in batch:
+            yield row
+
+
+def iter_file_rows(binary: BinaryIO, fmt: str) -> Iterator[tuple[int, object]]:
+    """Yield (row number, raw row) pairs from a CSV, JSON or NDJSON file.
+
+    CSV and NDJSON are read line by line from the file. A JSON array
+    has to be parsed whole, so large imports should use one of the other two.
+    Rows that cannot be parsed are yielded as exceptions so the caller can
+    report them next to validation errors.
+    """
+    stream = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for number, row in enumerate(csv.DictReader(stream), start=1):
+                yield number, _clean(row)
+        elif fmt == "ndjson":
+            number = 0
+            for line in stream:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    yield number, exc
+                    continue
+                yield number, _clean(row) if isinstance(row, dict) else ValueError("Row must be an object")
+        else:
+            try:
+                rows = json.load(stream)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid JSON")
+            if not isinstance(rows, list):
+                raise HTTPException(status_code=400, detail="JSON upload must be an array of objects")
+            for number, row in enumerate(rows, start=1):
+                yield number, _clean(row) if isinstance(row, dict) else ValueError("Row must be an object")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Upload must be UTF-8 encoded")
+    finally:
+        stream.detach()
+
+
+def error_messages(exc: Exception) -> list[str]:
+    if isinstance(exc, ValidationError):
+        return [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in exc.errors()
+        ]
+    return [str(exc)]
+
+
+class ImportTracker:
+    """Counts rows and collects per-row errors for an ImportReport"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.received = 0
+        self.created = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: list[ImportRowError] = []
+
+    def fail(self, row: int, key: object, errors: list[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            # В JSON ключ строки может прийти числом ("phone": 79991112233)
+            key = None if key is None else str(key)
+            self.errors.append(ImportRowError(row=row, key=key, errors=errors))
+
+    def report(self) -> ImportReport:
+        elapsed = time.perf_counter() - self.started
+        return ImportReport(
+            received=self.received,
+            created=self.created,
+            updated=self.updated,
+            duplicates=self.duplicates,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(self.received / elapsed, 1) if elapsed else 0.0
+        )
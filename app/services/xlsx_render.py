@@ -0,0 +1,37 @@
+import xlsxwriter
+
+# Форматы колонок; ячейки без своего формата берут формат колонки
+COLUMN_FORMATS = {
+    "text": None,
+    "int": "#,##0",
+    "money": "#,##0.00",
+    "date": "yyyy-mm-dd",
+}
+COLUMN_WIDTHS = {"text": 32, "int": 12, "money": 18, "date": 12}
+
+
+def render_xlsx(path: str, title: str, columns: list[tuple[str, str]], rows: list[tuple]) -> int:
+    """Write one sheet to path, returns the number of data rows.
+
+    Runs in a worker process, so it only needs xlsxwriter and picklable
+    arguments. constant_memory flushes every row to disk as soon as the next
+    one starts, so memory stays flat however many rows there are; rows must
+    therefore be written strictly top to bottom.
+    """
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"})
+    try:
+        sheet = workbook.add_worksheet(title[:31])
+        header = workbook.add_format({"bold": True, "bottom": 1})
+        for index, (name, kind) in enumerate(columns):
+            num_format = COLUMN_FORMATS[kind]
+            column_format = workbook.add_format({"num_format": num_format}) if num_format else None
+            sheet.set_column(index, index, COLUMN_WIDTHS[kind], column_format)
+        sheet.write_row(0, 0, [name for name, _ in columns], header)
+        sheet.freeze_panes(1, 0)
+
+        for index, row in enumerate(rows, start=1):
+            sheet.write_row(index, 0, row)
+        sheet.autofilter(0, 0, max(len(rows), 1), len(columns) - 1)
+    finally:
+        workbook.close()
+    return len(rows)
@@ -0,0 +1,375 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Optional
+import httpx
+from sqlalchemy import func, select
+from app.auth.security import create_access_token, get_password_hash
+from app.config import settings
+from app.database import async_session_maker
+from app.main import app
+from app.models import User, Car, Client, Seller, Sale
+from app.models.car import CarStatus
+from app.models.user import UserRole
+from app.query_budget import QUERY_COUNT_HEADER
+from app.services.dates import business_today
+from app.services.report_cache import report_cache
+
+BENCHMARK_USER = "benchmark"
+RESULTS_DIR = Path("benchmarks")
+# Шаг, с которым пробник проверяет, не заблокирован ли event loop
+LOOP_LAG_INTERVAL = 0.005
+
+
+@dataclass
+class Scenario:
+    router: str
+    name: str
+    method: str
+    path: Callable[["Fixtures"], str]
+    body: Optional[Callable[["Fixtures"], dict]] = None
+    requests: Optional[int] = None
+
+
+class Fixtures:
+    """Ids sampled from the database, so requests hit real, varied rows"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.car_ids = []
+        self.available_car_ids = []
+        self.client_ids = []
+        self.seller_ids = []
+        self.active_seller_ids = []
+        self.sale_ids = []
+        self.brands = []
+        self.password = ""
+
+    async def load(self, sample: int) -> dict:
+        async with async_session_maker() as db:
+            async def ids(column, *where):
+                result = await db.execute(
+                    select(column).where(*where).order_by(func.random()).limit(sample)
+                )
+                return list(result.scalars())
+
+            self.car_ids = await ids(Car.id)
+            self.available_car_ids = await ids(Car.id, Car.status == CarStatus.AVAILABLE)
+            self.client_ids = await ids(Client.id)
+            self.seller_ids = await ids(Seller.id)
+            self.active_seller_ids = await ids(Seller.id, Seller.is_active.is_(True))
+            self.sale_ids = await ids(Sale.id)
+            self.brands = list((await db.execute(select(Car.brand).distinct())).scalars())
+
+            counts = {}
+            for name, model in (("cars", Car), ("clients", Client), ("sellers", Seller), ("sales", Sale)):
+                counts[name] = (await db.execute(select(func.count()).select_from(model))).scalar()
+        if not all((self.car_ids, self.client_ids, self.seller_ids, self.sale_ids)):
+            raise SystemExit("The database is empty, fill it with generate_data.py first")
+        return counts
+
+    def pick(self, ids: list):
+        return self.rng.choice(ids)
+
+    def take_available_car(self) -> int:
+        if not self.available_car_ids:
+            raise SystemExit("Ran out of available cars for the write scenarios")
+        return self.available_car_ids.pop()
+
+
+def days_ago(days: int) -> str:
+    return (business_today() - timedelta(days=days)).isoformat()
+
+
+READ_SCENARIOS = [
+    Scenario("auth", "me", "GET", lambda f: "/auth/me"),
+    Scenario("auth", "login", "POST", lambda f: "/auth/login",
+             lambda f: {"username": BENCHMARK_USER, "password": f.password}, requests=50),
+    Scenario("cars", "list", "GET", lambda f: "/cars"),
+    Scenario("cars", "list available, no total", "GET", lambda f: "/cars?status=AVAILABLE&include_total=false"),
+    Scenario("cars", "search", "GET", lambda f: f"/cars?search={f.pick(f.brands)}"),
+    Scenario("cars", "get", "GET", lambda f: f"/cars/{f.pick(f.car_ids)}"),
+    Scenario("clients", "list", "GET", lambda f: "/clients"),
+    Scenario("clients", "search", "GET", lambda f: "/clients?search=Иванов"),
+    Scenario("clients", "get", "GET", lambda f: f"/clients/{f.pick(f.client_ids)}"),
+    Scenario("sellers", "list", "GET", lambda f: "/sellers"),
+    Scenario("sellers", "get", "GET", lambda f: f"/sellers/{f.pick(f.seller_ids)}"),
+    Scenario("sales", "list", "GET", lambda f: "/sales"),
+    Scenario("sales", "list by seller", "GET", lambda f: f"/sales?seller_id={f.pick(f.seller_ids)}"),
+    Scenario("sales", "get", "GET", lambda f: f"/sales/{f.pick(f.sale_ids)}"),
+    Scenario("sales", "export week", "GET", lambda f: f"/sales/export?date_from={days_ago(7)}", requests=50),
+    Scenario("reports", "dashboard", "GET", lambda f: "/reports/dashboard"),
+    Scenario("reports", "sales by date", "GET", lambda f: f"/reports/sales-by-date?date_from={days_ago(30)}&date_to={days_ago(0)}"),
+    Scenario("reports", "sales by seller", "GET", lambda f: f"/reports/sales-by-seller?date_from={days_ago(90)}"),
+    Scenario("reports", "sales by car", "GET", lambda f: f"/reports/sales-by-car?date_from={days_ago(90)}"),
+    Scenario("reports", "timeseries 5y by month", "GET",
+             lambda f: f"/reports/sales-timeseries?date_from={days_ago(1825)}&date_to={days_ago(0)}&bucket=month"),
+    Scenario("reports", "timeseries 5y by week, brands", "GET",
+             lambda f: f"/reports/sales-timeseries?date_from={days_ago(1825)}&date_to={days_ago(0)}&bucket=week&split_by=brand"),
+    Scenario("reports", "timeseries 1y by day, sellers", "GET",
+             lambda f: f"/reports/sales-timeseries?date_from={days_ago(365)}&date_to={days_ago(0)}&split_by=seller"),
+    Scenario("reports", "timeseries week by hour", "GET",
+             lambda f: f"/reports/sales-timeseries?date_from={days_ago(6)}&date_to={days_ago(0)}&bucket=hour"),
+    Scenario("reports", "pivot brand x seller, 1y", "GET",
+             lambda f: f"/reports/pivot?dimensions=brand,seller&measures=count,sum,avg&date_from={days_ago(365)}"),
+    Scenario("reports", "pivot model x year x color, 1y", "GET",
+             lambda f: f"/reports/pivot?dimensions=model,year,color&measures=count,min,max&date_from={days_ago(365)}"),
+    Scenario("reports", "pivot brand x quarter cube", "GET",
+             lambda f: "/reports/pivot?dimensions=brand,period&period=quarter&subtotals=cube"),
+]
+
+WRITE_SCENARIOS = [
+    Scenario("cars", "reserve", "POST", lambda f: f"/cars/{f.take_available_car()}/reserve",
+             lambda f: {"client_id": f.pick(f.client_ids), "hours": 1}),
+    Scenario("sales", "create", "POST", lambda f: "/sales", lambda f: {
+        "car_id": f.take_available_car(),
+        "client_id": f.pick(f.client_ids),
+        "seller_id": f.pick(f.active_seller_ids),
+        "sale_price": float(f.rng.randrange(1_000, 5_000) * 1000),
+    }),
+]
+
+
+async def ensure_user(password: str) -> str:
+    """Director account used by the benchmark, returns an access token for it"""
+    async with async_session_maker() as db:
+        user = (await db.execute(select(User).where(User.username == BENCHMARK_USER))).scalar_one_or_none()
+        if user is None:
+            user = User(username=BENCHMARK_USER, full_name="Benchmark", role=UserRole.DIRECTOR, is_active=True)
+            db.add(user)
+        user.hashed_password = get_password_hash(password)
+        await db.commit()
+    return create_access_token(data={"sub": BENCHMARK_USER, "role": UserRole.DIRECTOR.value})
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def sample_loop_lag(stop: asyncio.Event, lags: list) -> None:
+    """Record how late the event loop wakes a short sleep; blocking calls on the loop show up here"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL))
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    fixtures: Fixtures,
+    requests: int,
+    concurrency: int,
+    warmup: int
+) -> dict:
+    prefix = settings.API_V1_PREFIX
+    latencies = []
+    query_counts = []
+    statuses = {}
+
+    async def send():
+        body = scenario.body(fixtures) if scenario.body else None
+        start = time.perf_counter()
+        response = await client.request(scenario.method, prefix + scenario.path(fixtures), json=body)
+        elapsed = time.perf_counter() - start
+        return response, elapsed
+
+    for _ in range(warmup):
+        await send()
+
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response, elapsed = await send()
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if QUERY_COUNT_HEADER in response.headers:
+                query_counts.append(int(response.headers[QUERY_COUNT_HEADER]))
+
+    lags = []
+    lag_stop = asyncio.Event()
+    lag_sampler = asyncio.create_task(sample_loop_lag(lag_stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    lag_stop.set()
+    await lag_sampler
+
+    latencies.sort()
+    lags.sort()
+    result = {
+        "router": scenario.router,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "loop_lag_p99_ms": round(percentile(lags, 0.99) * 1000, 3),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 3) if lags else 0.0,
+    }
+    if query_counts:
+        result["queries_per_request"] = round(sum(query_counts) / len(query_counts), 2)
+    return result
+
+
+RENDER_LOAD_PATHS = (
+    lambda: f"/reports/sales-by-date?date_from={days_ago(1825)}&date_to={days_ago(0)}&format=xlsx",
+    lambda: "/reports/sales-by-car?format=xlsx",
+    lambda: "/reports/sales-by-seller?format=xlsx",
+)
+
+
+async def render_load(client: httpx.AsyncClient, index: int, stop: asyncio.Event, latencies: list, statuses: dict):
+    """Download spreadsheets back to back until stop is set, one render in flight per task"""
+    path = settings.API_V1_PREFIX + RENDER_LOAD_PATHS[index % len(RENDER_LOAD_PATHS)]()
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: dict, baseline_path: Path):
+    baseline = json.loads(baseline_path.read_text())["results"]
+    print(f"\nCompared with {baseline_path} (p50 / p95, ms):")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        changes = [
+            f"{old[key]:.2f} → {result[key]:.2f} ({(result[key] - old[key]) / old[key] * 100:+.0f}%)"
+            if old[key] else f"{old[key]:.2f} → {result[key]:.2f}"
+            for key in ("p50_ms", "p95_ms")
+        ]
+        print(f"  {name:<38} {changes[0]:<28} {changes[1]}")
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    fixtures = Fixtures(rng)
+    dataset = await fixtures.load(args.sample)
+    fixtures.password = f"benchmark-{rng.random()}"
+    token = await ensure_user(fixtures.password)
+
+    if not args.report_cache:
+        # Без кэша отчёты каждый раз идут в базу, иначе меряем только кэш
+        report_cache.ttl_seconds = 0
+
+    scenarios = READ_SCENARIOS + (WRITE_SCENARIOS if args.writes else [])
+    if args.router:
+        scenarios = [scenario for scenario in scenarios if scenario.router in args.router]
+
+    results = {}
+    render_stop = asyncio.Event()
+    render_latencies, render_statuses = [], {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        client.headers["Authorization"] = f"Bearer {token}"
+        # Фоновая нагрузка: xlsx рендерятся всё время, пока меряются сценарии
+        render_tasks = [
+            asyncio.create_task(render_load(client, index, render_stop, render_latencies, render_statuses))
+            for index in range(args.render_load)
+        ]
+        for scenario in scenarios:
+            name = f"{scenario.router}: {scenario.name}"
+            requests = min(args.requests, scenario.requests or args.requests)
+            result = await run_scenario(client, scenario, fixtures, requests, args.concurrency, args.warmup)
+            results[name] = result
+            print(
+                f"  {name:<38} p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+                f"p99 {result['p99_ms']:>8.2f} ms  {result['throughput_rps']:>8.1f} req/s  "
+                f"loop lag p99 {result['loop_lag_p99_ms']:>7.2f} ms"
+                + (f"  {result['errors']} errors" if result["errors"] else "")
+            )
+        render_stop.set()
+        await asyncio.gather(*render_tasks)
+
+    if render_latencies:
+        render_latencies.sort()
+        results["render load: xlsx"] = {
+            "router": "reports",
+            "requests": len(render_latencies),
+            "concurrency": args.render_load,
+            "statuses": {str(code): count for code, count in sorted(render_statuses.items())},
+            "p50_ms": round(percentile(render_latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(render_latencies, 0.95) * 1000, 3),
+            "max_ms": round(render_latencies[-1] * 1000, 3),
+        }
+        print(
+            f"\n  {args.render_load} concurrent xlsx downloads: {len(render_latencies)} done, "
+            f"p50 {results['render load: xlsx']['p50_ms']:.2f} ms, statuses {render_statuses}"
+        )
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "report_cache": args.report_cache,
+            "writes": args.writes,
+            "render_load": args.render_load,
+            "db_pool_size": settings.DB_POOL_SIZE,
+            "replica": bool(settings.DATABASE_READ_URL),
+        },
+        "dataset": dataset,
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\n✅ Results written to {output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure p50/p95/p99 latency and throughput of every router, in-process"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--router", action="append", help="only these routers (repeatable)")
+    parser.add_argument("--writes", action="store_true", help="also reserve cars and create sales")
+    parser.add_argument("--report-cache", action="store_true", help="keep the report cache on")
+    parser.add_argument(
+        "--render-load", type=int, default=0,
+        help="keep this many xlsx report downloads running while the scenarios are measured"
+    )
+    parser.add_argument("--sample", type=int, default=1000, help="ids sampled per table")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help=f"JSON results path, default {RESULTS_DIR}/<time>-<commit>.json")
+    parser.add_argument("--compare", type=Path, help="earlier results JSON to compare with")
+    args = parser.parse_args()
+    asyncio.run(run(args))
@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from zoneinfo import ZoneInfo
+from sqlalchemy import text
+from app.config import settings
+from app.database import async_session_maker, engine, Base
+from app.models import *
+from app.models.car import CarStatus
+from app.services.dates import business_today
+from app.models.normalize import normalize_email, normalize_phone
+from app.services.leaderboard import refresh_leaderboard
+from app.services.rollup import rebuild_rollup
+
+# Марки с весом популярности, моделями и диапазоном цен
+BRANDS = [
+    ("Lada", 18, "XTA", ["Vesta", "Granta", "Niva Travel", "Largus"], (900_000, 1_900_000)),
+    ("Kia", 14, "XWE", ["Rio", "Sportage", "Ceed", "Seltos"], (1_600_000, 3_400_000)),
+    ("Hyundai", 13, "KNA", ["Solaris", "Creta", "Tucson", "Elantra"], (1_500_000, 3_500_000)),
+    ("Toyota", 12, "JTD", ["Camry", "RAV4", "Corolla", "Land Cruiser"], (2_500_000, 9_000_000)),
+    ("Volkswagen", 9, "WVW", ["Polo", "Tiguan", "Passat", "Touareg"], (1_700_000, 6_500_000)),
+    ("Skoda", 8, "TMB", ["Octavia", "Rapid", "Kodiaq", "Karoq"], (1_800_000, 4_200_000)),
+    ("Chery", 8, "LVV", ["Tiggo 4", "Tiggo 7 Pro", "Tiggo 8 Pro", "Arrizo 8"], (1_900_000, 3_600_000)),
+    ("Haval", 7, "XZG", ["Jolion", "F7", "Dargo", "H9"], (2_000_000, 4_300_000)),
+    ("BMW", 4, "WBA", ["320i", "520d", "X3", "X5"], (4_000_000, 11_000_000)),
+    ("Mercedes-Benz", 4, "WDD", ["C200", "E200", "GLC", "GLE"], (4_200_000, 12_000_000)),
+    ("Audi", 3, "WAU", ["A4", "A6", "Q5", "Q7"], (3_800_000, 9_500_000)),
+]
+COLORS = ["Белый", "Чёрный", "Серый", "Серебристый", "Синий", "Красный", "Зелёный", "Коричневый"]
+COLOR_WEIGHTS = [26, 22, 18, 14, 8, 6, 3, 3]
+
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Волков", "Соколов",
+              "Лебедев", "Козлов", "Новиков", "Морозов", "Егоров", "Павлов", "Фёдоров", "Орлов"]
+FIRST_NAMES = (
+    ["Иван", "Пётр", "Алексей", "Дмитрий", "Сергей", "Андрей", "Николай", "Михаил"],
+    ["Анна", "Елена", "Мария", "Ольга", "Светлана", "Татьяна", "Наталья", "Ирина"],
+)
+PATRONYMIC_STEMS = ["Иванов", "Петров", "Алексеев", "Дмитриев", "Сергеев", "Андреев", "Николаев", "Михайлов"]
+
+# Сезонность продаж: по месяцам, по дням недели (пн=0) и по часам работы салона
+MONTH_WEIGHTS = [0.7, 0.8, 1.1, 1.1, 1.0, 0.95, 0.9, 0.95, 1.05, 1.1, 1.15, 1.5]
+WEEKDAY_WEIGHTS = [0.8, 0.85, 0.9, 0.95, 1.1, 1.6, 1.3]
+HOURS = list(range(9, 21))
+HOUR_WEIGHTS = [2, 4, 6, 7, 6, 6, 7, 8, 8, 7, 5, 3]
+
+CAR_COLUMNS = ["id", "vin", "brand", "model", "year", "color", "price", "status",
+               "reserved_until", "reserved_for_id", "created_at", "updated_at"]
+CLIENT_COLUMNS = ["id", "full_name", "phone", "email", "phone_normalized", "email_normalized",
+                  "document_id", "created_at", "updated_at"]
+SELLER_COLUMNS = ["id", "full_name", "phone", "is_active", "created_at", "updated_at"]
+SALE_COLUMNS = ["id", "car_id", "client_id", "seller_id", "sale_price", "sale_date"]
+TABLES = ["sales", "cars", "clients", "sellers"]
+
+
+class Generator:
+    """Deterministic (per --seed) rows with realistic skew.
+
+    Sales grow over the period and follow month, weekday and hour seasonality;
+    sellers and brands are Pareto-like, a small share of clients buy repeatedly.
+    Every sale gets its own sold car, so --cars is the stock left on the lot.
+    """
+
+    def __init__(self, args, offsets: dict):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.tz = ZoneInfo(settings.BUSINESS_TIMEZONE)
+        self.today = date.today()
+        self.start = self.today - timedelta(days=args.days - 1)
+        self.offsets = offsets
+        self.next_car_id = offsets["cars"] + 1
+        # Накопленные веса: random.choices не пересчитывает их на каждой строке
+        self.brand_weights = list(accumulate(brand[1] for brand in BRANDS))
+        self.color_weights = list(accumulate(COLOR_WEIGHTS))
+        self.hour_weights = list(accumulate(HOUR_WEIGHTS))
+        self.seller_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(args.sellers)))
+        self.seller_ids = range(offsets["sellers"] + 1, offsets["sellers"] + args.sellers + 1)
+        self.repeat_clients = max(1, args.clients // 20)
+
+    def local_datetime(self, day: date, hour: int = None) -> datetime:
+        hour = hour if hour is not None else self.rng.choices(HOURS, cum_weights=self.hour_weights)[0]
+        local = datetime(day.year, day.month, day.day, hour, self.rng.randrange(60), self.rng.randrange(60))
+        return local.replace(tzinfo=self.tz)
+
+    def random_day(self) -> date:
+        return self.start + timedelta(days=self.rng.randrange(self.args.days))
+
+    def day_weight(self, day: date) -> float:
+        progress = (day - self.start).days / max(1, self.args.days - 1)
+        weight = (1 + self.args.growth * progress) * MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()]
+        if (day + timedelta(days=3)).month != day.month:
+            # Конец месяца: менеджеры добивают план
+            weight *= 1.4
+        return weight
+
+    def daily_sales(self):
+        """Yield (day, count) chronologically, counts summing to --sales"""
+        days = [self.start + timedelta(days=n) for n in range(self.args.days)]
+        weights = [self.day_weight(day) for day in days]
+        scale = self.args.sales / sum(weights)
+        remaining = self.args.sales
+        carry = 0.0
+        for index, (day, weight) in enumerate(zip(days, weights)):
+            expected = weight * scale * self.rng.uniform(0.85, 1.15) + carry
+            count = remaining if index == len(days) - 1 else min(remaining, int(expected))
+            carry = expected - count
+            remaining -= count
+            yield day, count
+
+    def sellers(self):
+        for n in range(self.args.sellers):
+            seller_id = self.offsets["sellers"] + n + 1
+            created = self.local_datetime(self.random_day())
+            yield (
+                seller_id,
+                self.full_name(),
+                f"+7 (900) {seller_id // 10000 % 1000:03d}-{seller_id // 100 % 100:02d}-{seller_id % 100:02d}",
+                self.rng.random() > 0.1,
+                created,
+                created,
+            )
+
+    def clients(self):
+        for n in range(self.args.clients):
+            client_id = self.offsets["clients"] + n + 1
+            phone = f"+7 (9{client_id // 10_000_000 % 100:02d}) {client_id // 10000 % 1000:03d}-{client_id // 100 % 100:02d}-{client_id % 100:02d}"
+            email = f"client{client_id}@example.com" if self.rng.random() < 0.7 else None
+            created = self.local_datetime(self.random_day())
+            yield (
+                client_id,
+                self.full_name(),
+                phone,
+                email,
+                normalize_phone(phone),
+                normalize_email(email),
+                f"{self.rng.randrange(4500, 4599)} {self.rng.randrange(1_000_000):06d}",
+                created,
+                created,
+            )
+
+    def full_name(self) -> str:
+        female = self.rng.random() < 0.4
+        last = self.rng.choice(LAST_NAMES) + ("а" if female else "")
+        middle = self.rng.choice(PATRONYMIC_STEMS) + ("на" if female else "ич")
+        return f"{last} {self.rng.choice(FIRST_NAMES[female])} {middle}"
+
+    def car(self, created: datetime, status: CarStatus, reserved_until: datetime = None,
+            reserved_for: int = None, updated: datetime = None):
+        car_id = self.next_car_id
+        self.next_car_id += 1
+        brand, _, wmi, models, (low, high) = self.rng.choices(BRANDS, cum_weights=self.brand_weights)[0]
+        return (
+            car_id,
+            f"{wmi}{car_id:014d}",
+            brand,
+            self.rng.choice(models),
+            self.rng.choices(range(self.today.year - 4, self.today.year + 1), [1, 2, 4, 8, 10])[0],
+            self.rng.choices(COLORS, cum_weights=self.color_weights)[0],
+            float(round(self.rng.uniform(low, high), -4)),
+            status.value,
+            reserved_until,
+            reserved_for,
+            created,
+            updated or created,
+        )
+
+    def sales(self):
+        """Yield (sold car, sale) pairs in sale_date order"""
+        sale_id = self.offsets["sales"]
+        for day, count in self.daily_sales():
+            hours = sorted(self.rng.choices(HOURS, cum_weights=self.hour_weights, k=count))
+            for hour in hours:
+                sale_id += 1
+                sale_date = self.local_datetime(day, hour)
+                car = self.car(sale_date - timedelta(days=self.rng.randint(3, 120)), CarStatus.SOLD, updated=sale_date)
+                if self.rng.random() < 0.25:
+                    client = self.rng.randrange(self.repeat_clients)
+                else:
+                    client = self.rng.randrange(self.args.clients)
+                sale = (
+                    sale_id,
+                    car[0],
+                    self.offsets["clients"] + client + 1,
+                    self.rng.choices(self.seller_ids, cum_weights=self.seller_weights)[0],
+                    float(round(car[6] * self.rng.uniform(0.9, 1.0), -3)),
+                    sale_date,
+                )
+                yield car, sale
+
+    def stock(self):
+        now = datetime.now(self.tz)
+        for _ in range(self.args.cars):
+            created = self.local_datetime(self.today - timedelta(days=self.rng.randrange(min(180, self.args.days))))
+            if self.rng.random() < 0.03:
+                yield self.car(
+                    created,
+                    CarStatus.RESERVED,
+                    now + timedelta(hours=self.rng.randint(1, settings.RESERVATION_DEFAULT_HOURS)),
+                    self.offsets["clients"] + self.rng.randrange(self.args.clients) + 1
+                )
+            else:
+                yield self.car(created, CarStatus.AVAILABLE)
+
+
+def batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def copy_rows(driver, table: str, columns: list, rows, batch_size: int) -> int:
+    total = 0
+    for batch in batches(rows, batch_size):
+        await driver.copy_records_to_table(table, records=batch, columns=columns)
+        total += len(batch)
+    return total
+
+
+async def copy_sales(driver, pairs, batch_size: int) -> int:
+    total = 0
+    for batch in batches(pairs, batch_size):
+        await driver.copy_records_to_table("cars", records=[car for car, _ in batch], columns=CAR_COLUMNS)
+        await driver.copy_records_to_table("sales", records=[sale for _, sale in batch], columns=SALE_COLUMNS)
+        total += len(batch)
+        if total % (batch_size * 10) == 0:
+            print(f"  {total} sales")
+    return total
+
+
+async def generate(args):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if args.truncate:
+            await conn.execute(text(f"TRUNCATE {', '.join(TABLES)}, sales_daily_rollup, seller_leaderboard RESTART IDENTITY CASCADE"))
+        offsets = {}
+        for table in TABLES:
+            offsets[table] = (await conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {table}"))).scalar()
+
+    generator = Generator(args, offsets)
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        # COPY идёт мимо SQLAlchemy, напрямую через соединение asyncpg
+        driver = (await conn.get_raw_connection()).driver_connection
+        async with driver.transaction():
+            step = time.perf_counter()
+            sellers = await copy_rows(driver, "sellers", SELLER_COLUMNS, generator.sellers(), args.batch_size)
+            print(f"✓ {sellers} sellers ({time.perf_counter() - step:.1f}s)")
+
+            step = time.perf_counter()
+            clients = await copy_rows(driver, "clients", CLIENT_COLUMNS, generator.clients(), args.batch_size)
+            print(f"✓ {clients} clients ({time.perf_counter() - step:.1f}s)")
+
+            step = time.perf_counter()
+            sales = await copy_sales(driver, generator.sales(), args.batch_size)
+            print(f"✓ {sales} sales with their cars ({time.perf_counter() - step:.1f}s)")
+
+            step = time.perf_counter()
+            stock = await copy_rows(driver, "cars", CAR_COLUMNS, generator.stock(), args.batch_size)
+            print(f"✓ {stock} cars in stock ({time.perf_counter() - step:.1f}s)")
+
+            for table in TABLES:
+                await driver.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+                )
+
+    step = time.perf_counter()
+    async with async_session_maker() as session:
+        buckets = await rebuild_rollup(session)
+        await session.commit()
+        await refresh_leaderboard(session, business_today())
+        await session.commit()
+    print(f"✓ Sales rollup and leaderboard rebuilt, {buckets} buckets ({time.perf_counter() - step:.1f}s)")
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"ANALYZE {', '.join(TABLES)}, sales_daily_rollup"))
+
+    elapsed = time.perf_counter() - started
+    rows = sellers + clients + sales * 2 + stock
+    print(f"\n✅ {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fill the database with synthetic sellers, clients, cars and sales via COPY"
+    )
+    parser.add_argument("--sales", type=int, default=100_000)
+    parser.add_argument("--cars", type=int, default=20_000, help="unsold cars; every sale adds its own sold car")
+    parser.add_argument("--clients", type=int, default=50_000)
+    parser.add_argument("--sellers", type=int, default=50)
+    parser.add_argument("--days", type=int, default=730, help="history length, ending today")
+    parser.add_argument("--growth", type=float, default=1.0, help="how much busier the last day is than the first")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--truncate", action="store_true", help="delete existing sellers, clients, cars and sales first")
+    args = parser.parse_args()
+    if args.sellers < 1 or args.clients < 1 or args.days < 1:
+        parser.error("--sellers, --clients and --days must be positive")
+    asyncio.run(generate(args))
@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+from pathlib import Path
+from fastapi import HTTPException
+from app.database import async_session_maker
+from app.schemas.imports import ImportReport
+from app.services.client_import import IMPORT_CHUNK_SIZE, import_clients
+from app.services.uploads import file_format, iter_file_rows, parse_in_thread
+
+
+def print_progress(report: ImportReport):
+    print(
+        f"  {report.received} rows: {report.created} created, {report.updated} updated, "
+        f"{report.duplicates} duplicates, {report.failed} failed "
+        f"({report.rows_per_second:.0f} rows/s)"
+    )
+
+
+async def run_import(path: Path, chunk_size: int):
+    fmt = file_format(path.name)
+    with path.open("rb") as binary:
+        async with async_session_maker() as session:
+            report = await import_clients(
+                session, parse_in_thread(iter_file_rows(binary, fmt)), chunk_size, on_progress=print_progress
+            )
+
+    print(f"\n✅ Import finished in {report.elapsed_seconds:.1f}s")
+    for error in report.errors:
+        print(f"   row {error.row} ({error.key}): {'; '.join(error.errors)}")
+    if report.errors_truncated:
+        print(f"   ... {report.failed - len(report.errors)} more errors")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import clients from CSV, JSON or NDJSON")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_import(args.path, args.chunk_size))
+    except HTTPException as exc:
+        raise SystemExit(exc.detail)
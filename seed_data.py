@@ -6,6 +6,7 @@ from app.models import User, Car, Client, Seller, Sale
 from app.models.user import UserRole
 from app.models.car import CarStatus
 from app.auth.security import get_password_hash
+from app.services.rollup import rebuild_rollup
 
 
 # Demo data
@@ -137,6 +138,9 @@ async def seed_database():
         
         print(f"✓ {sales_count} Sales created")
 
+        await rebuild_rollup(session)
+        print("✓ Sales rollup built")
+
         await session.commit()
         print("\n✅ Database seeded successfully!")
         print(f"   - {len(SELLERS_DATA)} sellers")
@@ -0,0 +1,44 @@
+from sqlalchemy import text
+from app.database import engine
+
+INSERT_CLIENT = text("INSERT INTO clients (full_name, phone) VALUES ('Орлова Анна', '+79990000005')")
+
+
+async def test_client_list_etag_changes_with_writes(client):
+    first = await client.get("/api/v1/clients")
+    etag = first.headers["etag"]
+
+    unchanged = await client.get("/api/v1/clients", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    created = await client.post("/api/v1/clients", json={"full_name": "Орлова Анна", "phone": "+79990000005"})
+    assert created.status_code == 201
+    changed = await client.get("/api/v1/clients", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(changed.json()["items"]) == 1
+
+
+async def test_uncommitted_write_keeps_the_old_tag(client):
+    etag = (await client.get("/api/v1/clients")).headers["etag"]
+
+    async with engine.connect() as writer:
+        await writer.execute(INSERT_CLIENT)
+        # Версия растёт при коммите: список до него не должен получить новый тег со старыми данными
+        during = await client.get("/api/v1/clients", headers={"If-None-Match": etag})
+        assert during.status_code == 304
+        await writer.commit()
+
+    after = await client.get("/api/v1/clients", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert len(after.json()["items"]) == 1
+
+
+async def test_writers_to_one_table_do_not_wait_for_each_other(database):
+    async with engine.connect() as first, engine.connect() as second:
+        await first.execute(INSERT_CLIENT)
+        await second.execute(text("SET LOCAL lock_timeout = '1s'"))
+        await second.execute(INSERT_CLIENT)
+        # Коммит второго не ждёт открытую транзакцию первого
+        await second.commit()
+        await first.commit()
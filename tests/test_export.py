@@ -0,0 +1,73 @@
+import asyncio
+import psutil
+import pytest
+from app.main import app
+
+pytestmark = pytest.mark.slow
+
+# Рост RSS процесса за время выгрузки всех продаж (около 200 МБ CSV на 1M строк)
+EXPORT_RSS_CEILING_MB = 64
+
+
+async def stream_get(path: str, headers: dict) -> tuple[int, int, int]:
+    """Status, line count and size of a GET, counted chunk by chunk as the app sends them.
+
+    Calls the app directly: httpx's ASGITransport buffers the whole body, a
+    real server does not.
+    """
+    request_sent = False
+    disconnected = asyncio.Event()
+    status = lines = size = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, lines, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            lines += body.count(b"\n")
+            size += len(body)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1), "root_path": "",
+        "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    await app(scope, receive, send)
+    disconnected.set()
+    return status, lines, size
+
+
+async def test_export_of_all_sales_keeps_memory_flat(client, seeded_sales):
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    peak = baseline
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, process.memory_info().rss)
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample())
+    try:
+        status, lines, size = await stream_get(
+            "/api/v1/sales/export", {"Authorization": client.headers["Authorization"], "Host": "test"}
+        )
+    finally:
+        sampler.cancel()
+
+    assert status == 200
+    # Заголовок и по строке на продажу
+    assert lines == seeded_sales + 1
+    growth_mb = (peak - baseline) / 1024 / 1024
+    assert growth_mb < EXPORT_RSS_CEILING_MB, f"RSS grew by {growth_mb:.0f} MB exporting {size} bytes"
@@ -0,0 +1,92 @@
+import json
+from sqlalchemy import select
+from app.database import async_session_maker
+from app.models import Car, Client
+from app.models.car import CarStatus
+
+CAR_CSV = """vin,brand,model,year,price,status
+XTA21099000000001,Lada,Vesta,2022,1450000,
+XTA21099000000002,Lada,Granta,2021,900000,RESERVED
+XTA21099000000001,Lada,Vesta,2022,1450000,
+XTA21099000000003,Lada,Niva,1800,1200000,
+XTA21099000000004,Lada,Largus,2020,not a price,
+"""
+
+
+def upload(name: str, content: str, content_type: str) -> dict:
+    return {"file": (name, content.encode(), content_type)}
+
+
+async def test_car_import_reports_duplicates_and_invalid_rows(client):
+    response = await client.post("/api/v1/cars/bulk", files=upload("cars.csv", CAR_CSV, "text/csv"))
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["received"], report["created"], report["failed"]) == (5, 2, 3)
+    errors = {error["row"]: error for error in report["errors"]}
+    assert errors[3]["key"] == "XTA21099000000001"
+    assert errors[3]["errors"] == ["Duplicate VIN in upload"]
+    assert errors[4]["errors"][0].startswith("year:")
+    assert errors[5]["errors"][0].startswith("price:")
+
+    async with async_session_maker() as db:
+        reserved = (await db.execute(select(Car).where(Car.status == CarStatus.RESERVED))).scalar_one()
+    assert reserved.reserved_until is not None
+
+
+async def test_car_import_skips_vins_already_in_the_database(client):
+    await client.post("/api/v1/cars/bulk", files=upload("cars.csv", CAR_CSV, "text/csv"))
+
+    response = await client.post("/api/v1/cars/bulk", files=upload("cars.csv", CAR_CSV, "text/csv"))
+
+    report = response.json()
+    assert report["created"] == 0
+    assert {error["errors"][0] for error in report["errors"] if error["row"] in (1, 2)} == {"VIN already exists"}
+
+
+async def test_numeric_json_keys_are_row_errors(client):
+    cars = [{"vin": 12345678901234567, "brand": "Lada", "model": "Vesta", "year": 2022, "price": 1450000}]
+    clients = [
+        {"full_name": "Орлова Анна", "phone": 79991112233},
+        {"full_name": "Орлов Иван", "phone": "+7 999 111-22-44"},
+    ]
+
+    car_response = await client.post(
+        "/api/v1/cars/bulk", files=upload("cars.json", json.dumps(cars), "application/json")
+    )
+    client_response = await client.post(
+        "/api/v1/clients/bulk", files=upload("clients.json", json.dumps(clients), "application/json")
+    )
+
+    assert car_response.status_code == 200
+    assert car_response.json()["errors"][0]["key"] == "12345678901234567"
+    assert client_response.status_code == 200
+    report = client_response.json()
+    assert (report["created"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["key"] == "79991112233"
+
+
+async def test_client_import_counts_repeated_phones_as_duplicates(client):
+    rows = [
+        {"full_name": "Орлова Анна", "phone": "+7 (999) 111-22-33"},
+        {"full_name": "Анна Орлова", "phone": "8 999 111 22 33"},
+        {"full_name": "Орлов Иван", "phone": "+79991112244", "email": "ivan@example.com"},
+    ]
+    ndjson = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\nnot json\n"
+
+    response = await client.post(
+        "/api/v1/clients/bulk", files=upload("clients.ndjson", ndjson, "application/x-ndjson")
+    )
+
+    report = response.json()
+    assert (report["received"], report["created"], report["duplicates"], report["failed"]) == (4, 2, 1, 1)
+    assert report["errors"][0]["row"] == 4
+    async with async_session_maker() as db:
+        names = (await db.execute(select(Client.full_name).order_by(Client.id))).scalars().all()
+    assert names == ["Орлова Анна", "Орлов Иван"]
+
+
+async def test_unsupported_upload_is_rejected(client):
+    response = await client.post("/api/v1/cars/bulk", files=upload("cars.xml", "<cars/>", "application/xml"))
+
+    assert response.status_code == 400
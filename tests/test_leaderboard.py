@@ -0,0 +1,45 @@
+import asyncio
+from sqlalchemy import func, select
+from app.config import settings
+from app.database import async_session_maker, engine
+from app.models import Seller
+from app.models.sales_rollup import SalesDailyRollup
+from app.models.seller_leaderboard import SellerLeaderboard
+from app.services.dates import business_today
+from app.services.leaderboard import LEADERBOARD_LOCK_ID, start_leaderboard_refresher, stop_leaderboard_refresher
+
+
+async def leaderboard_rows() -> int:
+    async with async_session_maker() as db:
+        return (await db.execute(select(func.count()).select_from(SellerLeaderboard))).scalar()
+
+
+async def test_refresh_skipped_by_the_lock_is_retried(database, monkeypatch):
+    async with async_session_maker() as db:
+        seller = Seller(full_name="Петров Пётр", phone="+79990000002", is_active=True)
+        db.add(seller)
+        await db.flush()
+        db.add(SalesDailyRollup(
+            day=business_today(), seller_id=seller.id, brand="Lada", model="Vesta",
+            sales_count=1, revenue=1_450_000, revenue_squares=1_450_000 ** 2
+        ))
+        await db.commit()
+    # Без повтора следующий пересчёт был бы только через интервал
+    monkeypatch.setattr(settings, "LEADERBOARD_REFRESH_SECONDS", 600)
+    monkeypatch.setattr(settings, "LEADERBOARD_REFRESH_DEBOUNCE_SECONDS", 0.05)
+
+    try:
+        async with engine.connect() as other_replica:
+            await other_replica.execute(select(func.pg_advisory_xact_lock(LEADERBOARD_LOCK_ID)))
+            start_leaderboard_refresher()
+            await asyncio.sleep(0.3)
+            assert await leaderboard_rows() == 0
+            await other_replica.rollback()
+
+        for _ in range(50):
+            if await leaderboard_rows():
+                break
+            await asyncio.sleep(0.05)
+        assert await leaderboard_rows() == 4
+    finally:
+        await stop_leaderboard_refresher()
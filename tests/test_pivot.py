@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+import pytest
+from app.database import async_session_maker
+from app.models import Car, Client, Sale, Seller
+from app.models.car import CarStatus
+from app.services.pivot import build_pivot_query, sales_pivot
+from app.services.rollup import rebuild_rollup
+
+# brand, model, color, seller, price, sale day
+SALES = [
+    ("Lada", "Vesta", "red", 0, 1_000_000, (2024, 1, 10)),
+    ("Lada", "Vesta", None, 0, 1_100_000, (2024, 1, 20)),
+    ("Lada", "Granta", "red", 1, 800_000, (2024, 2, 5)),
+    ("Kia", "Rio", None, 1, 1_500_000, (2024, 2, 15)),
+]
+
+
+@pytest.fixture
+async def pivot_sales(database) -> None:
+    """SALES with their daily rollup rebuilt, so both pivot paths see the same data"""
+    async with async_session_maker() as db:
+        sellers = [
+            Seller(full_name="Петров Пётр", phone="+79990000002", is_active=True),
+            Seller(full_name="Сидоров Олег", phone="+79990000003", is_active=True),
+        ]
+        buyer = Client(full_name="Иванов Иван", phone="+79990000001")
+        db.add_all([*sellers, buyer])
+        await db.flush()
+        for index, (brand, model, color, seller, price, day) in enumerate(SALES):
+            car = Car(
+                vin=f"XTA2109900000000{index}", brand=brand, model=model, year=2023, color=color,
+                price=price, status=CarStatus.SOLD
+            )
+            db.add(car)
+            await db.flush()
+            db.add(Sale(
+                car_id=car.id, client_id=buyer.id, seller_id=sellers[seller].id, sale_price=price,
+                sale_date=datetime(*day, 12, tzinfo=timezone.utc)
+            ))
+        await db.flush()
+        await rebuild_rollup(db)
+        await db.commit()
+
+
+async def pivot(dimensions: list[str], measures: list[str], subtotals: str = "rollup", **kwargs):
+    async with async_session_maker() as db:
+        return await sales_pivot(db, dimensions, measures, subtotals, **kwargs)
+
+
+def source_of(dimensions: list[str], measures: list[str]) -> str:
+    query = str(build_pivot_query(dimensions, measures, "rollup", "month", None, None, 10))
+    return "sales_daily_rollup" if "sales_daily_rollup" in query else "sales"
+
+
+async def test_rollup_and_sales_paths_agree(pivot_sales):
+    dimensions = ["seller", "brand", "period"]
+    # min есть только в продажах: тот же отчёт считается без дневного rollup
+    assert source_of(dimensions, ["count", "sum", "avg"]) == "sales_daily_rollup"
+    assert source_of(dimensions, ["count", "sum", "avg", "min"]) == "sales"
+
+    from_rollup = await pivot(dimensions, ["count", "sum", "avg"])
+    from_sales = await pivot(dimensions, ["count", "sum", "avg", "min"])
+
+    assert len(from_rollup.rows) == len(from_sales.rows) > 1
+    for rollup_row, sales_row in zip(from_rollup.rows, from_sales.rows):
+        assert rollup_row.values == sales_row.values
+        assert rollup_row.subtotal == sales_row.subtotal
+        assert rollup_row.measures == {key: sales_row.measures[key] for key in ("count", "sum", "avg")}
+
+
+async def test_null_color_is_not_the_color_subtotal(pivot_sales):
+    response = await pivot(["color"], ["count"])
+
+    rows = [(row.values["color"], row.subtotal, row.measures["count"]) for row in response.rows]
+    assert rows == [("red", [], 2), (None, [], 2), (None, ["color"], 4)]
+
+
+@pytest.mark.parametrize("subtotals", ["rollup", "cube"])
+async def test_grand_total_comes_last(pivot_sales, subtotals):
+    response = await pivot(["brand", "model"], ["count", "sum"], subtotals)
+
+    total = response.rows[-1]
+    assert total.subtotal == ["brand", "model"]
+    assert total.measures == {"count": len(SALES), "sum": sum(sale[4] for sale in SALES)}
+    assert all(len(row.subtotal) < 2 for row in response.rows[:-1])
+
+
+async def test_limit_flags_truncated(pivot_sales):
+    truncated = await pivot(["brand"], ["count"], limit=2)
+    complete = await pivot(["brand"], ["count"], limit=3)
+
+    assert truncated.truncated is True
+    assert len(truncated.rows) == 2
+    assert complete.truncated is False
+    assert len(complete.rows) == 3
@@ -0,0 +1,127 @@
+import time
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import app.database as database_module
+from app.config import settings
+from app.database import (
+    READ_CONSISTENCY_HEADER, READ_PRIMARY_COOKIE, Base, ReadYourWritesMiddleware, engine, engine_options, get_db
+)
+from app.models import Client
+
+
+def database_url(name: str) -> str:
+    return make_url(settings.database_url_async).set(database=name).render_as_string(hide_password=False)
+
+
+@pytest.fixture(scope="session")
+async def replica_url(database) -> str:
+    """A second database with the app schema, standing in for DATABASE_READ_URL"""
+    name = f"{make_url(settings.database_url_async).database}_replica"
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        exists = await conn.scalar(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name})
+        if not exists:
+            await conn.execute(text(f'CREATE DATABASE "{name}"'))
+
+    url = database_url(name)
+    schema_engine = create_async_engine(url)
+    async with schema_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await schema_engine.dispose()
+    return url
+
+
+async def attach_replica(monkeypatch, url: str):
+    """Route reads to url the way app.database does when DATABASE_READ_URL is set"""
+    read_engine = create_async_engine(url, **engine_options(url))
+    monkeypatch.setattr(database_module, "read_engine", read_engine)
+    monkeypatch.setattr(
+        database_module, "read_session_maker",
+        async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    )
+    monkeypatch.setattr(database_module, "_replica_down_until", 0.0)
+    return read_engine
+
+
+@pytest.fixture
+async def replica(replica_url, monkeypatch):
+    read_engine = await attach_replica(monkeypatch, replica_url)
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    async with read_engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    yield read_engine
+    await read_engine.dispose()
+
+
+async def add_client(async_engine, full_name: str, phone: str) -> None:
+    async with async_sessionmaker(async_engine)() as db:
+        db.add(Client(full_name=full_name, phone=phone))
+        await db.commit()
+
+
+def names(response) -> list[str]:
+    return [item["full_name"] for item in response.json()["items"]]
+
+
+async def test_lists_read_from_the_replica(client, replica):
+    await add_client(engine, "Орлова Анна", "+79990000011")
+    await add_client(replica, "Соколов Павел", "+79990000012")
+
+    assert names(await client.get("/api/v1/clients")) == ["Соколов Павел"]
+    primary = await client.get("/api/v1/clients", headers={READ_CONSISTENCY_HEADER: "primary"})
+    assert names(primary) == ["Орлова Анна"]
+
+
+async def test_write_pins_the_client_to_primary(client, replica):
+    created = await client.post("/api/v1/clients", json={"full_name": "Орлова Анна", "phone": "+79990000011"})
+
+    assert created.status_code == 201
+    cookie = created.headers["set-cookie"]
+    assert cookie.startswith(f"{READ_PRIMARY_COOKIE}=1")
+    assert f"Max-Age={settings.READ_YOUR_WRITES_SECONDS}" in cookie
+    # Клиент httpx хранит cookie, как браузер: свою запись он видит сразу
+    assert names(await client.get("/api/v1/clients")) == ["Орлова Анна"]
+
+    client.cookies.clear()
+    assert names(await client.get("/api/v1/clients")) == []
+
+
+async def test_reads_do_not_set_the_cookie(client, replica):
+    response = await client.get("/api/v1/clients")
+
+    assert "set-cookie" not in response.headers
+
+
+async def test_cookie_survives_a_handler_returning_its_own_response(replica):
+    probe = FastAPI()
+    probe.add_middleware(ReadYourWritesMiddleware)
+
+    @probe.post("/write")
+    async def write(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SELECT 1"))
+        await db.commit()
+        return JSONResponse({"ok": True})
+
+    async with AsyncClient(transport=ASGITransport(app=probe), base_url="http://test") as api:
+        response = await api.post("/write")
+
+    assert response.cookies[READ_PRIMARY_COOKIE] == "1"
+
+
+async def test_reads_fall_back_to_primary_when_the_replica_is_down(client, monkeypatch):
+    read_engine = await attach_replica(monkeypatch, database_url("autocrm_replica_missing"))
+    await add_client(engine, "Орлова Анна", "+79990000011")
+
+    response = await client.get("/api/v1/clients")
+
+    assert response.status_code == 200
+    assert names(response) == ["Орлова Анна"]
+    # Следующие запросы не ждут таймаута подключения к упавшей реплике
+    assert database_module._replica_down_until > time.monotonic()
+    await read_engine.dispose()
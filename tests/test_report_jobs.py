@@ -0,0 +1,98 @@
+import asyncio
+from datetime import timedelta
+from sqlalchemy import func, select, update
+from app.config import settings
+from app.database import async_session_maker
+from app.models.report_job import ReportJob, ReportJobChunk, ReportJobStatus
+from app.schemas.report_job import DateRangeParams
+from app.services import report_jobs
+from app.services.report_jobs import REPORT_JOB_TYPES, ReportJobType, claim_job, run_job
+
+JOBS = "/api/v1/reports/jobs"
+
+
+async def enqueue(client, report: str = "sales-by-car", fmt: str = "json") -> int:
+    response = await client.post(JOBS, json={"report": report, "format": fmt})
+    assert response.status_code == 202
+    return response.json()["id"]
+
+
+async def claim() -> ReportJob:
+    async with async_session_maker() as db:
+        return await claim_job(db)
+
+
+async def test_concurrent_claims_take_different_jobs(client):
+    queued = {await enqueue(client), await enqueue(client)}
+
+    first, second = await asyncio.gather(claim(), claim())
+
+    assert {first.id, second.id} == queued
+    assert await claim() is None
+
+
+async def test_cancel_stops_a_running_job_at_its_heartbeat(client, monkeypatch):
+    started = asyncio.Event()
+    render_cancelled = asyncio.Event()
+
+    async def render(params, fmt):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            render_cancelled.set()
+            raise
+
+    monkeypatch.setitem(REPORT_JOB_TYPES, "sales-by-car", ReportJobType(DateRangeParams, ("json",), render))
+    monkeypatch.setattr(settings, "REPORT_JOB_HEARTBEAT_SECONDS", 0.05)
+    job_id = await enqueue(client)
+    running = asyncio.create_task(run_job(await claim()))
+    await started.wait()
+
+    cancelled = await client.post(f"{JOBS}/{job_id}/cancel")
+    assert cancelled.json()["status"] == ReportJobStatus.CANCELLED.value
+
+    await asyncio.wait_for(running, timeout=5)
+    assert render_cancelled.is_set()
+    job = (await client.get(f"{JOBS}/{job_id}")).json()
+    assert job["status"] == ReportJobStatus.CANCELLED.value
+    assert job["result_size"] is None
+
+
+async def test_job_with_a_stale_heartbeat_is_claimed_again(client):
+    job_id = await enqueue(client)
+    assert (await claim()).attempts == 1
+    # Пока воркер отмечается, задачу никто не трогает
+    assert await claim() is None
+
+    async with async_session_maker() as db:
+        await db.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id)
+            .values(heartbeat_at=func.now() - timedelta(seconds=settings.REPORT_JOB_STALE_SECONDS + 1))
+        )
+        await db.commit()
+
+    reclaimed = await claim()
+    assert reclaimed.id == job_id
+    assert reclaimed.status == ReportJobStatus.RUNNING
+    assert reclaimed.attempts == 2
+
+
+async def test_download_returns_every_stored_chunk(client, sale_parties, monkeypatch):
+    await client.post("/api/v1/sales", json={**sale_parties, "sale_price": 1_450_000})
+    # Несколько частей даже на одну продажу
+    monkeypatch.setattr(report_jobs, "RESULT_CHUNK_SIZE", 64)
+    job_id = await enqueue(client, "sales-export", "csv")
+    await run_job(await claim())
+
+    job = (await client.get(f"{JOBS}/{job_id}")).json()
+    download = await client.get(f"{JOBS}/{job_id}/result")
+
+    assert job["status"] == ReportJobStatus.DONE.value
+    assert download.status_code == 200
+    assert len(download.content) == job["result_size"] == int(download.headers["content-length"])
+    assert download.content == (await client.get("/api/v1/sales/export")).content
+    async with async_session_maker() as db:
+        chunks = (await db.execute(select(func.count()).where(ReportJobChunk.job_id == job_id))).scalar()
+    assert chunks == -(-job["result_size"] // 64)
@@ -0,0 +1,33 @@
+import asyncio
+from collections import Counter
+from sqlalchemy import func, select
+from app.database import async_session_maker
+from app.models import Car, Sale
+from app.models.car import CarStatus
+
+
+async def test_parallel_sales_of_one_car_sell_it_once(client, sale_parties):
+    payload = {**sale_parties, "sale_price": 1_450_000}
+
+    responses = await asyncio.gather(*(client.post("/api/v1/sales", json=payload) for _ in range(100)))
+
+    statuses = Counter(response.status_code for response in responses)
+    assert statuses == {201: 1, 400: 99}
+    rejected = next(response for response in responses if response.status_code == 400)
+    assert rejected.json()["detail"] == "Car is not available"
+
+    async with async_session_maker() as db:
+        sales = (await db.execute(select(func.count(Sale.id)).where(Sale.car_id == sale_parties["car_id"]))).scalar()
+        status = (await db.execute(select(Car.status).where(Car.id == sale_parties["car_id"]))).scalar()
+    assert sales == 1
+    assert status == CarStatus.SOLD
+
+
+async def test_sale_response_is_built_without_reload(client, sale_parties):
+    response = await client.post("/api/v1/sales", json={**sale_parties, "sale_price": 1_450_000})
+
+    assert response.status_code == 201
+    sale = response.json()
+    assert sale["car"]["status"] == CarStatus.SOLD.value
+    assert sale["client"]["id"] == sale_parties["client_id"]
+    assert sale["seller"]["id"] == sale_parties["seller_id"]
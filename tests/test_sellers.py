@@ -0,0 +1,47 @@
+import pytest
+from app.database import async_session_maker
+from app.models import Car, Client, Sale, Seller
+from app.models.car import CarStatus
+
+SELLERS = 30
+SALES_PER_SELLER = 2
+
+
+@pytest.fixture
+async def sellers_with_sales() -> None:
+    async with async_session_maker() as db:
+        buyer = Client(full_name="Сидоров Сидор", phone="+79990000003")
+        sellers = [Seller(full_name=f"Продавец {i}", phone="+79990000004", is_active=True) for i in range(SELLERS)]
+        db.add(buyer)
+        db.add_all(sellers)
+        await db.flush()
+        for i, seller in enumerate(sellers):
+            for j in range(SALES_PER_SELLER):
+                car = Car(
+                    vin=f"XTA21099{i:05d}{j:04d}", brand="Lada", model="21099", year=2003,
+                    price=200_000, status=CarStatus.SOLD
+                )
+                db.add(car)
+                await db.flush()
+                db.add(Sale(car_id=car.id, client_id=buyer.id, seller_id=seller.id, sale_price=190_000))
+        await db.commit()
+
+
+# Версии таблиц для ETag и страница со статистикой одним запросом; include_total добавил бы count
+@pytest.mark.query_budget(2, max_repeats=1)
+async def test_seller_list_statements_do_not_grow_with_page(client, sellers_with_sales):
+    response = await client.get("/api/v1/sellers", params={"per_page": 100, "include_total": False})
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert len(items) == SELLERS
+    assert {item["sales_count"] for item in items} == {SALES_PER_SELLER}
+    assert {item["total_revenue"] for item in items} == {SALES_PER_SELLER * 190_000}
+
+
+@pytest.mark.query_budget(3, max_repeats=1)
+async def test_seller_list_with_total_adds_one_count(client, sellers_with_sales):
+    response = await client.get("/api/v1/sellers", params={"per_page": 100})
+
+    assert response.status_code == 200
+    assert response.json()["total"] == SELLERS
@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Unit tests run without a database: this replaces the cleanup that needs one"""
@@ -0,0 +1,11 @@
+from app.auth.passwords import get_password_hash_async, shutdown_password_executor, verify_password_async
+
+
+async def test_password_checks_work_after_a_shutdown():
+    hashed = await get_password_hash_async("secret")
+    # Второй цикл lifespan в том же процессе, как у повторно открытого TestClient
+    shutdown_password_executor()
+
+    assert await verify_password_async("secret", hashed)
+    assert not await verify_password_async("wrong", hashed)
+    shutdown_password_executor()
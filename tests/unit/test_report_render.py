@@ -0,0 +1,54 @@
+import asyncio
+import os
+import signal
+import tempfile
+from types import SimpleNamespace
+import pytest
+from app.services import report_render
+from app.services.report_render import render_report_xlsx, shutdown_render_executor
+
+
+def sales_by_car(rows: int) -> SimpleNamespace:
+    item = SimpleNamespace(brand="Lada", model="Vesta", sales_count=3, total_revenue=3_600_000.0)
+    return SimpleNamespace(data=[item] * rows)
+
+
+@pytest.fixture
+def render_dir(tmp_path, monkeypatch):
+    """Temp files of the renders land here; the pool is rebuilt for each test"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    shutdown_render_executor()
+    yield tmp_path
+    shutdown_render_executor()
+
+
+async def test_render_recovers_from_a_killed_worker(render_dir):
+    path = await render_report_xlsx("sales-by-car", sales_by_car(10))
+    os.unlink(path)
+    broken = report_render._executor
+    for process in list(broken._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+    await asyncio.sleep(0.5)
+
+    path = await render_report_xlsx("sales-by-car", sales_by_car(10))
+
+    assert os.path.getsize(path) > 0
+    assert report_render._executor is not broken
+    os.unlink(path)
+
+
+async def test_cancelled_render_leaves_no_file(render_dir, monkeypatch):
+    monkeypatch.setattr(report_render.settings, "REPORT_RENDER_WORKERS", 1)
+    os.unlink(await render_report_xlsx("sales-by-car", sales_by_car(1)))
+    render = asyncio.create_task(render_report_xlsx("sales-by-car", sales_by_car(300_000)))
+    # Воркер уже запущен и пишет книгу, отмена его не остановит
+    await asyncio.sleep(1)
+
+    render.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await render
+    # Единственный воркер возьмёт следующий рендер, только дописав отменённый
+    os.unlink(await render_report_xlsx("sales-by-car", sales_by_car(1)))
+    await asyncio.sleep(0.1)
+
+    assert list(render_dir.iterdir()) == []
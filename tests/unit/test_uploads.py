@@ -0,0 +1,20 @@
+import io
+import threading
+from app.services.uploads import iter_file_rows, parse_in_thread
+
+
+async def test_rows_are_parsed_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    parsed_in = set()
+
+    def rows():
+        for number, row in iter_file_rows(io.BytesIO(b'[{"a": 1}, {"a": 2}, {"a": 3}, 4]'), "json"):
+            parsed_in.add(threading.get_ident())
+            yield number, row
+
+    result = [row async for row in parse_in_thread(rows(), batch_size=2)]
+
+    assert [number for number, _ in result] == [1, 2, 3, 4]
+    assert result[0][1] == {"a": 1}
+    assert isinstance(result[3][1], ValueError)
+    assert loop_thread not in parsed_in
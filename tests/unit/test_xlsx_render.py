@@ -0,0 +1,39 @@
+import re
+import zipfile
+from datetime import date
+from app.services.xlsx_render import render_xlsx
+
+COLUMNS = [("Date", "date"), ("Seller", "text"), ("Sales", "int"), ("Revenue", "money")]
+
+
+def read_sheet(path) -> tuple[str, str]:
+    with zipfile.ZipFile(path) as workbook:
+        return workbook.read("xl/workbook.xml").decode(), workbook.read("xl/worksheets/sheet1.xml").decode()
+
+
+def test_render_writes_header_rows_and_filter(tmp_path):
+    path = tmp_path / "report.xlsx"
+    rows = [(date(2026, 1, 1), "Кузнецова Елена", 3, 4_500_000.5), (date(2026, 1, 2), "Орлов Иван", 1, 900_000.0)]
+
+    written = render_xlsx(str(path), "Sales by seller", COLUMNS, rows)
+
+    assert written == 2
+    workbook, sheet = read_sheet(path)
+    assert 'name="Sales by seller"' in workbook
+    assert re.findall(r'<row r="(\d+)"', sheet) == ["1", "2", "3"]
+    assert '<autoFilter ref="A1:D3"/>' in sheet
+    assert "<v>4500000.5</v>" in sheet
+    assert "Кузнецова Елена" in sheet
+
+
+def test_render_trims_long_titles_and_handles_no_rows(tmp_path):
+    path = tmp_path / "empty.xlsx"
+
+    written = render_xlsx(str(path), "A sheet title well over thirty-one characters", COLUMNS, [])
+
+    assert written == 0
+    workbook, sheet = read_sheet(path)
+    assert 'name="A sheet title well over thirty-"' in workbook
+    assert re.findall(r'<row r="(\d+)"', sheet) == ["1"]
+    # Без строк фильтр всё равно захватывает одну строку под заголовком
+    assert '<autoFilter ref="A1:D2"/>' in sheet